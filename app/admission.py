@@ -0,0 +1,182 @@
+"""
+Admission Control für /webhook: Rate Limits pro Quelle und Load Shedding
+
+Ein falsch konfigurierter Alert ("once per bar" auf 1m über hunderte
+Symbole) soll weder den Webhook-Writer noch die Dashboard-Leser ausbremsen.
+Vor dem Anwenden eines Updates prüft receive_webhook. Niedrige Priorität
+haben wiederholte Trends (der Wert steht schon so im State); Signale,
+Macro-Alerts und Trendwechsel gehen vor:
+
+1. Queue-Tiefe (Writer-Queue + Start-Warteschlange):
+   - ab ADMISSION_QUEUE_MAX: 503 für alles
+   - ab ADMISSION_TREND_QUEUE_SHARE davon: 503 für wiederholte Trends
+2. Token Bucket pro Symbol nur für wiederholte Trends
+   (ADMISSION_SYMBOL_RATE/s, Burst ADMISSION_SYMBOL_BURST)
+3. Token Bucket pro Client-IP (ADMISSION_IP_RATE/s, Burst ADMISSION_IP_BURST):
+   wiederholte Trends dürfen den Anteil ADMISSION_SIGNAL_RESERVE des
+   Bursts nicht verbrauchen, der bleibt für alles andere reserviert
+
+Rate Limits antworten mit 429, Überlast mit 503, beide mit Retry-After
+(ganze Sekunden). Abgelehnte Alerts kosten nur Parsen und die Prüfung.
+Die Client-IP kommt von uvicorn (hinter Railway: FORWARDED_ALLOW_IPS="*"
+setzen, damit X-Forwarded-For übernommen wird).
+
+Im Cluster-Modus prüft jeder Worker seine eigenen Buckets; die Queue-Tiefe
+kennt nur der Writer. Alle Zugriffe laufen im Event-Loop, daher ohne Locks.
+"""
+
+from collections import OrderedDict
+from math import ceil
+from typing import Dict, NamedTuple, Optional, Tuple
+import os
+import time
+
+ADMISSION_ENABLED = os.environ.get("ADMISSION_ENABLED", "1") != "0"
+ADMISSION_IP_RATE = float(os.environ.get("ADMISSION_IP_RATE", "50"))
+ADMISSION_IP_BURST = float(os.environ.get("ADMISSION_IP_BURST", "1000"))
+# Anteil des IP-Bursts, den wiederholte Trends nicht verbrauchen dürfen
+ADMISSION_SIGNAL_RESERVE = float(os.environ.get("ADMISSION_SIGNAL_RESERVE", "0.2"))
+ADMISSION_SYMBOL_RATE = float(os.environ.get("ADMISSION_SYMBOL_RATE", "0.5"))
+ADMISSION_SYMBOL_BURST = float(os.environ.get("ADMISSION_SYMBOL_BURST", "20"))
+ADMISSION_QUEUE_MAX = int(os.environ.get("ADMISSION_QUEUE_MAX", "5000"))
+# Wiederholte Trends werden schon ab diesem Anteil von ADMISSION_QUEUE_MAX abgewiesen
+ADMISSION_TREND_QUEUE_SHARE = float(os.environ.get("ADMISSION_TREND_QUEUE_SHARE", "0.5"))
+# Max. gemerkte Buckets pro Art (LRU; ein verdrängter Bucket wäre ohnehin voll)
+ADMISSION_MAX_BUCKETS = int(os.environ.get("ADMISSION_MAX_BUCKETS", "10000"))
+
+
+class Rejection(NamedTuple):
+    """Abgelehnter Alert: HTTP-Status, Grund (queue/queue_trend/ip/symbol), Retry-After in Sekunden"""
+    status: int
+    reason: str
+    retry_after: int
+
+
+class TokenBucket:
+    """Klassischer Token Bucket; Tokens werden beim Zugriff nachgefüllt"""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float, cost: float = 1.0, reserve: float = 0.0) -> float:
+        """
+        Nimmt cost Tokens, wenn danach noch reserve übrig bleiben.
+
+        Returns:
+            0.0 wenn angenommen, sonst Sekunden bis genug Tokens da sind
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        missing = cost + reserve - self.tokens
+        if missing <= 0:
+            self.tokens -= cost
+            return 0.0
+        return missing / self.rate if self.rate > 0 else float("inf")
+
+
+class BucketMap:
+    """Begrenzte Menge Token Buckets (LRU) mit gleichen Parametern"""
+
+    def __init__(self, rate: float, burst: float, max_buckets: int = ADMISSION_MAX_BUCKETS):
+        self.rate = rate
+        self.burst = burst
+        self.max_buckets = max_buckets
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def take(self, key: str, now: float, reserve: float = 0.0) -> float:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.burst, now)
+            if len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket.take(now, reserve=reserve)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class AdmissionControl:
+    """Entscheidet pro Alert über Annahme, 429 oder 503"""
+
+    def __init__(self, enabled: bool = ADMISSION_ENABLED,
+                 ip_rate: float = ADMISSION_IP_RATE, ip_burst: float = ADMISSION_IP_BURST,
+                 signal_reserve: float = ADMISSION_SIGNAL_RESERVE,
+                 symbol_rate: float = ADMISSION_SYMBOL_RATE, symbol_burst: float = ADMISSION_SYMBOL_BURST,
+                 queue_max: int = ADMISSION_QUEUE_MAX, trend_queue_share: float = ADMISSION_TREND_QUEUE_SHARE):
+        self.enabled = enabled
+        self.ips = BucketMap(ip_rate, ip_burst)
+        self.symbols = BucketMap(symbol_rate, symbol_burst)
+        self.signal_reserve = ip_burst * signal_reserve
+        self.queue_max = queue_max
+        self.trend_queue_max = int(queue_max * trend_queue_share)
+        # Zähler für /health und /metrics: (Typ, Ergebnis) -> Anzahl
+        self.counts: Dict[Tuple[str, str], int] = {}
+
+    def _reject(self, kind: str, status: int, reason: str, wait: float) -> Rejection:
+        self.counts[(kind, reason)] = self.counts.get((kind, reason), 0) + 1
+        return Rejection(status, reason, max(1, ceil(wait)))
+
+    def check(self, client: Optional[str], kind: str, symbol: str, repeated: bool, queue_depth: int,
+              now: Optional[float] = None) -> Optional[Rejection]:
+        """
+        Prüft einen geparsten Alert.
+
+        Args:
+            client: Client-IP (None, wenn unbekannt: kein IP-Limit)
+            kind: "trend" / "signal" / "macro" (nur für die Zähler)
+            symbol: Symbol des Alerts
+            repeated: Trend ohne Änderung gegenüber dem State (niedrige Priorität)
+            queue_depth: Updates, die noch auf den Writer warten
+
+        Returns:
+            None wenn angenommen, sonst die Ablehnung
+        """
+        if not self.enabled:
+            return None
+        if queue_depth >= self.queue_max:
+            return self._reject(kind, 503, "queue", 1)
+        if repeated and queue_depth >= self.trend_queue_max:
+            return self._reject(kind, 503, "queue_trend", 1)
+
+        now = time.monotonic() if now is None else now
+        if repeated:
+            # Symbol zuerst: ein gedrosselter Trend verbraucht kein IP-Token
+            wait = self.symbols.take(symbol, now)
+            if wait:
+                return self._reject(kind, 429, "symbol", wait)
+        if client is not None:
+            wait = self.ips.take(client, now, reserve=self.signal_reserve if repeated else 0.0)
+            if wait:
+                return self._reject(kind, 429, "ip", wait)
+
+        self.counts[(kind, "admitted")] = self.counts.get((kind, "admitted"), 0) + 1
+        return None
+
+    def check_batch(self, queue_depth: int) -> Optional[Rejection]:
+        """/webhook/batch: nur die harte Queue-Grenze (Aggregatoren und Replays)"""
+        if self.enabled and queue_depth >= self.queue_max:
+            return self._reject("batch", 503, "queue", 1)
+        return None
+
+    def stats(self) -> Dict:
+        shed = {}
+        for (kind, result), count in self.counts.items():
+            if result != "admitted":
+                shed[result] = shed.get(result, 0) + count
+        return {
+            "enabled": self.enabled,
+            "admitted": sum(count for (_, result), count in self.counts.items() if result == "admitted"),
+            "shed": shed,
+            "ip_buckets": len(self.ips),
+            "symbol_buckets": len(self.symbols),
+        }
+
+
+admission = AdmissionControl()
@@ -0,0 +1,279 @@
+"""
+Abgeleitete Kennzahlen pro Coin und Ranking (GET /api/rankings)
+
+Wird bei jedem angewendeten Webhook inkrementell nachgeführt (aus
+StateStore.apply), Kosten pro Update unabhängig von der Anzahl Coins:
+    - score:      gewichtete Trend-Summe 1W/3D/1D (+3/+2/+1 bzw. negativ), -6..6
+    - alignment:  "bullish" / "bearish" wenn alle drei Timeframes gleich stehen
+    - last_flip:  Zeitpunkt des letzten Trendwechsels pro Timeframe
+    - signal:     letztes Signal und ob es zur Trendrichtung passt
+    - confluence: score + 1 für Buy bzw. -1 für Sell, Sortierschlüssel des Rankings
+    - regime:     Markt-Regime aus den Macro-Indikatoren (risk_on / neutral / risk_off)
+
+Das Ranking liegt in Buckets pro Confluence-Wert (ganzzahlig, -7..7),
+innerhalb eines Buckets nach Symbol sortiert. Ein Update verschiebt ein
+Symbol zwischen zwei Buckets (bisect), das Auslesen ist O(limit).
+
+Trendwechsel vor dem Start werden einmalig im Hintergrund aus
+webhook_events nachgeladen (ANALYTICS_BACKFILL_DAYS, 0 = aus).
+"""
+
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+import asyncio
+import logging
+import os
+import threading
+
+from sqlalchemy import case, func, select
+
+from .database import ReadSessionLocal, WebhookEvent
+from .indicators import COIN_COLUMNS, timeframe_aliases
+from .serializers import MACRO_ORDER, isoformat_utc
+
+logger = logging.getLogger(__name__)
+
+# Wie weit der Start-Backfill der Trendwechsel zurückschaut (0 = aus)
+ANALYTICS_BACKFILL_DAYS = int(os.environ.get("ANALYTICS_BACKFILL_DAYS", "30"))
+
+# Gewichte wie im Dashboard (static/index.html): höhere Timeframes zählen mehr
+TREND_WEIGHTS = {"trend_1w": 3, "trend_3d": 2, "trend_1d": 1}
+TIMEFRAME_KEYS = {"trend_1w": "1w", "trend_3d": "3d", "trend_1d": "1d"}
+SIGNAL_WEIGHTS = {"buy": 1, "sell": -1}
+# Steigende Stablecoin-Dominanz ist bärisch für den Markt
+INVERTED_MACROS = {"USDT.D"}
+# Ab diesem Betrag der Regime-Summe (max. 2 pro Macro) gilt risk_on / risk_off
+REGIME_THRESHOLD = 4
+
+
+def trend_score(coin) -> int:
+    """Gewichtete Trend-Summe: uptrend positiv, downtrend negativ, fehlend 0"""
+    score = 0
+    for column, weight in TREND_WEIGHTS.items():
+        value = getattr(coin, column)
+        if value == "uptrend":
+            score += weight
+        elif value == "downtrend":
+            score -= weight
+    return score
+
+
+def alignment_of(coin) -> Optional[str]:
+    """"bullish"/"bearish" wenn alle Timeframes in dieselbe Richtung zeigen"""
+    values = {getattr(coin, column) for column in TREND_WEIGHTS}
+    if values == {"uptrend"}:
+        return "bullish"
+    if values == {"downtrend"}:
+        return "bearish"
+    return None
+
+
+class CoinMetrics:
+    """Abgeleitete Werte eines Coins plus vorgebaute JSON-Zeile"""
+
+    __slots__ = ("coin", "confluence", "flips", "row")
+
+    def __init__(self, coin):
+        self.coin = coin
+        self.confluence = 0
+        self.flips: Dict[str, Optional[datetime]] = dict.fromkeys(TREND_WEIGHTS)
+        self.row: dict = {}
+
+    def refresh(self):
+        """Berechnet alle Werte aus der aktuellen Zeile neu (O(1))"""
+        coin = self.coin
+        score = trend_score(coin)
+        signal = coin.last_signal_type
+        direction = SIGNAL_WEIGHTS.get(signal, 0)
+        self.confluence = score + direction
+        self.row = {
+            "symbol": coin.symbol,
+            "display_name": coin.display_name,
+            "score": score,
+            "confluence": self.confluence,
+            "alignment": alignment_of(coin),
+            "trends": {TIMEFRAME_KEYS[column]: getattr(coin, column) for column in TREND_WEIGHTS},
+            "last_flip": {TIMEFRAME_KEYS[column]: isoformat_utc(at) for column, at in self.flips.items()},
+            "signal": {
+                "type": signal,
+                "time": isoformat_utc(coin.last_signal_time),
+                # Buy bei positivem bzw. Sell bei negativem Trend-Score
+                "agrees": None if not direction or not score else (direction > 0) == (score > 0),
+            },
+            "last_updated": isoformat_utc(coin.last_updated),
+        }
+
+
+class AnalyticsEngine:
+    """Inkrementell gepflegte Kennzahlen und Ranking über alle Coins"""
+
+    def __init__(self):
+        self.coins: Dict[str, CoinMetrics] = {}
+        # Confluence -> sortierte Symbole
+        self._buckets: Dict[int, List[str]] = {}
+        self.regime: dict = {"regime": "neutral", "score": 0, "indicators": {}}
+        # Wird bei jeder Änderung erhöht (Schlüssel für den Payload-Cache)
+        self.version = 0
+        self._backfill: Optional[threading.Thread] = None
+
+    # ===== Pflege =====
+
+    def rebuild(self, coins: Iterable, macros: Dict):
+        """Voller Neuaufbau (beim Laden des States); bekannte Trendwechsel bleiben"""
+        previous = self.coins
+        self.coins, self._buckets = {}, {}
+        for coin in coins:
+            metrics = CoinMetrics(coin)
+            if coin.symbol in previous:
+                metrics.flips = previous[coin.symbol].flips
+            metrics.refresh()
+            self.coins[coin.symbol] = metrics
+            self._buckets.setdefault(metrics.confluence, []).append(coin.symbol)
+        for bucket in self._buckets.values():
+            bucket.sort()
+        self.update_macros(macros)
+
+    def update_coin(self, coin, previous: Dict[str, Optional[str]], at: datetime):
+        """
+        Nach einem angewendeten Coin-Update.
+
+        Args:
+            coin: Zeile nach dem Update
+            previous: alter Wert pro geänderter Trend-Spalte
+            at: Empfangszeitpunkt (Zeitpunkt eines Trendwechsels)
+        """
+        metrics = self.coins.get(coin.symbol)
+        if metrics is None:
+            metrics = self.coins[coin.symbol] = CoinMetrics(coin)
+            old_confluence = None
+        else:
+            old_confluence = metrics.confluence
+        for column, old_value in previous.items():
+            if old_value is not None and old_value != getattr(coin, column):
+                metrics.flips[column] = at
+        metrics.refresh()
+        if metrics.confluence != old_confluence:
+            if old_confluence is not None:
+                self._remove(old_confluence, coin.symbol)
+            insort(self._buckets.setdefault(metrics.confluence, []), coin.symbol)
+        self.version += 1
+
+    def _remove(self, confluence: int, symbol: str):
+        bucket = self._buckets[confluence]
+        del bucket[bisect_left(bucket, symbol)]
+        if not bucket:
+            del self._buckets[confluence]
+
+    def update_macros(self, macros: Dict):
+        """Regime aus allen Macro-Indikatoren (wenige Zeilen)"""
+        score, indicators = 0, {}
+        for symbol in MACRO_ORDER:
+            macro = macros.get(symbol)
+            if macro is None:
+                continue
+            sign = -1 if symbol in INVERTED_MACROS else 1
+            contribution = sum(
+                sign if value == "bullish" else -sign
+                for value in (macro.trend_1m, macro.macd_1m)
+            )
+            indicators[symbol] = contribution
+            score += contribution
+        if score >= REGIME_THRESHOLD:
+            regime = "risk_on"
+        elif score <= -REGIME_THRESHOLD:
+            regime = "risk_off"
+        else:
+            regime = "neutral"
+        self.regime = {"regime": regime, "score": score, "indicators": indicators}
+        self.version += 1
+
+    # ===== Auslesen =====
+
+    def ranked(self, limit: Optional[int] = None, ascending: bool = False,
+               alignment: Optional[str] = None) -> List[dict]:
+        """Zeilen nach Confluence (Symbol als zweiter Schlüssel), höchstens limit"""
+        rows: List[dict] = []
+        for confluence in sorted(self._buckets, reverse=not ascending):
+            for symbol in self._buckets[confluence]:
+                row = self.coins[symbol].row
+                if alignment is not None and row["alignment"] != alignment:
+                    continue
+                rows.append(row)
+                if limit is not None and len(rows) >= limit:
+                    return rows
+        return rows
+
+    # ===== Backfill der Trendwechsel =====
+
+    def start_backfill(self, days: int = ANALYTICS_BACKFILL_DAYS):
+        """Lädt die letzten Trendwechsel aus webhook_events in einem Hintergrund-Thread"""
+        if days <= 0 or (self._backfill and self._backfill.is_alive()):
+            return
+        loop = asyncio.get_running_loop()
+        since = datetime.utcnow() - timedelta(days=days)
+
+        def run():
+            try:
+                flips = load_flips(since)
+            except Exception as e:
+                logger.error(f"❌ Backfill der Trendwechsel fehlgeschlagen: {e}")
+                return
+            loop.call_soon_threadsafe(self.merge_flips, flips)
+
+        self._backfill = threading.Thread(target=run, name="analytics-backfill", daemon=True)
+        self._backfill.start()
+
+    def merge_flips(self, flips: Dict[Tuple[str, str], datetime]):
+        """Übernimmt Trendwechsel aus der Historie (läuft im Event-Loop)"""
+        changed = set()
+        for (symbol, column), at in flips.items():
+            metrics = self.coins.get(symbol)
+            current = metrics.flips.get(column) if metrics else None
+            if metrics is not None and (current is None or current < at):
+                metrics.flips[column] = at
+                changed.add(symbol)
+        for symbol in changed:
+            self.coins[symbol].refresh()
+        if changed:
+            self.version += 1
+        logger.info(f"✅ Trendwechsel nachgeladen: {len(flips)} Serien, {len(changed)} Coins")
+
+
+def load_flips(since: datetime) -> Dict[Tuple[str, str], datetime]:
+    """
+    Letzter Trendwechsel pro (Symbol, Spalte) seit since.
+    Ein Query mit Window-Funktion (SQLite >= 3.25 und PostgreSQL).
+    """
+    # Nur die gewichteten Timeframes (inkl. Schreibweisen wie "7d"); 4h, 12h, ... zählen nicht
+    timeframes = {name: timeframe_aliases(COIN_COLUMNS[name][0]) for name in TREND_WEIGHTS}
+    column = case(
+        *((WebhookEvent.timeframe.in_(aliases), name) for name, aliases in timeframes.items()),
+    )
+    events = select(
+        WebhookEvent.symbol,
+        column.label("column"),
+        WebhookEvent.value,
+        WebhookEvent.received_at,
+        func.lag(WebhookEvent.value).over(
+            partition_by=(WebhookEvent.symbol, column),
+            order_by=(WebhookEvent.received_at, WebhookEvent.id),
+        ).label("previous"),
+    ).where(
+        WebhookEvent.type == "trend",
+        WebhookEvent.timeframe.in_([alias for aliases in timeframes.values() for alias in aliases]),
+        WebhookEvent.received_at >= since,
+    ).subquery()
+    query = (
+        select(events.c.symbol, events.c.column, func.max(events.c.received_at))
+        .where(events.c.previous.is_not(None), events.c.previous != events.c.value)
+        .group_by(events.c.symbol, events.c.column)
+    )
+    db = ReadSessionLocal()
+    try:
+        return {(symbol, name): at for symbol, name, at in db.execute(query)}
+    finally:
+        db.close()
+
+
+analytics = AnalyticsEngine()
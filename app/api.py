@@ -2,26 +2,252 @@
 API Routes für das Trading Dashboard
 Endpoints:
     POST /webhook      - TradingView Webhook empfangen
-    GET  /api/coins    - Alle Coins mit Status abrufen
+    POST /webhook/batch - Viele Alerts pro Request (Zeilen oder JSON-Array)
+    GET  /api/coins    - Coins mit Status (Filter, Cursor-Pagination, since=Version)
     GET  /api/macro    - Alle Macro-Indikatoren abrufen
-    GET  /health       - Health Check
+    GET  /api/snapshot - Coins und Macros in einer Antwort (JSON, spaltenweise, MessagePack)
+    GET  /api/rankings - Coins nach Trend-Confluence sortiert, Markt-Regime
+    GET  /api/stream   - Live-Updates (Server-Sent Events)
+    GET  /api/history  - Webhook-Historie (Zeitbereich, Keyset-Pagination)
+    GET  /livez        - Liveness (keine I/O)
+    GET  /readyz       - Readiness (gecachter DB-Heartbeat)
+    GET  /health       - Health Check mit Details
+    GET  /metrics      - Prometheus-Metriken
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from sqlalchemy.orm import Session
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timezone
+from typing import Dict, Optional
 import logging
+import time
 
-from .database import get_db, CoinState, MacroState
+from .admission import Rejection, admission
+from .analytics import analytics
+from .batch import MAX_BATCH_ITEMS, MalformedBatch, iter_batch
+from .cache import PayloadCache, cached_response
+from .database import get_read_db
+from .cluster import cluster
+from .coin_index import FIELDS, FILTER_COLUMNS, InvalidQuery
+from .dedup import dedup
+from .health import heartbeat
+from .history import InvalidCursor, query_history
+from .ingest import writer, build_update
+from .logs import logs
+from . import metrics
+from .serializers import dumps, isoformat_utc, macro_to_dict
+from .snapshot import FORMAT_NAMES, MEDIA_JSON, MEDIA_TYPES, columnar, encoder, negotiate
+from .startup import StartupQueueFull, startup
+from .state import state
 from .webhook_parser import parse_webhook
+from .stream import hub, format_event
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+def parse_timed(message: str) -> Optional[dict]:
+    """parse_webhook mit Zeitmessung für /metrics"""
+    started = time.perf_counter()
+    parsed = parse_webhook(message)
+    metrics.parse_seconds.observe(time.perf_counter() - started)
+    return parsed
+
+
+def build_coins() -> list:
+    """Alle Coins sortiert nach Anzeigename (aus dem In-Memory State)"""
+    return state.coin_rows()
+
+
+def build_macro() -> list:
+    """Alle bekannten Macro-Indikatoren in fester Anzeige-Reihenfolge"""
+    return [macro_to_dict(macro) for macro in state.ordered_macros()]
+
+
+def build_coins_payload() -> dict:
+    coins = build_coins()
+    return {
+        "coins": coins,
+        "total_coins": len(coins),
+        "timestamp": isoformat_utc(state.last_coin_update)
+    }
+
+
+def coins_version_header() -> dict:
+    """
+    Version für since= bei gecachten Antworten als Header: das Token ist
+    pro Prozess verschieden, der Body (und damit der ETag) soll in allen
+    Workern gleich sein.
+    """
+    return {"X-Coins-Version": state.index.token}
+
+
+def select_fields(rows: list, fields: Optional[list]) -> list:
+    """Nur die angefragten Top-Level-Felder jeder Zeile (fields=...)"""
+    if not fields:
+        return rows
+    return [{name: row[name] for name in fields} for row in rows]
+
+
+def build_coins_changes(since: str, fields: Optional[list]) -> dict:
+    """
+    Nur Coins, die sich seit der Version since geändert haben.
+    Bei einer fremden Epoche (Neustart, Resync) alle Coins mit "full": true.
+    """
+    index = state.index
+    changed = index.changed_since(since)
+    full = changed is None
+    rows = state.coin_rows() if full else [index.payload(symbol) for symbol in changed]
+    return {
+        "coins": select_fields(rows, fields),
+        "total_coins": len(state.coins),
+        "full": full,
+        "version": index.token,
+        "timestamp": isoformat_utc(state.last_coin_update)
+    }
+
+
+def build_coins_page(filters: dict, updated_since: Optional[datetime], sort: str, descending: bool,
+                     cursor: Optional[str], limit: int, fields: Optional[list]) -> dict:
+    """Gefilterte, sortierte Seite aus dem Index (app/coin_index.py)"""
+    index = state.index
+    symbols, next_cursor = index.query(state.coins, filters, updated_since, sort, descending, cursor, limit)
+    return {
+        "coins": select_fields([index.payload(symbol) for symbol in symbols], fields),
+        "total_coins": len(state.coins),
+        "next_cursor": next_cursor,
+        "version": index.token,
+        "timestamp": isoformat_utc(state.last_coin_update)
+    }
+
+
+def build_macro_payload() -> dict:
+    macro = build_macro()
+    return {
+        "macro": macro,
+        "total_indicators": len(macro),
+        "timestamp": isoformat_utc(state.last_macro_update)
+    }
+
+
+def build_snapshot() -> dict:
+    """Kompletter Stand für neue Stream-Clients"""
+    return {
+        "coins": build_coins(),
+        "macro": build_macro(),
+        "timestamp": isoformat_utc(state.updated_at)
+    }
+
+
+def snapshot_version_header() -> dict:
+    """Version für since= bei /api/snapshot: Coin-Token plus Macro-Version (pro Prozess)"""
+    return {"X-Snapshot-Version": f"{state.index.token}.{state.macro_version}"}
+
+
+def build_snapshot_columnar() -> dict:
+    compact = state.index.compact
+    return columnar([compact(coin.symbol) for coin in state.sorted_coins()], state.ordered_macros(), state.updated_at)
+
+
+def build_snapshot_changes(since: str, media_type: str) -> dict:
+    """
+    Nur Coins, die sich seit since ("<epoche>.<coin-version>.<macro-version>")
+    geändert haben; Macros (wenige Zeilen) komplett, sobald sich einer
+    geändert hat. Bei einer fremden Epoche alles mit "full": true.
+    """
+    coin_token, _, macro_version = since.rpartition(".")
+    try:
+        macro_version = int(macro_version)
+    except ValueError:
+        raise InvalidQuery(f"Invalid version: {since}")
+    index = state.index
+    changed = index.changed_since(coin_token)
+    full = changed is None
+    coins = state.sorted_coins() if full else [state.coins[symbol] for symbol in changed]
+    macros = state.ordered_macros() if full or macro_version != state.macro_version else []
+    if media_type == MEDIA_JSON:
+        payload = {
+            "coins": [index.payload(coin.symbol) for coin in coins],
+            "macro": [macro_to_dict(macro) for macro in macros],
+            "timestamp": isoformat_utc(state.updated_at)
+        }
+    else:
+        payload = columnar([index.compact(coin.symbol) for coin in coins], macros, state.updated_at)
+    payload["full"] = full
+    payload["version"] = snapshot_version_header()["X-Snapshot-Version"]
+    return payload
+
+
+def build_rankings_payload(limit: Optional[int] = None, ascending: bool = False,
+                           alignment: Optional[str] = None) -> dict:
+    rankings = analytics.ranked(limit, ascending, alignment)
+    return {
+        "rankings": rankings,
+        "total_coins": len(analytics.coins),
+        "regime": analytics.regime,
+        "timestamp": isoformat_utc(state.updated_at)
+    }
+
+
+coins_cache = PayloadCache(build_coins_payload)
+macro_cache = PayloadCache(build_macro_payload)
+rankings_cache = PayloadCache(build_rankings_payload)
+# fields= ohne Filter: ein Cache pro Feld-Kombination (höchstens 2^5)
+sparse_caches: Dict[tuple, PayloadCache] = {}
+
+
+def sparse_coins_cache(fields: tuple) -> PayloadCache:
+    cache = sparse_caches.get(fields)
+    if cache is None:
+        def build() -> dict:
+            payload = build_coins_payload()
+            payload["coins"] = select_fields(payload["coins"], list(fields))
+            return payload
+        cache = sparse_caches[fields] = PayloadCache(build)
+    return cache
+
+
+# /api/snapshot: ein Cache pro Media-Type (erst bei der ersten Anfrage angelegt)
+snapshot_caches: Dict[str, PayloadCache] = {}
+
+
+def snapshot_cache(media_type: str) -> PayloadCache:
+    cache = snapshot_caches.get(media_type)
+    if cache is None:
+        builder = build_snapshot if media_type == MEDIA_JSON else build_snapshot_columnar
+        cache = snapshot_caches[media_type] = PayloadCache(builder, encoder(media_type))
+    return cache
+
+
+def payload_caches() -> list:
+    """(Endpoint-Label, Cache) für /metrics; Snapshot-Caches pro Media-Type"""
+    caches = [("coins", coins_cache), ("macro", macro_cache)]
+    caches += [(f"snapshot_{FORMAT_NAMES[media_type]}", cache) for media_type, cache in sorted(snapshot_caches.items())]
+    return caches
+
+
+def ingest(updates: list, idempotency_key: Optional[str] = None) -> Optional[list]:
+    """cluster.ingest, während des Starts stattdessen die Start-Warteschlange"""
+    if startup.ready:
+        return cluster.ingest(updates, idempotency_key)
+    try:
+        return startup.enqueue(updates, idempotency_key)
+    except StartupQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+
+def rejected(rejection: Rejection) -> JSONResponse:
+    """429/503 mit Retry-After, ohne den Umweg über HTTPException"""
+    detail = "Too many requests" if rejection.status == 429 else "Overloaded"
+    return JSONResponse(
+        {"detail": f"{detail} ({rejection.reason}), retry after {rejection.retry_after}s"},
+        status_code=rejection.status, headers={"Retry-After": str(rejection.retry_after)},
+    )
+
+
 @router.post("/webhook")
-async def receive_webhook(request: Request, db: Session = Depends(get_db)):
+async def receive_webhook(request: Request):
     """
     Empfängt TradingView Webhook-Nachrichten.
     
@@ -30,249 +256,517 @@ async def receive_webhook(request: Request, db: Session = Depends(get_db)):
         - Signale: "HYPEUSDT.P, 1D - Buy Signal"
         - Macro:   "BTC MACRO 1M TREND - BEARISH"
     
+    Das Update wird sofort im In-Memory State angewendet und als Delta
+    gestreamt; der Webhook-Writer (app/ingest.py) schreibt es gebündelt
+    in die Datenbank. Duplikate (gleicher Fingerprint im Zeitfenster oder
+    bereits gesehener Idempotency-Key Header) werden nur bestätigt.
+    Im Cluster-Modus leiten Worker ohne Writer-Rolle das Update weiter
+    (app/cluster.py); Duplikate erkennt dann der Writer.
+    Während des Starts wird das Update eingereiht und danach angewendet
+    (app/startup.py); bei voller Warteschlange 503 mit Retry-After.
+    Vorher entscheidet die Admission Control (app/admission.py) über
+    429 (Rate Limit pro IP/Symbol) oder 503 (Writer-Queue voll).
+    
     Returns:
-        JSON mit Status und Nachricht
+        JSON mit Status ("success" / "duplicate") und Nachricht
     """
     
     # Lese Raw Body (TradingView sendet text/plain)
     body = await request.body()
     message = body.decode("utf-8")
     
-    logger.info(f"📩 Webhook empfangen: {message}")
-    
     # Parse Nachricht
-    parsed = parse_webhook(message)
+    parsed = parse_timed(message)
     
     if not parsed:
-        logger.warning(f"❌ Ungültiges Format: {message}")
+        metrics.webhooks.inc("unknown", "invalid")
+        logger.warning("❌ Ungültiges Format: %s", message, extra={"category": "webhook"})
         raise HTTPException(
             status_code=400, 
             detail=f"Invalid webhook format: {message}"
         )
     
-    # Update basierend auf Typ
-    update_msg = ""
+    update = build_update(parsed)
     
-    if parsed["type"] == "macro":
-        # Macro Update (BTC, USDT.D, TOTAL, etc.)
-        macro = db.query(MacroState).filter_by(symbol=parsed["symbol"]).first()
-        
-        if not macro:
-            # Auto-Create for new macro symbols
-            macro = MacroState(
-                symbol=parsed["symbol"],
-                display_name=parsed["symbol"],
-                created_at=datetime.utcnow()
-            )
-            db.add(macro)
-            logger.info(f"📊 Neuer Macro erstellt: {parsed['symbol']}")
-        
-        # Update based on indicator type
-        if parsed["indicator"] == "trend":
-            macro.trend_1m = parsed["value"]
-            update_msg = f"trend_1m = {parsed['value']}"
-        elif parsed["indicator"] == "macd":
-            macro.macd_1m = parsed["value"]
-            update_msg = f"macd_1m = {parsed['value']}"
-        
-        macro.last_updated = datetime.utcnow()
-        
-        try:
-            db.commit()
-            logger.info(f"✅ Macro {parsed['symbol']} updated: {update_msg}")
-            
-            return {
-                "status": "success",
-                "message": f"Macro {parsed['symbol']} updated: {update_msg}",
-                "data": {
-                    "symbol": parsed["symbol"],
-                    "type": parsed["type"],
-                    "indicator": parsed["indicator"],
-                    "value": parsed["value"]
-                }
-            }
-            
-        except Exception as e:
-            db.rollback()
-            logger.error(f"❌ Database error: {e}")
-            raise HTTPException(status_code=500, detail=str(e))
-    
-    # Hole oder erstelle Coin für Standard-Webhooks
-    coin = db.query(CoinState).filter_by(symbol=parsed["symbol"]).first()
-    
-    if not coin:
-        # Auto-Create für neue Coins
-        display_name = parsed["symbol"].replace("USDT.P", "").replace("USDT", "")
-        coin = CoinState(
-            symbol=parsed["symbol"],
-            display_name=display_name,
-            created_at=datetime.utcnow()
-        )
-        db.add(coin)
-        logger.info(f"➕ Neuer Coin erstellt: {display_name}")
-    
-    if parsed["type"] == "trend":
-        # Trend Update (1w, 3d, 1d, etc.)
-        timeframe = parsed["timeframe"]
-        
-        # Mapping von Timeframe zu Spalte
-        if timeframe in ["1w", "7d"]:
-            coin.trend_1w = parsed["value"]
-            update_msg = f"trend_1w = {parsed['value']}"
-        elif timeframe in ["3d"]:
-            coin.trend_3d = parsed["value"]
-            update_msg = f"trend_3d = {parsed['value']}"
-        elif timeframe in ["1d", "24h"]:
-            coin.trend_1d = parsed["value"]
-            update_msg = f"trend_1d = {parsed['value']}"
-        else:
-            # Für andere Timeframes: Speichere in 1d als Default
-            coin.trend_1d = parsed["value"]
-            update_msg = f"trend_1d = {parsed['value']} (from {timeframe})"
-            
-    elif parsed["type"] == "signal":
-        # Signal Update (Buy/Sell)
-        coin.last_signal_type = parsed["value"]
-        coin.last_signal_time = datetime.utcnow()
-        update_msg = f"signal = {parsed['value']}"
+    # Rate Limits und Load Shedding vor State, Stream und Writer
+    rejection = admission.check(
+        request.client.host if request.client else None, parsed["type"], parsed["symbol"],
+        state.is_repeat(update), writer.queue_depth + startup.queue_depth,
+    )
+    if rejection is not None:
+        metrics.webhooks.inc(parsed["type"], "shed")
+        logger.debug("🚦 Webhook abgewiesen (%s): %s", rejection.reason, message, extra={"category": "shed"})
+        return rejected(rejection)
     
-    coin.last_updated = datetime.utcnow()
+    logger.info("📩 Webhook empfangen: %s", message, extra={"category": "webhook"})
     
-    try:
-        db.commit()
-        logger.info(f"✅ {parsed['symbol']} updated: {update_msg}")
-        
-        return {
-            "status": "success",
-            "message": f"{parsed['symbol']} updated: {update_msg}",
-            "data": {
-                "symbol": parsed["symbol"],
-                "type": parsed["type"],
-                "value": parsed["value"],
-                "timeframe": parsed.get("timeframe")
-            }
+    # Retries und doppelte Alerts: 200 ohne State-, Stream- oder DB-Zugriff
+    flags = ingest([update], request.headers.get("Idempotency-Key"))
+    duplicate = bool(flags and flags[0])
+    if not startup.ready:
+        metrics.webhooks.inc(parsed["type"], "queued")
+    elif flags is None:
+        metrics.webhooks.inc(parsed["type"], "forwarded")
+    else:
+        metrics.webhooks.inc(parsed["type"], "duplicate" if duplicate else "accepted")
+    
+    if parsed["type"] == "macro":
+        data = {
+            "symbol": parsed["symbol"],
+            "type": parsed["type"],
+            "indicator": parsed["indicator"],
+            "value": parsed["value"]
+        }
+    else:
+        data = {
+            "symbol": parsed["symbol"],
+            "type": parsed["type"],
+            "value": parsed["value"],
+            "timeframe": parsed.get("timeframe")
         }
-        
-    except Exception as e:
-        db.rollback()
-        logger.error(f"❌ Database error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    
+    return {
+        "status": "duplicate" if duplicate else "success",
+        "message": update.message,
+        "data": data
+    }
+
+
+@router.post("/webhook/batch")
+async def receive_webhook_batch(request: Request):
+    """
+    Empfängt viele Alerts in einem Request (z.B. vom eigenen Alert-Aggregator
+    oder für Replays).
+
+    Body: eine Nachricht pro Zeile (Text oder NDJSON) oder ein JSON-Array
+    aus Strings / {"message": "..."}. Der Body wird als Stream gelesen.
+    Alle gültigen Alerts werden gemeinsam angewendet und vom Writer in
+    einer Transaktion geschrieben; ungültige Zeilen werden nur gemeldet.
+    Bei voller Writer-Queue 503 mit Retry-After, bevor der Body gelesen wird.
+
+    Returns:
+        JSON mit Zählern und einem Ergebnis pro Zeile bzw. Array-Element
+    """
+    rejection = admission.check_batch(writer.queue_depth + startup.queue_depth)
+    if rejection is not None:
+        return rejected(rejection)
+
+    updates = []
+    results = []
+    valid = []  # Index in results pro gültigem Update
+
+    try:
+        async for line, message, error in iter_batch(request.stream()):
+            if len(results) >= MAX_BATCH_ITEMS:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Batch too large: more than {MAX_BATCH_ITEMS} messages"
+                )
+            parsed = parse_timed(message) if error is None else None
+            if not parsed:
+                metrics.webhooks.inc("unknown", "invalid")
+                results.append({
+                    "line": line,
+                    "status": "error",
+                    "detail": error or f"Invalid webhook format: {message}"
+                })
+                continue
+            update = build_update(parsed)
+            valid.append(len(results))
+            updates.append(update)
+            results.append({"line": line, "status": "success", "message": update.message})
+    except MalformedBatch as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Erst nach vollständig gelesenem Body anwenden: ein abgebrochener oder
+    # kaputter Request ändert nichts (auch nicht den Dedup-Cache)
+    flags = ingest(updates) if updates else []
+    for index, update, duplicate in zip(valid, updates, flags or [False] * len(updates)):
+        parsed_type = update.parsed["type"]
+        if not startup.ready:
+            metrics.webhooks.inc(parsed_type, "queued")
+        elif flags is None:
+            metrics.webhooks.inc(parsed_type, "forwarded")
+        elif duplicate:
+            metrics.webhooks.inc(parsed_type, "duplicate")
+            results[index]["status"] = "duplicate"
+        else:
+            metrics.webhooks.inc(parsed_type, "accepted")
+
+    duplicates = sum(1 for result in results if result["status"] == "duplicate")
+    accepted = len(updates) - duplicates
+    invalid = len(results) - len(updates)
+    logger.info("📦 Webhook-Batch: %d angenommen, %d Duplikate, %d abgelehnt",
+                accepted, duplicates, invalid, extra={"category": "batch"})
+
+    return {
+        "status": "success" if not invalid else ("partial" if updates else "error"),
+        "accepted": accepted,
+        "duplicates": duplicates,
+        "rejected": invalid,
+        "results": results
+    }
 
 
 @router.get("/api/coins")
-def get_coins(db: Session = Depends(get_db)):
+async def get_coins(
+    request: Request,
+    trend_1w: Optional[str] = Query(None, pattern="^(uptrend|downtrend|none)$"),
+    trend_3d: Optional[str] = Query(None, pattern="^(uptrend|downtrend|none)$"),
+    trend_1d: Optional[str] = Query(None, pattern="^(uptrend|downtrend|none)$"),
+    signal: Optional[str] = Query(None, pattern="^(buy|sell|none)$"),
+    updated_since: Optional[datetime] = None,
+    sort: str = Query("display_name", pattern="^(display_name|symbol|last_updated)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    limit: Optional[int] = Query(None, ge=1, le=10000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    since: Optional[str] = None
+):
     """
     Liefert alle Coins mit aktuellem Status.
     
+    Ohne Parameter wird der Payload nur einmal pro State-Änderung kodiert
+    und mit ETag ausgeliefert; bei passendem If-None-Match kommt 304 Not
+    Modified. "timestamp" ist der Zeitpunkt der letzten Änderung, der
+    Header X-Coins-Version (bzw. "version" bei Filtern) der Stand für since=.
+    
+    Query-Parameter (alle aus In-Memory-Indizes, ohne DB):
+        trend_1w, trend_3d, trend_1d - uptrend / downtrend / none
+        signal        - buy / sell / none (letztes Signal)
+        updated_since - nur Coins mit last_updated ab Zeitpunkt (ISO 8601)
+        sort          - display_name (Default), symbol oder last_updated
+        order         - asc (Default) oder desc
+        limit         - Seitengröße; "next_cursor" zeigt auf die nächste Seite
+        cursor        - next_cursor der vorherigen Seite (gleiche sort/order)
+        fields        - kommagetrennte Felder pro Coin (z.B. symbol,trends)
+        since         - "version" einer früheren Antwort: nur geänderte Coins
+                        (nicht mit Filtern, Sortierung oder Cursor kombinierbar)
+    
     Returns:
-        JSON mit Liste aller Coins und Metadaten
+        JSON mit Liste der Coins und Metadaten
     """
     
-    coins = db.query(CoinState).order_by(CoinState.display_name).all()
-    now = datetime.utcnow()
-    
-    def minutes_ago(dt: Optional[datetime]) -> Optional[int]:
-        """Berechnet Minuten seit einem Timestamp"""
-        if not dt:
-            return None
-        delta = now - dt
-        return max(0, int(delta.total_seconds() / 60))
-    
-    result = []
-    for coin in coins:
-        result.append({
-            "symbol": coin.symbol,
-            "display_name": coin.display_name,
-            "trends": {
-                "1w": coin.trend_1w,
-                "3d": coin.trend_3d,
-                "1d": coin.trend_1d
-            },
-            "last_signal": {
-                "type": coin.last_signal_type,
-                "price": coin.last_signal_price,
-                "time": coin.last_signal_time.isoformat() + "Z" if coin.last_signal_time else None,
-                "minutes_ago": minutes_ago(coin.last_signal_time)
-            },
-            "last_updated": coin.last_updated.isoformat() + "Z" if coin.last_updated else None,
-            "last_updated_minutes_ago": minutes_ago(coin.last_updated)
-        })
-    
-    return {
-        "coins": result, 
-        "total_coins": len(result),
-        "timestamp": now.isoformat() + "Z"
+    filters = {
+        FILTER_COLUMNS[name]: None if value == "none" else value
+        for name, value in (("trend_1w", trend_1w), ("trend_3d", trend_3d),
+                            ("trend_1d", trend_1d), ("signal", signal))
+        if value is not None
     }
+    selected = None
+    if fields:
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = requested.difference(FIELDS)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))} (allowed: {', '.join(FIELDS)})"
+            )
+        # Feste Reihenfolge: gleiche Feld-Kombination, gleicher Cache
+        selected = [name for name in FIELDS if name in requested]
+
+    paged = filters or updated_since or limit or cursor or sort != "display_name" or order != "asc"
+    try:
+        if since is not None:
+            if paged:
+                raise InvalidQuery("since cannot be combined with filters, sorting or pagination")
+            payload = build_coins_changes(since, selected)
+        elif paged:
+            payload = build_coins_page(filters, _naive_utc(updated_since), sort, order == "desc",
+                                       cursor, limit or 10000, selected)
+        elif selected:
+            return cached_response(request, sparse_coins_cache(tuple(selected)), state.coin_version,
+                                   coins_version_header())
+        else:
+            return cached_response(request, coins_cache, state.coin_version, coins_version_header())
+    except InvalidQuery as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(content=dumps(payload), media_type="application/json")
 
 
 @router.get("/api/macro")
-def get_macro(db: Session = Depends(get_db)):
+async def get_macro(request: Request):
     """
     Liefert alle Macro-Indikatoren mit aktuellem Status.
+    Gecacht und mit ETag wie /api/coins.
     
     Returns:
         JSON mit Liste aller Macro-Indikatoren (BTC, USDT.D, TOTAL, etc.)
     """
     
-    # Define fixed order for display
-    order = ["BTC", "USDT.D", "TOTAL", "TOTAL2", "TOTAL3", "OTHERS"]
-    macros = db.query(MacroState).all()
-    now = datetime.utcnow()
-    
-    def minutes_ago(dt: Optional[datetime]) -> Optional[int]:
-        """Berechnet Minuten seit einem Timestamp"""
-        if not dt:
-            return None
-        delta = now - dt
-        return max(0, int(delta.total_seconds() / 60))
-    
-    # Create lookup dict
-    macro_dict = {m.symbol: m for m in macros}
-    
-    result = []
-    for symbol in order:
-        macro = macro_dict.get(symbol)
-        if macro:
-            result.append({
-                "symbol": macro.symbol,
-                "display_name": macro.display_name,
-                "trend_1m": macro.trend_1m,
-                "macd_1m": macro.macd_1m,
-                "last_updated": macro.last_updated.isoformat() + "Z" if macro.last_updated else None,
-                "last_updated_minutes_ago": minutes_ago(macro.last_updated)
-            })
+    return cached_response(request, macro_cache, state.macro_version)
+
+
+@router.get("/api/snapshot")
+async def get_snapshot(request: Request, since: Optional[str] = None):
+    """
+    Coins und Macros in einer Antwort (ein Request pro Refresh statt zwei).
+    
+    Der Accept-Header wählt die Kodierung (app/snapshot.py):
+        application/json                        - Zeilen wie /api/coins und /api/macro
+        application/vnd.dashboard.columnar+json - spaltenweise, Enum-Codes, Epoch-Sekunden
+        application/msgpack                     - spaltenweise als MessagePack
+    
+    Ohne since gecacht mit ETag pro Kodierung; X-Snapshot-Version ist der
+    Stand für since=. Mit since nur die seitdem geänderten Coins (und die
+    Macros, falls sich einer geändert hat) plus "version" und "full".
+    
+    Returns:
+        Snapshot in der ausgehandelten Kodierung, 406 wenn keine passt
+    """
+    
+    media_type = negotiate(request.headers.get("accept"))
+    if media_type is None:
+        raise HTTPException(
+            status_code=406,
+            detail=f"Not acceptable (available: {', '.join(sorted(set(MEDIA_TYPES.values())))})"
+        )
+    if since is None:
+        headers = {**snapshot_version_header(), "Vary": "Accept"}
+        return cached_response(request, snapshot_cache(media_type), state.version, headers, media_type)
+    try:
+        payload = build_snapshot_changes(since, media_type)
+    except InvalidQuery as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(content=encoder(media_type)(payload), media_type=media_type, headers={"Vary": "Accept"})
+
+
+@router.get("/api/rankings")
+async def get_rankings(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=10000),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    alignment: Optional[str] = Query(None, pattern="^(bullish|bearish)$")
+):
+    """
+    Coins nach Confluence (gewichtete Trends plus letztes Signal) sortiert,
+    mit Alignment, letzten Trendwechseln und dem Markt-Regime der Macros.
+    Die Kennzahlen pflegt app/analytics.py bei jedem Webhook inkrementell.
+    
+    Query-Parameter:
+        limit     - nur die ersten N Coins
+        order     - "desc" (bullischste zuerst, Default) oder "asc"
+        alignment - nur "bullish" oder "bearish" ausgerichtete Coins
+    
+    Returns:
+        JSON mit Rankings, Regime und Zeitpunkt der letzten Änderung
+    """
+    
+    if limit is None and order == "desc" and alignment is None:
+        return cached_response(request, rankings_cache, analytics.version)
+    # Gefilterte Varianten direkt kodieren (O(limit), ohne jsonable_encoder)
+    payload = build_rankings_payload(limit, order == "asc", alignment)
+    return Response(content=dumps(payload), media_type="application/json")
+
+
+@router.get("/api/stream")
+async def stream_updates(request: Request):
+    """
+    Live-Updates per Server-Sent Events.
+    
+    Events:
+        snapshot - {"coins": [...], "macro": [...]} direkt nach dem Verbinden
+        coin     - ein geänderter Coin (Format wie in /api/coins)
+        macro    - ein geänderter Macro-Indikator (Format wie in /api/macro)
+    """
+    
+    # Snapshot und Abo im selben Loop-Schritt: kein Delta geht dazwischen verloren
+    subscriber = hub.subscribe()
+    snapshot = build_snapshot()
+    
+    async def event_source():
+        try:
+            yield "retry: 3000\n\n"
+            yield format_event("snapshot", snapshot)
+            
+            while not await request.is_disconnected():
+                event = await hub.next_event(subscriber)
+                if event is None:
+                    break
+                yield event
+        finally:
+            hub.unsubscribe(subscriber)
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _naive_utc(dt: Optional[datetime]) -> Optional[datetime]:
+    """Query-Parameter mit Zeitzone auf naive UTC (wie in der DB) umrechnen"""
+    if dt is None or dt.tzinfo is None:
+        return dt
+    return dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@router.get("/api/history")
+def get_history(
+    symbol: Optional[str] = None,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Liefert Webhook-Events aus dem Append-only Log.
+    
+    Query-Parameter:
+        symbol - z.B. "HYPEUSDT.P" (optional)
+        from   - ISO Timestamp, inklusive
+        to     - ISO Timestamp, exklusive
+        limit  - Seitengröße (max. 1000)
+        cursor - next_cursor der vorherigen Seite
+        order  - "asc" (Default) oder "desc"
+    
+    Returns:
+        JSON mit Events und next_cursor (null auf der letzten Seite)
+    """
+    
+    try:
+        events, next_cursor = query_history(
+            db,
+            symbol=symbol.upper() if symbol else None,
+            start=_naive_utc(start),
+            end=_naive_utc(end),
+            limit=limit,
+            cursor=cursor,
+            descending=order == "desc"
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return {
-        "macro": result,
-        "total_indicators": len(result),
-        "timestamp": now.isoformat() + "Z"
+        "events": events,
+        "count": len(events),
+        "next_cursor": next_cursor
     }
 
 
+@router.get("/livez")
+async def liveness():
+    """Liveness: der Event-Loop antwortet (keine I/O)"""
+    return {"status": "alive"}
+
+
+def readiness_checks() -> dict:
+    return {
+        "startup": startup.ready,
+        "state": state.loaded,
+        "writer": writer.is_running and writer.consecutive_failures == 0,
+        "database": heartbeat.is_healthy,
+        "cluster": cluster.synced,
+    }
+
+
+@router.get("/readyz")
+async def readiness():
+    """
+    Readiness für Load Balancer / Railway.
+    Liest nur den vom Hintergrund-Thread gecachten DB-Heartbeat.
+
+    Returns:
+        200 wenn State geladen, Writer läuft und der Heartbeat aktuell ist, sonst 503
+    """
+    checks = readiness_checks()
+    ready = all(checks.values())
+    return JSONResponse({"status": "ready" if ready else "not ready", "checks": checks},
+                        status_code=200 if ready else 503)
+
+
 @router.get("/health")
-def health_check(db: Session = Depends(get_db)):
+async def health_check():
     """
     Health Check Endpoint für Monitoring.
+    Beantwortet aus In-Memory-Zählern und dem gecachten DB-Heartbeat,
+    ohne Datenbank-Zugriff im Request.
     
     Returns:
-        JSON mit Status, DB-Verbindung und Coin-Anzahl
+        JSON mit Status, Heartbeat, Writer-Status und Zählern
     """
     
-    try:
-        count = db.query(CoinState).count()
-        
-        # Finde letztes Update
-        latest = db.query(CoinState).order_by(CoinState.last_updated.desc()).first()
-        last_webhook = latest.last_updated.isoformat() + "Z" if latest and latest.last_updated else None
-        
-        return {
-            "status": "healthy",
-            "database": "connected",
-            "coins_tracked": count,
-            "last_webhook": last_webhook,
-            "version": "2.0.0"
-        }
-        
-    except Exception as e:
-        logger.error(f"❌ Health check failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    ready = all(readiness_checks().values())
+    return {
+        "status": "healthy" if ready else "degraded",
+        "database": "connected" if heartbeat.is_healthy else "unavailable",
+        "heartbeat": heartbeat.stats(),
+        "writer": writer.stats(),
+        "cluster": cluster.stats(),
+        "startup": startup.stats(),
+        "admission": admission.stats(),
+        "coins_tracked": len(state.coins),
+        "macros_tracked": len(state.macros),
+        "webhooks_applied": state.webhooks_applied,
+        "last_webhook": isoformat_utc(state.last_webhook),
+        "dedup": dedup.stats(),
+        "version": "2.0.0"
+    }
+
+
+# ===== Metriken, die erst beim Scrape gelesen werden =====
+
+metrics.registry.callback(
+    "writer_queue_depth", "Updates waiting for the webhook writer",
+    lambda: {(): writer.queue_depth})
+metrics.registry.callback(
+    "startup_queue_depth", "Webhooks queued until startup has finished",
+    lambda: {(): startup.queue_depth})
+metrics.registry.callback(
+    "stream_subscribers", "Connected /api/stream clients",
+    lambda: {(): hub.subscriber_count})
+metrics.registry.callback(
+    "coins_tracked", "Coins in the in-memory state",
+    lambda: {(): len(state.coins)})
+metrics.registry.callback(
+    "payload_cache_requests_total", "Encoded payload lookups by endpoint and result",
+    lambda: {
+        (name, result): getattr(cache, result)
+        for name, cache in payload_caches()
+        for result in ("hits", "misses", "not_modified")
+    },
+    labels=("endpoint", "result"), kind="counter")
+metrics.registry.callback(
+    "payload_cache_hit_ratio", "Share of payload lookups served without encoding",
+    lambda: {(name,): cache.hit_ratio for name, cache in payload_caches()},
+    labels=("endpoint",))
+metrics.registry.callback(
+    "dedup_requests_total", "Dedup cache lookups by result",
+    lambda: {(result,): dedup.stats()[result] for result in ("hits", "misses", "evictions", "expirations")},
+    labels=("result",), kind="counter")
+metrics.registry.callback(
+    "dedup_entries", "Fingerprints and idempotency keys in the dedup cache",
+    lambda: {(): len(dedup)})
+metrics.registry.callback(
+    "dedup_hit_ratio", "Share of webhooks recognized as duplicates",
+    lambda: {(): dedup.stats()["hit_ratio"]})
+metrics.registry.callback(
+    "webhook_admission_total", "Admission decisions by alert type and result (admitted or shed reason)",
+    lambda: dict(admission.counts), labels=("type", "result"), kind="counter")
+metrics.registry.callback(
+    "log_records_dropped_total", "INFO/DEBUG log records dropped because the log queue was full",
+    lambda: {(): logs.dropped}, kind="counter")
+metrics.registry.callback(
+    "log_records_sampled_out_total", "Log lines skipped by LOG_SAMPLE by category",
+    lambda: {(category,): count for category, count in logs.suppressed.items()},
+    labels=("category",), kind="counter")
+metrics.registry.callback(
+    "cluster_state_seq", "Last applied change sequence (cluster mode)",
+    lambda: {(cluster.role,): cluster.seq} if cluster.enabled else {},
+    labels=("role",))
+metrics.registry.callback(
+    "cluster_resyncs_total", "State reloads after gaps or writer changes",
+    lambda: {(): cluster.resyncs} if cluster.enabled else {}, kind="counter")
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """
+    Prometheus-Metriken im Text Exposition Format.
+
+    Returns:
+        text/plain; version=0.0.4
+    """
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,317 @@
+"""
+Statische Assets aus dem Speicher (Dashboard, React-Build)
+
+Beim Start werden alle Dateien aus den Asset-Verzeichnissen einmal
+gelesen; komprimierbare Dateien zusätzlich als gzip und (falls das
+brotli-Paket installiert ist) als Brotli. Requests kosten danach keinen
+Dateisystem-Zugriff mehr.
+
+- ETag pro Variante, If-None-Match / If-Modified-Since -> 304
+- Dateien mit Hash im Namen (main.3f2a9c1b.js) sind "immutable"
+- Range-Requests (ein Bereich) auf die unkomprimierte Variante
+- Unbekannte Pfade ohne Dateiendung -> index.html (SPA-Routing),
+  unbekannte API-Pfade und fehlende Dateien -> 404
+- Vor load() (Start läuft noch im Hintergrund) -> 503 mit Retry-After
+
+Verzeichnisse: STATIC_DIRS, getrennt mit ":", jeweils "verzeichnis" (unter
+"/") oder "/präfix=verzeichnis"; bei gleichem Pfad gewinnt das erste.
+Default: static/ (Dashboard) unter "/", der React-Build (frontend/build,
+per Dockerfile gebaut) unter "/app/".
+"""
+
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli ist optional
+    brotli = None
+
+from .serializers import dumps
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DIRS = [("", os.path.join(REPO_ROOT, "static")), ("app/", os.path.join(REPO_ROOT, "frontend", "build"))]
+
+
+def parse_dirs(value: str) -> List[Tuple[str, str]]:
+    """STATIC_DIRS -> [(URL-Präfix, Verzeichnis)]; "/app=frontend/build" -> ("app/", "frontend/build")"""
+    directories = []
+    for entry in value.split(os.pathsep):
+        if not entry:
+            continue
+        prefix, sep, directory = entry.partition("=")
+        if not sep:
+            prefix, directory = "", entry
+        prefix = prefix.strip("/")
+        directories.append((prefix + "/" if prefix else "", directory))
+    return directories
+
+
+STATIC_DIRS = parse_dirs(os.environ.get("STATIC_DIRS", "")) or DEFAULT_DIRS
+
+# Kleinere Dateien lohnen keine Kompression
+MIN_COMPRESS_SIZE = 256
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "application/xml",
+                      "image/svg+xml", "application/manifest+json", "application/wasm")
+# CRA/Vite/Webpack: name.<hash>.js, name.<hash>.chunk.css, name-<hash>.js
+HASHED_NAME = re.compile(r"[.-][0-9a-f]{8,}(?:\.chunk)?\.\w+$")
+IMMUTABLE = b"public, max-age=31536000, immutable"
+REVALIDATE = b"no-cache"
+
+# Präfixe, die nie auf index.html zurückfallen (Tippfehler in API-URLs)
+API_PREFIXES = ("api/", "webhook", "metrics", "health", "livez", "readyz")
+
+_NOT_FOUND = dumps({"detail": "Not Found"})
+_METHOD_NOT_ALLOWED = dumps({"detail": "Method Not Allowed"})
+_STARTING = dumps({"detail": "Starting, retry shortly"})
+
+mimetypes.add_type("application/javascript", ".js")
+mimetypes.add_type("application/manifest+json", ".webmanifest")
+
+
+class Asset:
+    """Eine Datei mit allen Varianten und vorberechneten Headern"""
+
+    __slots__ = ("path", "body", "variants", "etags", "last_modified", "mtime")
+
+    def __init__(self, path: str, body: bytes, mtime: float):
+        self.path = path
+        self.body = body
+        self.mtime = int(mtime)
+        self.last_modified = formatdate(mtime, usegmt=True).encode()
+
+        content_type, _ = mimetypes.guess_type(path)
+        content_type = content_type or "application/octet-stream"
+        if content_type.startswith("text/") or content_type in ("application/javascript", "image/svg+xml"):
+            content_type += "; charset=utf-8"
+        cache_control = IMMUTABLE if HASHED_NAME.search(os.path.basename(path)) else REVALIDATE
+        compressible = len(body) >= MIN_COMPRESS_SIZE and content_type.startswith(COMPRESSIBLE_TYPES)
+
+        digest = hashlib.blake2b(body, digest_size=12).hexdigest()
+        encoded = {"identity": body}
+        if compressible:
+            encoded["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                encoded["br"] = brotli.compress(body, quality=11)
+
+        # Encoding -> (Body, Header ohne Content-Length)
+        self.variants: Dict[str, Tuple[bytes, List[Tuple[bytes, bytes]]]] = {}
+        self.etags = set()
+        for encoding, data in encoded.items():
+            if encoding != "identity" and len(data) >= len(body):
+                continue
+            etag = f'"{digest}"' if encoding == "identity" else f'"{digest}-{encoding}"'
+            headers = [
+                (b"content-type", content_type.encode()),
+                (b"etag", etag.encode()),
+                (b"last-modified", self.last_modified),
+                (b"cache-control", cache_control),
+                (b"accept-ranges", b"bytes"),
+            ]
+            if compressible:
+                headers.append((b"vary", b"Accept-Encoding"))
+            if encoding != "identity":
+                headers.append((b"content-encoding", encoding.encode()))
+            self.variants[encoding] = (data, headers)
+            self.etags.add(etag)
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def etag_matches(header: str, etags) -> bool:
+    """If-None-Match gegen alle Varianten (gleicher Inhalt, andere Kodierung)"""
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate in etags:
+            return True
+    return False
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Einzelner Byte-Bereich.
+
+    Returns:
+        (Start, Ende inklusive), None bei ungültiger/mehrfacher Angabe (-> ganze Datei)
+
+    Raises:
+        ValueError: Bereich liegt außerhalb der Datei (-> 416)
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start, sep, end = spec.strip().partition("-")
+    start, end = start.strip(), end.strip()
+    if not sep or (start and not start.isdigit()) or (end and not end.isdigit()) or not (start or end):
+        return None
+    if not start:
+        # Suffix: die letzten N Bytes
+        length = int(end)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(size - length, 0), size - 1
+    first = int(start)
+    last = int(end) if end else size - 1
+    if first >= size:
+        raise ValueError("range not satisfiable")
+    if last < first:
+        return None
+    return first, min(last, size - 1)
+
+
+class AssetStore:
+    """ASGI-App für alle statischen Dateien (wird unter "/" gemountet)"""
+
+    def __init__(self, directories: List[Tuple[str, str]] = STATIC_DIRS):
+        self.directories = directories
+        self.assets: Dict[str, Asset] = {}
+        # Erst nach load(); vorher 503 wie /readyz statt 404
+        self.loaded = False
+        # Accept-Encoding Header -> bevorzugte Kodierungen (wenige verschiedene Werte)
+        self._encodings: Dict[str, Tuple[str, ...]] = {}
+
+    def load(self):
+        """Liest alle Dateien ein und komprimiert sie vor"""
+        assets: Dict[str, Asset] = {}
+        for prefix, directory in self.directories:
+            if not os.path.isdir(directory):
+                continue
+            for root, _, files in os.walk(directory):
+                for name in files:
+                    full_path = os.path.join(root, name)
+                    url_path = prefix + os.path.relpath(full_path, directory).replace(os.sep, "/")
+                    if url_path in assets or name.endswith((".map", ".gz", ".br")):
+                        continue
+                    with open(full_path, "rb") as f:
+                        assets[url_path] = Asset(url_path, f.read(), os.path.getmtime(full_path))
+        self.assets = assets
+        self.loaded = True
+        total = sum(len(asset.body) for asset in assets.values())
+        logger.info(
+            f"✅ {len(assets)} statische Dateien geladen ({total / 1024:.0f} KB, "
+            f"Brotli {'an' if brotli is not None else 'aus'})"
+        )
+
+    @property
+    def index(self) -> Optional[Asset]:
+        return self.assets.get("index.html")
+
+    def resolve(self, path: str) -> Optional[Asset]:
+        """URL-Pfad -> Asset, SPA-Fallback auf index.html"""
+        path = path.lstrip("/")
+        if not path:
+            return self.index
+        asset = self.assets.get(path)
+        if asset is not None:
+            return asset
+        if path.startswith(API_PREFIXES) or "." in path.rsplit("/", 1)[-1]:
+            return None
+        # SPA unter einem Präfix: dessen eigene index.html
+        for prefix, _ in self.directories:
+            if prefix and (path.startswith(prefix) or path == prefix[:-1]):
+                return self.assets.get(prefix + "index.html")
+        return self.index
+
+    def _preferred(self, accept_encoding: Optional[str]) -> Tuple[str, ...]:
+        if not accept_encoding:
+            return ()
+        preferred = self._encodings.get(accept_encoding)
+        if preferred is None:
+            accepted = set()
+            for token in accept_encoding.lower().split(","):
+                name, _, params = token.strip().partition(";")
+                if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+                    continue
+                accepted.add(name.strip())
+            preferred = tuple(e for e in ("br", "gzip") if e in accepted or "*" in accepted)
+            if len(self._encodings) < 256:
+                self._encodings[accept_encoding] = preferred
+        return preferred
+
+    async def __call__(self, scope, receive, send):
+        method = scope["method"]
+        if not self.loaded:
+            await _send(send, 503, [(b"content-type", b"application/json"), (b"retry-after", b"1")],
+                        _STARTING, method)
+            return
+        asset = self.resolve(scope["path"])
+        if asset is None:
+            await _send(send, 404, [(b"content-type", b"application/json")], _NOT_FOUND, method)
+            return
+        if method not in ("GET", "HEAD"):
+            await _send(send, 405, [(b"content-type", b"application/json"), (b"allow", b"GET, HEAD")],
+                        _METHOD_NOT_ALLOWED, method)
+            return
+
+        range_header = _header(scope, b"range")
+        if range_header is not None:
+            if_range = _header(scope, b"if-range")
+            if if_range is None or if_range.strip() in asset.etags:
+                await self._send_range(send, asset, range_header, method)
+                return
+
+        encoding = "identity"
+        for candidate in self._preferred(_header(scope, b"accept-encoding")):
+            if candidate in asset.variants:
+                encoding = candidate
+                break
+        body, headers = asset.variants[encoding]
+
+        if_none_match = _header(scope, b"if-none-match")
+        if if_none_match is not None:
+            not_modified = etag_matches(if_none_match, asset.etags)
+        else:
+            not_modified = _not_modified_since(_header(scope, b"if-modified-since"), asset.mtime)
+        if not_modified:
+            await _send(send, 304, headers, b"", method)
+            return
+        await _send(send, 200, headers, body, method)
+
+    async def _send_range(self, send, asset: Asset, range_header: str, method: str):
+        body, headers = asset.variants["identity"]
+        size = len(body)
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            await _send(send, 416, [(b"content-range", f"bytes */{size}".encode())], b"", method)
+            return
+        if byte_range is None:
+            await _send(send, 200, headers, body, method)
+            return
+        first, last = byte_range
+        headers = headers + [(b"content-range", f"bytes {first}-{last}/{size}".encode())]
+        await _send(send, 206, headers, body[first:last + 1], method)
+
+
+def _not_modified_since(header: Optional[str], mtime: int) -> bool:
+    if not header:
+        return False
+    try:
+        return mtime <= int(parsedate_to_datetime(header).timestamp())
+    except (TypeError, ValueError):
+        return False
+
+
+async def _send(send, status: int, headers: List[Tuple[bytes, bytes]], body: bytes, method: str):
+    if status != 304:
+        headers = headers + [(b"content-length", str(len(body)).encode())]
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": b"" if method == "HEAD" else body})
+
+
+assets = AssetStore()
@@ -0,0 +1,184 @@
+"""
+Streaming-Parser für Multi-Alert Webhook-Bodies (/webhook/batch)
+
+Unterstützte Formate (erkannt am ersten Nicht-Whitespace-Zeichen):
+    - Text, eine Nachricht pro Zeile:
+          HYPEUSDT.P, 1W - DOWNTREND
+          BTC MACRO 1M TREND - BEARISH
+      Zeilen dürfen auch JSON sein ("..." oder {"message": "..."}), also NDJSON.
+    - JSON-Array aus Strings oder Objekten mit "message":
+          ["HYPEUSDT.P, 1W - DOWNTREND", {"message": "BTC MACRO 1M TREND - BEARISH"}]
+
+Der Body wird chunkweise gelesen und Element für Element dekodiert, ohne
+ihn vorher komplett in Zeilen oder ein JSON-Objekt zu zerlegen.
+"""
+
+import codecs
+import json
+import os
+from typing import AsyncIterator, Optional, Tuple
+
+# Ein Element ist entweder die Nachricht oder ein Fehlertext
+BatchItem = Tuple[int, Optional[str], Optional[str]]
+
+# Max. Nachrichten pro Request, größere Bodies werden mit 413 abgelehnt
+MAX_BATCH_ITEMS = int(os.environ.get("WEBHOOK_BATCH_MAX_ITEMS", "10000"))
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+
+class MalformedBatch(ValueError):
+    """Body ist kein gültiges JSON-Array"""
+
+
+def _message_from_json(value) -> Optional[str]:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict) and isinstance(value.get("message"), str):
+        return value["message"]
+    return None
+
+
+def _line_item(number: int, line: str) -> BatchItem:
+    """Eine Zeile im Text-Modus: Klartext oder ein JSON-Wert (NDJSON)"""
+    line = line.strip()
+    if line[:1] in ("{", '"'):
+        try:
+            message = _message_from_json(json.loads(line))
+        except ValueError:
+            return number, None, f"Invalid JSON: {line[:200]}"
+        if message is None:
+            return number, None, 'Expected a string or {"message": "..."}'
+        return number, message, None
+    return number, line, None
+
+
+async def _lines(first: str, rest: AsyncIterator[str]) -> AsyncIterator[BatchItem]:
+    buffer = first
+    number = 0
+
+    async for text in rest:
+        buffer += text
+        lines = buffer.split("\n")
+        buffer = lines.pop()
+        for line in lines:
+            number += 1
+            if line and not line.isspace():
+                yield _line_item(number, line)
+
+    for line in buffer.split("\n"):
+        number += 1
+        if line and not line.isspace():
+            yield _line_item(number, line)
+
+
+async def _array(first: str, rest: AsyncIterator[str]) -> AsyncIterator[BatchItem]:
+    buffer = first
+    position = buffer.index("[") + 1
+    number = 0
+    expect_value = True   # direkt nach "[" bzw. ","
+    exhausted = False
+
+    while True:
+        # Whitespace und Trenner überspringen
+        while position < len(buffer) and buffer[position] in _WHITESPACE:
+            position += 1
+
+        if position >= len(buffer):
+            if exhausted:
+                raise MalformedBatch("Unexpected end of JSON array")
+            try:
+                buffer = buffer[position:] + await rest.__anext__()
+            except StopAsyncIteration:
+                exhausted = True
+                buffer = buffer[position:]
+            position = 0
+            continue
+
+        char = buffer[position]
+        if char == "]" and (not expect_value or number == 0):
+            position += 1
+            break
+        if char == ",":
+            if expect_value:
+                raise MalformedBatch(f"Unexpected ',' after element {number}")
+            expect_value = True
+            position += 1
+            continue
+        if not expect_value:
+            raise MalformedBatch(f"Expected ',' or ']' after element {number}")
+
+        try:
+            value, end = _decoder.raw_decode(buffer, position)
+            # Ein Wert, der genau am Pufferende endet, könnte abgeschnitten sein (z.B. Zahlen)
+            if end == len(buffer) and not exhausted:
+                raise ValueError("incomplete")
+        except ValueError:
+            if exhausted:
+                raise MalformedBatch(f"Invalid JSON at element {number + 1}")
+            try:
+                buffer = buffer[position:] + await rest.__anext__()
+            except StopAsyncIteration:
+                exhausted = True
+                buffer = buffer[position:]
+            position = 0
+            continue
+
+        number += 1
+        position = end
+        expect_value = False
+        message = _message_from_json(value)
+        if message is None:
+            yield number, None, 'Expected a string or {"message": "..."}'
+        else:
+            yield number, message, None
+
+    # Nach "]" darf nur noch Whitespace kommen
+    trailing = buffer[position:]
+    async for text in rest:
+        trailing += text
+        if trailing.strip():
+            break
+    if trailing.strip():
+        raise MalformedBatch("Unexpected data after JSON array")
+
+
+async def _decoded(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    async for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+async def iter_batch(chunks: AsyncIterator[bytes]) -> AsyncIterator[BatchItem]:
+    """
+    Liest einen Batch-Body als Stream.
+
+    Args:
+        chunks: z.B. request.stream()
+
+    Yields:
+        (Zeile bzw. Element-Nr. ab 1, Nachricht oder None, Fehler oder None)
+
+    Raises:
+        MalformedBatch: wenn ein JSON-Array-Body nicht gültig ist
+    """
+    texts = _decoded(chunks)
+
+    # Bis zum ersten Nicht-Whitespace-Zeichen lesen, um das Format zu erkennen
+    first = ""
+    async for text in texts:
+        first += text
+        if first.strip():
+            break
+    if not first.strip():
+        return
+
+    items = _array(first, texts) if first.lstrip().startswith("[") else _lines(first, texts)
+    async for item in items:
+        yield item
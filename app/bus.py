@@ -0,0 +1,312 @@
+"""
+Nachrichten-Bus zwischen Workern (Pub/Sub mit Redis-Semantik)
+
+Ein Bus verteilt kurze Nachrichten auf benannten Kanälen an alle anderen
+Worker: publish(channel, data) und ein Handler für eingehende Nachrichten.
+Zustellung ist "at most once" und pro Sender geordnet; Verluste erkennt
+app/cluster.py an Lücken in der Sequenz.
+
+Implementierungen (CLUSTER_BUS_URL):
+    local               Unix-Datagram-Sockets in DATA_DIR/cluster (Default, ohne Broker)
+    redis://host:port   Redis Pub/Sub (oder ein kompatibler Stand-in)
+    redis+unix:///pfad  dasselbe über einen Unix-Socket
+
+Der Redis-Client spricht nur das nötige RESP (PUBLISH, SUBSCRIBE) und
+braucht kein zusätzliches Paket.
+"""
+
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+from urllib.parse import urlparse
+import asyncio
+import logging
+import os
+import socket
+import time
+
+logger = logging.getLogger(__name__)
+
+# Obergrenze pro Nachricht (Datagramme); größere Inhalte teilt der Aufrufer auf
+MAX_MESSAGE_BYTES = 60_000
+# Wie oft die Liste der lokalen Peers neu eingelesen wird
+PEER_REFRESH_SECONDS = 1.0
+# Nachrichten pro Peer, die bei voller Empfangs-Queue zurückgehalten werden
+MAX_BACKLOG = 10_000
+
+Handler = Callable[[str, bytes], None]
+
+
+class Bus:
+    """Schnittstelle aller Bus-Implementierungen"""
+
+    def __init__(self):
+        self.published = 0
+        self.received = 0
+        self.dropped = 0
+
+    async def start(self, channels: List[str], handler: Handler):
+        """Verbindet den Bus; handler(channel, data) läuft im Event-Loop"""
+        raise NotImplementedError
+
+    def publish(self, channel: str, data: bytes):
+        """Sendet ohne zu warten (fire-and-forget)"""
+        raise NotImplementedError
+
+    async def close(self):
+        raise NotImplementedError
+
+    def stats(self) -> Dict:
+        return {"published": self.published, "received": self.received, "dropped": self.dropped}
+
+
+class LocalBus(Bus):
+    """
+    Ein Datagram-Socket pro Worker in einem gemeinsamen Verzeichnis.
+    publish() schickt die Nachricht an jeden anderen Socket dort; Sockets
+    beendeter Worker werden beim ersten Fehlversuch entfernt.
+
+    Die Empfangs-Queue eines Unix-Datagram-Sockets ist kurz
+    (net.unix.max_dgram_qlen, oft 10). Ist sie voll, bleiben Nachrichten
+    pro Peer in einem Rückstau und werden in Reihenfolge nachgeschickt.
+    """
+
+    def __init__(self, directory: str, name: str):
+        super().__init__()
+        self.directory = directory
+        self.path = os.path.join(directory, f"{name}.sock")
+        self._sock: Optional[socket.socket] = None
+        self._handler: Optional[Handler] = None
+        self._peers: List[str] = []
+        self._peers_loaded = 0.0
+        self._backlog: Dict[str, Deque[bytes]] = {}
+        self._retry_scheduled = False
+
+    async def start(self, channels: List[str], handler: Handler):
+        # Alle Nachrichten gehen an alle Peers, die Kanäle stehen in der Nachricht
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        sock.bind(self.path)
+        sock.setblocking(False)
+        self._sock = sock
+        self._handler = handler
+        asyncio.get_running_loop().add_reader(sock.fileno(), self._readable)
+
+    def _readable(self):
+        while True:
+            try:
+                payload = self._sock.recv(MAX_MESSAGE_BYTES + 256)
+            except (BlockingIOError, InterruptedError):
+                return
+            channel, _, data = payload.partition(b"\n")
+            self.received += 1
+            try:
+                self._handler(channel.decode(), data)
+            except Exception as e:
+                logger.error(f"❌ Bus-Nachricht auf {channel.decode()} fehlgeschlagen: {e}")
+
+    def _peer_paths(self) -> List[str]:
+        now = time.monotonic()
+        if now - self._peers_loaded > PEER_REFRESH_SECONDS:
+            try:
+                names = os.listdir(self.directory)
+            except FileNotFoundError:
+                names = []
+            self._peers = [
+                os.path.join(self.directory, name) for name in names
+                if name.endswith(".sock") and os.path.join(self.directory, name) != self.path
+            ]
+            self._peers_loaded = now
+        return self._peers
+
+    def _send(self, peer: str, payload: bytes) -> bool:
+        """False wenn die Queue des Peers voll ist"""
+        try:
+            self._sock.sendto(payload, peer)
+            self.published += 1
+        except BlockingIOError:
+            return False
+        except (ConnectionRefusedError, FileNotFoundError):
+            # Worker beendet: Socket-Datei aufräumen
+            if peer in self._peers:
+                self._peers.remove(peer)
+            self._backlog.pop(peer, None)
+            try:
+                os.unlink(peer)
+            except OSError:
+                pass
+        return True
+
+    def publish(self, channel: str, data: bytes):
+        if self._sock is None:
+            return
+        payload = channel.encode() + b"\n" + data
+        for peer in list(self._peer_paths()):
+            backlog = self._backlog.get(peer)
+            if backlog is None:
+                if self._send(peer, payload):
+                    continue
+                backlog = self._backlog[peer] = deque()
+            if len(backlog) >= MAX_BACKLOG:
+                # Empfänger hängt; er erkennt die Lücke an der Sequenz
+                self.dropped += 1
+                continue
+            backlog.append(payload)
+        self._schedule_retry()
+
+    def _schedule_retry(self):
+        if self._backlog and not self._retry_scheduled:
+            self._retry_scheduled = True
+            asyncio.get_running_loop().call_later(0.001, self._retry)
+
+    def _retry(self):
+        self._retry_scheduled = False
+        if self._sock is None:
+            return
+        for peer, backlog in list(self._backlog.items()):
+            while backlog and self._send(peer, backlog[0]):
+                backlog.popleft()
+            if not backlog:
+                self._backlog.pop(peer, None)
+        self._schedule_retry()
+
+    async def close(self):
+        if self._sock is None:
+            return
+        asyncio.get_running_loop().remove_reader(self._sock.fileno())
+        self._sock.close()
+        self._sock = None
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+def encode_command(*args) -> bytes:
+    """RESP-Array aus Bulk Strings"""
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader):
+    """Eine RESP-Antwort (Simple String, Fehler, Integer, Bulk String, Array)"""
+    line = await reader.readuntil(b"\r\n")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest
+    if kind == b"-":
+        raise ConnectionError(f"Redis-Fehler: {rest.decode()}")
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        return (await reader.readexactly(length + 2))[:-2]
+    if kind == b"*":
+        return [await read_reply(reader) for _ in range(int(rest))]
+    raise ConnectionError(f"Unbekannte RESP-Antwort: {line!r}")
+
+
+class RedisBus(Bus):
+    """Redis Pub/Sub über zwei Verbindungen (Publish und Subscribe)"""
+
+    def __init__(self, url: str, prefix: str = "dashboard"):
+        super().__init__()
+        self.url = url
+        self.prefix = prefix
+        self._handler: Optional[Handler] = None
+        self._publisher: Optional[asyncio.StreamWriter] = None
+        self._tasks: List[asyncio.Task] = []
+        self._closing = False
+
+    async def _connect(self):
+        parsed = urlparse(self.url)
+        if parsed.scheme == "redis+unix":
+            return await asyncio.open_unix_connection(parsed.path)
+        return await asyncio.open_connection(parsed.hostname or "127.0.0.1", parsed.port or 6379)
+
+    async def start(self, channels: List[str], handler: Handler):
+        self._handler = handler
+        loop = asyncio.get_running_loop()
+        subscribed, connected = loop.create_future(), loop.create_future()
+        self._tasks = [
+            asyncio.create_task(self._subscribe_loop([f"{self.prefix}:{name}" for name in channels], subscribed)),
+            asyncio.create_task(self._publish_loop(connected)),
+        ]
+        await asyncio.gather(subscribed, connected)
+
+    async def _subscribe_loop(self, channels: List[str], ready: asyncio.Future):
+        while not self._closing:
+            try:
+                reader, writer = await self._connect()
+                writer.write(encode_command("SUBSCRIBE", *channels))
+                for _ in channels:
+                    await read_reply(reader)
+                if not ready.done():
+                    ready.set_result(True)
+                while True:
+                    reply = await read_reply(reader)
+                    if isinstance(reply, list) and len(reply) == 3 and reply[0] == b"message":
+                        self.received += 1
+                        channel = reply[1].decode().split(":", 1)[-1]
+                        try:
+                            self._handler(channel, reply[2])
+                        except Exception as e:
+                            logger.error(f"❌ Bus-Nachricht auf {channel} fehlgeschlagen: {e}")
+            except (OSError, ConnectionError, asyncio.IncompleteReadError) as e:
+                if not ready.done():
+                    ready.set_exception(e)
+                    return
+                logger.warning(f"⚠️ Redis-Subscription unterbrochen, neuer Versuch: {e}")
+                await asyncio.sleep(1.0)
+
+    async def _publish_loop(self, ready: asyncio.Future):
+        """Hält die Publish-Verbindung und verwirft die Antworten (Empfängerzahl)"""
+        while not self._closing:
+            try:
+                reader, writer = await self._connect()
+                self._publisher = writer
+                if not ready.done():
+                    ready.set_result(True)
+                while True:
+                    await read_reply(reader)
+            except (OSError, ConnectionError, asyncio.IncompleteReadError) as e:
+                self._publisher = None
+                if not ready.done():
+                    ready.set_exception(e)
+                    return
+                if self._closing:
+                    return
+                logger.warning(f"⚠️ Redis-Verbindung unterbrochen, neuer Versuch: {e}")
+                await asyncio.sleep(1.0)
+
+    def publish(self, channel: str, data: bytes):
+        if self._publisher is None or self._publisher.is_closing():
+            self.dropped += 1
+            return
+        self._publisher.write(encode_command("PUBLISH", f"{self.prefix}:{channel}", data))
+        self.published += 1
+
+    async def close(self):
+        self._closing = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._publisher is not None:
+            self._publisher.close()
+            self._publisher = None
+
+
+def create_bus(url: str, directory: str, name: str) -> Bus:
+    """Bus-Implementierung aus CLUSTER_BUS_URL"""
+    if url in ("", "local"):
+        return LocalBus(directory, name)
+    if url.startswith(("redis://", "redis+unix://")):
+        return RedisBus(url)
+    raise ValueError(f"Unbekannter CLUSTER_BUS_URL: {url}")
@@ -0,0 +1,78 @@
+"""
+Vorkodierte Responses (JSON, für /api/snapshot auch MessagePack) mit ETag / 304 Support
+Zwischen zwei Webhooks ist der Payload von /api/coins und /api/macro
+identisch. Er wird daher nur einmal pro State-Version kodiert und mit
+einem starken ETag (Hash der Bytes) ausgeliefert. Clients mit passendem
+If-None-Match bekommen ein leeres 304.
+"""
+
+from typing import Callable, Optional, Tuple
+import hashlib
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from .serializers import dumps
+
+# Clients müssen revalidieren, dürfen den Body aber behalten
+CACHE_CONTROL = "no-cache"
+
+
+class PayloadCache:
+    """Hält die kodierten Bytes eines Endpoints für eine State-Version"""
+
+    def __init__(self, builder: Callable[[], dict], encode: Callable[[dict], bytes] = dumps):
+        self._builder = builder
+        self._encode = encode
+        self._version: Optional[int] = None
+        self._body = b""
+        self._etag = ""
+        # Zähler für /metrics
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return round(self.hits / lookups, 4) if lookups else 0.0
+
+    def get(self, version: int) -> Tuple[bytes, str]:
+        """
+        Liefert (Body, ETag); kodiert nur neu, wenn sich die Version geändert hat.
+        """
+        if version != self._version:
+            self.misses += 1
+            body = self._encode(self._builder())
+            self._body = body
+            self._etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+            self._version = version
+        else:
+            self.hits += 1
+        return self._body, self._etag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Prüft If-None-Match (Liste, schwache Validatoren und "*")"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate == etag or candidate == "W/" + etag:
+            return True
+    return False
+
+
+def cached_response(request: Request, cache: PayloadCache, version: int,
+                    extra_headers: Optional[dict] = None, media_type: str = "application/json") -> Response:
+    """
+    Response aus dem Cache oder 304 Not Modified.
+    extra_headers gehen nicht in den ETag ein (z.B. prozess-lokale Versionen).
+    """
+    body, etag = cache.get(version)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, **(extra_headers or {})}
+    if etag_matches(request, etag):
+        cache.not_modified += 1
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
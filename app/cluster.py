@@ -0,0 +1,436 @@
+"""
+Multi-Worker Betrieb: ein gewählter Writer, alle anderen folgen über den Bus
+
+Mehrere uvicorn-Worker (oder Replikas auf demselben Volume) teilen sich
+eine SQLite-Datei. Damit In-Memory State, Payload-Caches und Live-Streams
+in allen Prozessen gleich bleiben:
+
+- Writer-Wahl per exklusivem File-Lock (DATA_DIR/cluster/writer.lock).
+  Stirbt der Writer, gibt das Betriebssystem den Lock frei und ein anderer
+  Worker übernimmt.
+- Nur der Writer nimmt Updates an: Dedup, State, SQLite-Writer und
+  Retention laufen dort. Andere Worker parsen den Webhook, antworten
+  sofort und leiten das Update über den Bus ("submit") weiter.
+- Der Writer nummeriert jedes angenommene Update (Epoche + Sequenz) und
+  verteilt es ("change"). Alle Worker wenden Änderungen in genau dieser
+  Reihenfolge an und haben damit nach jeder Sequenz denselben Stand.
+- Regelmäßige Checkpoints nennen die höchste bereits in SQLite
+  geschriebene Sequenz. Ein Worker mit Lücke (verlorene Nachricht, neue
+  Epoche, frisch gestartet) lädt den State bei einem Checkpoint neu aus
+  SQLite und spielt die danach gepufferten Änderungen nach.
+
+Aktiv mit CLUSTER_MODE=1; Default ist an, wenn WEB_CONCURRENCY > 1
+(daraus liest auch uvicorn --workers seinen Default).
+"""
+
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import secrets
+
+from .bus import MAX_MESSAGE_BYTES, Bus, create_bus
+from .database import DATA_DIR
+from .dedup import dedup
+from .ingest import Update, build_update, writer
+from .retention import retention
+from .serializers import dumps, isoformat_utc
+from .state import state
+from .stream import hub
+
+logger = logging.getLogger(__name__)
+
+CLUSTER_MODE = os.environ.get(
+    "CLUSTER_MODE", "1" if int(os.environ.get("WEB_CONCURRENCY", "1")) > 1 else "0"
+) == "1"
+CLUSTER_BUS_URL = os.environ.get("CLUSTER_BUS_URL", "local")
+CLUSTER_DIR = os.environ.get("CLUSTER_DIR", os.path.join(DATA_DIR, "cluster"))
+# Abstand der Checkpoints des Writers (bestimmt, wie schnell Lücken heilen)
+CHECKPOINT_INTERVAL = int(os.environ.get("CLUSTER_CHECKPOINT_MS", "500")) / 1000.0
+# Wie oft Worker ohne Writer-Rolle versuchen, den Lock zu bekommen
+ELECTION_INTERVAL = 1.0
+# Max. gepufferte Änderungen während einer Resynchronisierung
+MAX_PENDING = 100_000
+
+CHANNELS = ["submit", "change", "checkpoint"]
+
+
+def encode_updates(updates: List[Update]) -> List[list]:
+    return [[update.parsed, isoformat_utc(update.received_at)] for update in updates]
+
+
+def decode_update(item: list, seq: int = 0) -> Update:
+    update = build_update(item[0], datetime.fromisoformat(item[1].rstrip("Z")))
+    return update._replace(seq=seq) if seq else update
+
+
+def decode_updates(items: List[list], first_seq: int = 0) -> List[Update]:
+    return [decode_update(item, first_seq + i if first_seq else 0) for i, item in enumerate(items)]
+
+
+def apply_updates(updates: List[Update]):
+    """Wendet Updates auf den State an und streamt pro Symbol nur den letzten Stand"""
+    changed = {}
+    for update in updates:
+        event, row = state.apply(update)
+        if event:
+            changed[(event, update.symbol)] = row
+    for (event, _), row in changed.items():
+        hub.publish(event, row)
+
+
+class WriterElection:
+    """Exklusiver, nicht blockierender flock; wird beim Prozessende automatisch frei"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self, owner: str) -> bool:
+        if self._fd is not None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, owner.encode())
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is None:
+            return
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+
+class Cluster:
+    """Koordiniert Writer-Rolle, Sequenzierung und Resynchronisierung"""
+
+    def __init__(self, enabled: bool = CLUSTER_MODE, bus_url: str = CLUSTER_BUS_URL,
+                 directory: str = CLUSTER_DIR):
+        self.enabled = enabled
+        self.bus_url = bus_url
+        self.directory = directory
+        self.worker_id = f"{os.getpid()}-{secrets.token_hex(3)}"
+        self.election = WriterElection(os.path.join(directory, "writer.lock"))
+        self.bus: Optional[Bus] = None
+        # Epoche des aktuellen Writers und zuletzt angewendete Sequenz
+        self.epoch: Optional[str] = None
+        self.seq = 0
+        self.synced = not enabled
+        # Während der Resynchronisierung: Sequenz -> Update
+        self._pending: Dict[int, Update] = {}
+        # Während der Writer-Übernahme (State wird gelesen): angenommene Updates
+        self._promoting: Optional[List[Tuple[List[Update], Optional[str]]]] = None
+        # Laufendes Neuladen nach einem Checkpoint (Follower)
+        self._resync_task: Optional[asyncio.Task] = None
+        self._tasks: List[asyncio.Task] = []
+        # Ausgehende Nachrichten werden pro Event-Loop-Durchlauf gebündelt
+        self._outgoing: Dict[str, list] = {"submit": [], "change": []}
+        self._first_outgoing_seq = 0
+        self._flush_scheduled = False
+        self.forwarded = 0
+        self.gaps = 0
+        self.resyncs = 0
+
+    @property
+    def is_writer(self) -> bool:
+        return not self.enabled or self.election.held
+
+    @property
+    def role(self) -> str:
+        if not self.enabled:
+            return "standalone"
+        return "writer" if self.election.held else "follower"
+
+    # ===== Lebenszyklus =====
+
+    @contextmanager
+    def startup_lock(self):
+        """Serialisiert init_db() zwischen gleichzeitig startenden Workern"""
+        if not self.enabled:
+            yield
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, "startup.lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    async def start(self):
+        if not self.enabled:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self.bus = create_bus(self.bus_url, self.directory, self.worker_id)
+        await self.bus.start(CHANNELS, self._on_message)
+        self._tasks = [asyncio.create_task(self._election_loop()),
+                       asyncio.create_task(self._checkpoint_loop())]
+        logger.info(f"✅ Cluster-Modus: Worker {self.worker_id}, Bus {self.bus_url}")
+
+    async def stop(self):
+        """Nach writer.stop() aufrufen: der Lock wird erst frei, wenn alles geschrieben ist"""
+        if not self.enabled:
+            return
+        tasks = self._tasks + ([self._resync_task] if self._resync_task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.election.release()
+        if self.bus is not None:
+            await self.bus.close()
+
+    async def _election_loop(self):
+        while True:
+            if not self.election.held and self.election.try_acquire(self.worker_id):
+                await self._become_writer()
+                if self.election.held:
+                    retention.start()
+            await asyncio.sleep(ELECTION_INTERVAL)
+
+    async def _become_writer(self):
+        # Nicht geschriebene Updates des alten Writers sind verloren; alle
+        # Worker starten daher vom gleichen Stand in SQLite. Gelesen wird im
+        # Thread, damit der Event-Loop weiter Requests bedient; Updates, die
+        # währenddessen eintreffen, werden danach sequenziert
+        self._promoting = []
+        try:
+            coins, macros = await asyncio.to_thread(state.fetch)
+        except Exception as e:
+            held, self._promoting = self._promoting, None
+            self.election.release()
+            logger.error(f"❌ Writer-Übernahme fehlgeschlagen: {e}")
+            for updates, idempotency_key in held:
+                self.ingest(updates, idempotency_key)
+            return
+        state.install(coins, macros)
+        self.epoch = f"{self.worker_id}-{secrets.token_hex(3)}"
+        self.seq = 0
+        writer.committed_seq = 0
+        self._pending.clear()
+        self.synced = True
+        logger.info(f"👑 Worker {self.worker_id} ist jetzt Writer (Epoche {self.epoch})")
+        self._publish_checkpoint()
+        held, self._promoting = self._promoting, None
+        for updates, idempotency_key in held:
+            self._sequence(updates, idempotency_key)
+
+    async def _checkpoint_loop(self):
+        while True:
+            await asyncio.sleep(CHECKPOINT_INTERVAL)
+            if self.election.held:
+                self._publish_checkpoint()
+
+    def _publish_checkpoint(self):
+        self.bus.publish("checkpoint", dumps({
+            "w": self.worker_id, "e": self.epoch, "c": writer.committed_seq, "h": self.seq,
+        }))
+
+    # ===== Webhook-Pfad =====
+
+    def ingest(self, updates: List[Update], idempotency_key: Optional[str] = None) -> Optional[List[bool]]:
+        """
+        Nimmt Updates an (Writer) oder leitet sie an den Writer weiter.
+
+        Returns:
+            Duplikat-Flag pro Update; None wenn weitergeleitet (der Writer entscheidet)
+        """
+        if self.is_writer:
+            return self._sequence(updates, idempotency_key)
+        self._enqueue("submit", [item + [idempotency_key] for item in encode_updates(updates)])
+        self.forwarded += len(updates)
+        return None
+
+    def _sequence(self, updates: List[Update], idempotency_key: Optional[str] = None) -> List[bool]:
+        if self._promoting is not None:
+            # Duplikate erkennt erst das Sequenzieren nach der Übernahme
+            self._promoting.append((updates, idempotency_key))
+            return [False] * len(updates)
+        if dedup.is_replay(idempotency_key):
+            return [True] * len(updates)
+        flags = [dedup.is_duplicate(update) for update in updates]
+        accepted = [update for update, duplicate in zip(updates, flags) if not duplicate]
+        if not accepted:
+            return flags
+
+        if self.enabled:
+            first = self.seq + 1
+            accepted = [update._replace(seq=first + i) for i, update in enumerate(accepted)]
+            self.seq += len(accepted)
+
+        apply_updates(accepted)
+        if len(accepted) == 1:
+            writer.submit(accepted[0])
+        else:
+            writer.submit_many(accepted)
+
+        if self.enabled:
+            if not self._outgoing["change"]:
+                self._first_outgoing_seq = accepted[0].seq
+            self._enqueue("change", encode_updates(accepted))
+        return flags
+
+    def _enqueue(self, channel: str, items: List[list]):
+        self._outgoing[channel].extend(items)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self._flush_outgoing)
+
+    def _flush_outgoing(self):
+        """Ein Bündel pro Kanal statt einer Nachricht pro Webhook"""
+        self._flush_scheduled = False
+        submits, changes = self._outgoing["submit"], self._outgoing["change"]
+        self._outgoing = {"submit": [], "change": []}
+        if submits:
+            self._publish_chunks("submit", {"w": self.worker_id}, submits)
+        if changes:
+            self._publish_chunks("change", {"w": self.worker_id, "e": self.epoch}, changes,
+                                 self._first_outgoing_seq)
+
+    def _publish_chunks(self, channel: str, header: dict, items: List[list], first_seq: Optional[int] = None):
+        """Teilt große Bündel so auf, dass jede Nachricht unter MAX_MESSAGE_BYTES bleibt"""
+        start, size = 0, len(items)
+        while start < len(items):
+            chunk = items[start:start + size]
+            message = dict(header, u=chunk)
+            if first_seq is not None:
+                message["q"] = first_seq + start
+            data = dumps(message)
+            if len(data) > MAX_MESSAGE_BYTES and size > 1:
+                size = max(1, size // 2)
+                continue
+            self.bus.publish(channel, data)
+            start += len(chunk)
+
+    # ===== Bus =====
+
+    def _on_message(self, channel: str, data: bytes):
+        message = json.loads(data)
+        if message.get("w") == self.worker_id:
+            return
+        if channel == "submit":
+            if self.election.held:
+                self._on_submit(message["u"])
+        elif channel == "change":
+            self._on_change(message["e"], message["q"], message["u"])
+        elif channel == "checkpoint":
+            self._on_checkpoint(message["e"], message["c"], message["h"])
+
+    def _on_submit(self, items: List[list]):
+        """Weitergeleitete Updates in Reihenfolge; solche mit Idempotency-Key einzeln"""
+        run: List[Update] = []
+        for item in items:
+            update = decode_update(item)
+            if item[2] is None:
+                run.append(update)
+                continue
+            if run:
+                self._sequence(run)
+                run = []
+            self._sequence([update], item[2])
+        if run:
+            self._sequence(run)
+
+    def _start_resync(self, epoch: str, reason: str):
+        if self.synced:
+            logger.warning(f"⚠️ Cluster-State veraltet ({reason}), warte auf Checkpoint")
+        self.epoch = epoch
+        self.synced = False
+        self._pending.clear()
+
+    def _on_change(self, epoch: str, first_seq: int, items: List[list]):
+        if self.election.held:
+            return
+        if epoch != self.epoch:
+            self._start_resync(epoch, "neue Epoche")
+        updates = decode_updates(items, first_seq)
+
+        if self.synced:
+            if first_seq <= self.seq:
+                return
+            if first_seq == self.seq + 1:
+                apply_updates(updates)
+                self.seq = updates[-1].seq
+                return
+            self.gaps += 1
+            self._start_resync(epoch, f"Lücke {self.seq + 1}-{first_seq - 1}")
+
+        if len(self._pending) < MAX_PENDING:
+            for update in updates:
+                self._pending[update.seq] = update
+
+    def _on_checkpoint(self, epoch: str, committed: int, head: int):
+        if self.election.held:
+            return
+        if epoch != self.epoch:
+            self._start_resync(epoch, "neue Epoche")
+        if self.synced or (self._resync_task is not None and not self._resync_task.done()):
+            return
+
+        # Alle Änderungen nach dem Checkpoint müssen lückenlos gepuffert sein
+        if any(seq not in self._pending for seq in range(committed + 1, head + 1)):
+            return
+        self._resync_task = asyncio.get_running_loop().create_task(self._resync(epoch, committed))
+
+    async def _resync(self, epoch: str, committed: int):
+        """
+        Lädt den State am Checkpoint neu (Lesen im Thread, damit der Event-Loop
+        weiter Requests bedient) und spielt danach die gepufferten Änderungen ein;
+        Änderungen während des Lesens landen weiter in _pending.
+        """
+        try:
+            coins, macros = await asyncio.to_thread(state.fetch)
+        except Exception as e:
+            logger.error(f"❌ Cluster-State konnte nicht geladen werden: {e}")
+            return
+        if epoch != self.epoch or self.synced or self.election.held:
+            # Inzwischen neue Epoche oder selbst Writer: nächster Checkpoint bzw. Übernahme gilt
+            return
+        state.install(coins, macros)
+        replay = [self._pending[seq] for seq in sorted(self._pending) if seq > committed]
+        replay = self._contiguous(replay, committed + 1)
+        apply_updates(replay)
+        self.seq = replay[-1].seq if replay else committed
+        self._pending.clear()
+        self.synced = True
+        self.resyncs += 1
+        logger.info(f"✅ Cluster-State neu geladen (Checkpoint {committed}, Sequenz {self.seq})")
+
+    @staticmethod
+    def _contiguous(updates: List[Update], first_seq: int) -> List[Update]:
+        for i, update in enumerate(updates):
+            if update.seq != first_seq + i:
+                return updates[:i]
+        return updates
+
+    def stats(self) -> Dict:
+        data = {"enabled": self.enabled, "role": self.role}
+        if self.enabled:
+            data.update({
+                "worker_id": self.worker_id,
+                "epoch": self.epoch,
+                "seq": self.seq,
+                "synced": self.synced,
+                "forwarded": self.forwarded,
+                "gaps": self.gaps,
+                "resyncs": self.resyncs,
+                "bus": self.bus.stats() if self.bus else None,
+            })
+        return data
+
+
+cluster = Cluster()
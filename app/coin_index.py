@@ -0,0 +1,240 @@
+"""
+In-Memory Indizes für /api/coins (Filter, Sortierung, Cursor, since=Version)
+
+Der StateStore meldet jede Änderung an einem Coin (touch); der Index hält:
+    - Version pro Coin und ein Changelog in Änderungsreihenfolge
+      -> since=<version> liefert nur geänderte Zeilen, O(geänderte Coins)
+    - Symbole pro Filterwert (trend_1w/3d/1d, last_signal_type)
+      -> seltene Filterwerte ohne Scan über alle Coins
+    - sortierte Schlüssel pro Sortierung (bisect für Cursor-Seiten);
+      last_updated nach Zeitstempel, die Version nur als Tiebreaker
+    - die fertige JSON-Zeile pro Coin (nur bei Änderung neu gebaut)
+    - dieselbe Zeile kompakt für /api/snapshot (Codes, Epoch-Sekunden)
+
+Versionen sind nur innerhalb einer Epoche vergleichbar; jedes Laden des
+States beginnt eine neue. Ein Token "<epoche>.<version>" aus einer
+anderen Epoche (Neustart, Resync, anderer Worker) führt zu einer
+vollständigen Antwort.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import base64
+import json
+import os
+
+from .serializers import coin_to_dict
+from .snapshot import compact_row
+
+# Spalten mit Filter-Index (Query-Parameter -> Spalte)
+FILTER_COLUMNS = {
+    "trend_1w": "trend_1w",
+    "trend_3d": "trend_3d",
+    "trend_1d": "trend_1d",
+    "signal": "last_signal_type",
+}
+SORTS = ("display_name", "symbol", "last_updated")
+# Felder der JSON-Zeile, die per fields= ausgewählt werden können
+FIELDS = ("symbol", "display_name", "trends", "last_signal", "last_updated")
+# Index statt Scan, wenn die Filter zusammen höchstens diesen Anteil treffen
+INDEX_SELECTIVITY = 0.125
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+class InvalidQuery(ValueError):
+    """Ungültiger Cursor, Version oder Parameter-Kombination"""
+
+
+def encode_cursor(sort: str, descending: bool, key) -> str:
+    raw = json.dumps([sort, descending, key], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, descending: bool):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, cursor_descending, key = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError) as e:
+        raise InvalidQuery(f"Invalid cursor: {cursor}") from e
+    if cursor_sort != sort or cursor_descending != descending:
+        raise InvalidQuery("Cursor belongs to a different sort order")
+    return tuple(key) if isinstance(key, list) else key
+
+
+class CoinIndex:
+    """Sekundär-Indizes über die Coins des StateStore (nur im Event-Loop)"""
+
+    def __init__(self):
+        self.epoch = os.urandom(4).hex()
+        self.version = 0
+        self._versions: Dict[str, int] = {}
+        # Symbol -> Version, älteste Änderung zuerst
+        self._changelog: "OrderedDict[str, int]" = OrderedDict()
+        self._values: Dict[Tuple[str, Optional[str]], Set[str]] = {}
+        self._payloads: Dict[str, dict] = {}
+        self._compact: Dict[str, tuple] = {}
+        # Symbol -> (last_updated in Mikrosekunden, Version); Schlüssel für sort=last_updated
+        self._updated: Dict[str, Tuple[int, int]] = {}
+        # Sortierung -> (Schlüssel, Symbole); display_name/symbol nur bei neuen Coins ungültig
+        self._sorted: Dict[str, Tuple[list, List[str]]] = {}
+        self._sorted_version = -1
+
+    @property
+    def token(self) -> str:
+        """Aktuelle Version für since= ("<epoche>.<version>")"""
+        return f"{self.epoch}.{self.version}"
+
+    # ===== Pflege =====
+
+    def rebuild(self, coins: Iterable):
+        """Neuaufbau beim Laden des States (neue Epoche)"""
+        self.__init__()
+        # Versionen in Reihenfolge von last_updated, wie bei späteren Änderungen
+        for coin in sorted(coins, key=lambda c: (c.last_updated or datetime.min, c.symbol)):
+            self.touch(coin)
+
+    def touch(self, coin) -> dict:
+        """Nach jeder Änderung an einem Coin; liefert die neue JSON-Zeile"""
+        symbol = coin.symbol
+        if symbol not in self._versions:
+            self._sorted.pop("display_name", None)
+            self._sorted.pop("symbol", None)
+        else:
+            for column in FILTER_COLUMNS.values():
+                self._values[(column, self._payload_value(symbol, column))].discard(symbol)
+        for column in FILTER_COLUMNS.values():
+            self._values.setdefault((column, getattr(coin, column)), set()).add(symbol)
+
+        self.version += 1
+        self._versions[symbol] = self.version
+        self._changelog[symbol] = self.version
+        self._changelog.move_to_end(symbol)
+        updated = coin.last_updated or datetime.min
+        self._updated[symbol] = ((updated - _EPOCH) // _MICROSECOND, self.version)
+        payload = self._payloads[symbol] = coin_to_dict(coin)
+        self._compact[symbol] = compact_row(coin)
+        return payload
+
+    def _payload_value(self, symbol: str, column: str) -> Optional[str]:
+        """Indizierter Wert vor der Änderung (aus der zuletzt gebauten Zeile)"""
+        payload = self._payloads[symbol]
+        if column == "last_signal_type":
+            return payload["last_signal"]["type"]
+        return payload["trends"][column[len("trend_"):]]
+
+    def payload(self, symbol: str) -> dict:
+        return self._payloads[symbol]
+
+    def compact(self, symbol: str) -> tuple:
+        return self._compact[symbol]
+
+    # ===== Abfragen =====
+
+    def changed_since(self, token: str) -> Optional[List[str]]:
+        """
+        Symbole, die sich nach token geändert haben (älteste zuerst).
+
+        Returns:
+            None, wenn token aus einer anderen Epoche stammt (-> alles neu laden)
+        """
+        epoch, _, version = token.partition(".")
+        try:
+            version = int(version)
+        except ValueError:
+            raise InvalidQuery(f"Invalid version: {token}")
+        if epoch != self.epoch or version > self.version:
+            return None
+        changed = []
+        for symbol, changed_at in reversed(self._changelog.items()):
+            if changed_at <= version:
+                break
+            changed.append(symbol)
+        changed.reverse()
+        return changed
+
+    def _sort_key(self, sort: str, coin):
+        if sort == "display_name":
+            return (coin.display_name or "", coin.symbol)
+        if sort == "symbol":
+            return coin.symbol
+        return self._updated[coin.symbol]
+
+    def ordered(self, sort: str, coins: Dict) -> Tuple[list, List[str]]:
+        """(Schlüssel, Symbole) aufsteigend sortiert"""
+        if sort == "last_updated":
+            # In Changelog-Reihenfolge meist schon fast nach Zeit sortiert (Timsort: ~linear);
+            # nur bei Änderungen neu sortieren
+            if self._sorted_version != self.version:
+                symbols = sorted(self._changelog, key=self._updated.__getitem__)
+                self._sorted["last_updated"] = (list(map(self._updated.__getitem__, symbols)), symbols)
+                self._sorted_version = self.version
+            return self._sorted["last_updated"]
+        cached = self._sorted.get(sort)
+        if cached is None:
+            items = sorted((self._sort_key(sort, coin), symbol) for symbol, coin in coins.items())
+            cached = self._sorted[sort] = ([key for key, _ in items], [symbol for _, symbol in items])
+        return cached
+
+    def query(self, coins: Dict, filters: Dict[str, Optional[str]], updated_since: Optional[datetime],
+              sort: str, descending: bool, cursor: Optional[str], limit: int) -> Tuple[List[str], Optional[str]]:
+        """
+        Eine Seite Symbole.
+
+        Args:
+            coins: Symbol -> CoinRecord
+            filters: Spalte -> Wert (None = Spalte leer)
+            updated_since: nur Coins mit last_updated >= Zeitpunkt
+            sort: display_name / symbol / last_updated
+            descending: absteigend sortieren
+            cursor: next_cursor der vorherigen Seite
+            limit: max. Anzahl Coins
+
+        Returns:
+            (Symbole, next_cursor oder None)
+        """
+        after = decode_cursor(cursor, sort, descending) if cursor else None
+
+        def matches(symbol: str) -> bool:
+            coin = coins[symbol]
+            for column, value in filters.items():
+                if getattr(coin, column) != value:
+                    return False
+            return updated_since is None or (coin.last_updated is not None and coin.last_updated >= updated_since)
+
+        candidates = None
+        if filters:
+            sets = sorted((self._values.get(item, set()) for item in filters.items()), key=len)
+            matching = sets[0].intersection(*sets[1:])
+            if len(matching) <= len(coins) * INDEX_SELECTIVITY:
+                # Selektive Filter: nur die Schnittmenge sortieren
+                items = sorted((self._sort_key(sort, coins[symbol]), symbol) for symbol in matching)
+                if descending:
+                    items.reverse()
+                if after is not None:
+                    items = [item for item in items if (item[0] < after if descending else item[0] > after)]
+                candidates = items
+
+        if candidates is None:
+            keys, symbols = self.ordered(sort, coins)
+            if descending:
+                start = bisect_left(keys, after) - 1 if after is not None else len(keys) - 1
+                candidates = ((keys[i], symbols[i]) for i in range(start, -1, -1))
+            else:
+                start = bisect_right(keys, after) if after is not None else 0
+                candidates = ((keys[i], symbols[i]) for i in range(start, len(keys)))
+
+        page: List[str] = []
+        last_key = None
+        for key, symbol in candidates:
+            if not matches(symbol):
+                continue
+            if len(page) == limit:
+                # Es gibt mindestens eine weitere Zeile
+                return page, encode_cursor(sort, descending, last_key)
+            page.append(symbol)
+            last_key = key
+        return page, None
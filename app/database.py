@@ -1,16 +1,21 @@
 """
-SQLite Database Setup mit SQLAlchemy
+Database Setup mit SQLAlchemy (Tabellen, Sessions, Seed-Daten)
 Persistent Volume: /data/trading.db (Railway)
 Lokal: data/trading.db
+PostgreSQL: DATABASE_URL=postgresql://... (Backends in app/storage.py)
 """
 
-from sqlalchemy import create_engine, Column, String, Float, DateTime, text, inspect
+from sqlalchemy import Column, String, Float, Date, DateTime, Integer, SmallInteger, Index, func, select
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime, timedelta
 import os
 import logging
 
+from .indicators import COIN_COLUMNS, MACRO_COLUMNS, MACRO_TIMEFRAME, encode_value, normalize_timeframe
+from .storage import create_storage
+
 logger = logging.getLogger(__name__)
 
 # Database URL (Railway Volume oder lokal)
@@ -18,28 +23,47 @@ logger = logging.getLogger(__name__)
 DATA_DIR = os.environ.get("DATA_DIR", "data")
 DATABASE_URL = os.environ.get("DATABASE_URL", f"sqlite:///{DATA_DIR}/trading.db")
 
+# Retention für webhook_events (app/retention.py)
+# Rohdaten älter als N Tage werden zu Tages-Summaries verdichtet (0 = nie)
+HISTORY_RETENTION_DAYS = int(os.environ.get("HISTORY_RETENTION_DAYS", "30"))
+RETENTION_INTERVAL_SECONDS = int(os.environ.get("RETENTION_INTERVAL_SECONDS", "3600"))
+RETENTION_BATCH_SIZE = int(os.environ.get("RETENTION_BATCH_SIZE", "1000"))
+# Pause zwischen zwei Batches, damit der Webhook-Writer dazwischen schreiben kann
+RETENTION_PAUSE_MS = int(os.environ.get("RETENTION_PAUSE_MS", "50"))
+# Max. freigegebene Pages pro PRAGMA incremental_vacuum
+RETENTION_VACUUM_PAGES = int(os.environ.get("RETENTION_VACUUM_PAGES", "2000"))
+
+# Stand des Schemas (Tabellen, Spalten, Migrationen, Seeds). Erhöhen, sobald
+# sich Models oder Migrationen ändern: nur dann läuft beim Start der
+# langsame Pfad (Reflection, create_all, Migrationen, Seeds).
+#   1: macro_states mit trend_1m/macd_1m
+#   2: indicator_states
+#   3: schema_version
+SCHEMA_VERSION = 3
+
 # Ensure data dir exists
 os.makedirs(DATA_DIR, exist_ok=True)
 
-# SQLAlchemy Setup
-engine = create_engine(
-    DATABASE_URL, 
-    connect_args={"check_same_thread": False},
-    echo=False  # Set to True for SQL debugging
-)
+# Engines, Pools und Upserts kommen aus dem Backend (app/storage.py)
+storage = create_storage(DATABASE_URL)
+engine = storage.engine
+read_engine = storage.read_engine
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
 
 class CoinState(Base):
     """
     Model für Coin-Status
-    Speichert Trends (1W, 3D, 1D) und letzte Signale
+    Speichert letzte Signale; Trends stehen in indicator_states
     """
     __tablename__ = "coin_states"
     
     symbol = Column(String, primary_key=True)           # z.B. "HYPEUSDT.P"
     display_name = Column(String)                       # z.B. "HYPE"
+    # Legacy: seit indicator_states nur noch für die Migration gelesen
     trend_1w = Column(String, nullable=True)            # "uptrend" / "downtrend" / None
     trend_3d = Column(String, nullable=True)
     trend_1d = Column(String, nullable=True)
@@ -56,12 +80,13 @@ class CoinState(Base):
 class MacroState(Base):
     """
     Model für Macro-Indikatoren
-    Speichert monatliche Trend und MACD Werte für Markt-Übersicht
+    Stammdaten der Markt-Übersicht; Trend und MACD stehen in indicator_states
     """
     __tablename__ = "macro_states"
     
     symbol = Column(String, primary_key=True)           # BTC, USDT.D, TOTAL, TOTAL2, TOTAL3, OTHERS
     display_name = Column(String)                       # Full display name
+    # Legacy: seit indicator_states nur noch für die Migration gelesen
     trend_1m = Column(String, default="bearish")        # "bullish" / "bearish"
     macd_1m = Column(String, default="bearish")         # "bullish" / "bearish"
     last_updated = Column(DateTime, default=datetime.utcnow)
@@ -71,141 +96,323 @@ class MacroState(Base):
         return f"<MacroState {self.symbol}>"
 
 
+class IndicatorState(Base):
+    """
+    Model für Indikator-Stände
+    Eine Zeile pro (Typ, Symbol, Timeframe, Indikator); neue Timeframes
+    sind neue Zeilen statt neuer Spalten. Wert als Code aus app/indicators.py.
+    """
+    __tablename__ = "indicator_states"
+    
+    kind = Column(String, primary_key=True)             # "coin" / "macro"
+    symbol = Column(String, primary_key=True)
+    timeframe = Column(String, primary_key=True)        # "1w", "3d", "1d", "4h", ... ("1m" bei Macro)
+    indicator = Column(String, primary_key=True)        # "trend" / "macd"
+    value = Column(SmallInteger, nullable=False)        # 1 uptrend, 2 downtrend, 3 bullish, 4 bearish
+    updated_at = Column(DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f"<IndicatorState {self.kind} {self.symbol} {self.timeframe} {self.indicator}>"
+
+
+# Konfliktschlüssel für Upserts in indicator_states
+INDICATOR_KEYS = ("kind", "symbol", "timeframe", "indicator")
+
+
+class WebhookEvent(Base):
+    """
+    Append-only Log aller geparsten Webhooks (Historie für Backtests)
+    Wird nur vom Webhook-Writer im selben Batch wie die States geschrieben.
+    """
+    __tablename__ = "webhook_events"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    symbol = Column(String, nullable=False)             # z.B. "HYPEUSDT.P" oder "BTC"
+    type = Column(String, nullable=False)               # "trend" / "signal" / "macro"
+    timeframe = Column(String, nullable=True)           # "1w", "3d", "1d", "4h", ... ("1m" bei Macro)
+    indicator = Column(String, nullable=True)           # Nur Macro: "trend" / "macd"
+    value = Column(String, nullable=False)              # "uptrend", "buy", "bullish", ...
+    received_at = Column(DateTime, nullable=False)
+    
+    __table_args__ = (
+        # Zeitbereich pro Symbol; die rowid (id) hängt SQLite implizit an
+        Index("ix_webhook_events_symbol_received_at", "symbol", "received_at"),
+        # Zeitbereich über alle Symbole
+        Index("ix_webhook_events_received_at", "received_at"),
+    )
+    
+    def __repr__(self):
+        return f"<WebhookEvent {self.symbol} {self.type} {self.value}>"
+
+
+class WebhookDailySummary(Base):
+    """
+    Verdichtete Historie: eine Zeile pro Symbol, Tag und Serie
+    Serie = "trend:1w", "signal:1d", "macro:macd", ...
+    Entsteht aus webhook_events, sobald diese älter als HISTORY_RETENTION_DAYS sind.
+    """
+    __tablename__ = "webhook_daily_summary"
+    
+    symbol = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True)
+    series = Column(String, primary_key=True)
+    event_count = Column(Integer, nullable=False, default=0)
+    flip_count = Column(Integer, nullable=False, default=0)   # Wertwechsel (inkl. Tagesgrenze)
+    first_value = Column(String, nullable=True)
+    last_value = Column(String, nullable=True)                # Letzter Stand am Tagesende
+    last_received_at = Column(DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f"<WebhookDailySummary {self.symbol} {self.day} {self.series}>"
+
+
+class SchemaVersion(Base):
+    """
+    Gespeicherter Schema-Stand (eine Zeile)
+    init_db vergleicht ihn mit SCHEMA_VERSION statt die Tabellen per
+    Reflection zu prüfen.
+    """
+    __tablename__ = "schema_version"
+    
+    name = Column(String, primary_key=True)             # "app"
+    version = Column(Integer, nullable=False)
+    migrated_at = Column(DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f"<SchemaVersion {self.name} {self.version}>"
+
+
+class ReplayCheckpoint(Base):
+    """
+    Fortschritt von python -m app.replay pro Quelle
+    Wird in derselben Transaktion wie die Daten geschrieben: nach einem
+    Abbruch setzt der nächste Lauf genau hinter dem letzten Commit fort.
+    """
+    __tablename__ = "replay_checkpoints"
+    
+    source = Column(String, primary_key=True)           # Checkpoint-Name (Default: absoluter Pfad)
+    position = Column(Integer, nullable=False)          # Verarbeitete Datensätze der Quelle
+    applied = Column(Integer, nullable=False)           # Davon gültig und geschrieben
+    updated_at = Column(DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f"<ReplayCheckpoint {self.source} {self.position}>"
+
+
 def migrate_macro_table():
     """
-    Migrate macro_states table if it exists with old schema.
-    Drops and recreates the table with new columns.
+    Ergänzt die Spalten trend_1m/macd_1m in macro_states aus dem alten
+    Schema (ALTER TABLE statt DROP, bestehende Zeilen bleiben erhalten).
     """
-    inspector = inspect(engine)
+    added = storage.add_missing_columns(MacroState, {"trend_1m": "'bearish'", "macd_1m": "'bearish'"})
+    if added:
+        logger.info(f"📊 macro_states migriert: {', '.join(added)} hinzugefügt")
+
+
+def migrate_indicator_states():
+    """
+    Übernimmt einmalig die festen Spalten (trend_1w/3d/1d, trend_1m/macd_1m)
+    nach indicator_states. Die alten Spalten bleiben unverändert stehen.
+
+    Der jeweils letzte Wert pro Timeframe aus webhook_events hat Vorrang:
+    so bekommen 4h, 12h, ... ihren eigenen Stand zurück, und trend_1d ist
+    nicht mehr von diesen Timeframes überschrieben. Ohne Historie (z.B.
+    nach der Retention) gilt der Wert der alten Spalte.
+    """
+    db = SessionLocal()
+    try:
+        if db.query(IndicatorState.symbol).first() is not None:
+            return
+        rows = {}
+        for kind, model, columns in (("coin", CoinState, COIN_COLUMNS), ("macro", MacroState, MACRO_COLUMNS)):
+            for record in db.query(model):
+                for column, (timeframe, indicator) in columns.items():
+                    value = getattr(record, column)
+                    if value is not None:
+                        rows[(kind, record.symbol, timeframe, indicator)] = (value, record.last_updated)
+
+        latest = (
+            select(func.max(WebhookEvent.id))
+            .where(WebhookEvent.type.in_(("trend", "macro")))
+            .group_by(WebhookEvent.symbol, WebhookEvent.type, WebhookEvent.timeframe, WebhookEvent.indicator)
+        )
+        restored = {}
+        for event in db.query(WebhookEvent).filter(WebhookEvent.id.in_(latest)):
+            if event.type == "macro":
+                key = ("macro", event.symbol, MACRO_TIMEFRAME, event.indicator)
+            else:
+                key = ("coin", event.symbol, normalize_timeframe(event.timeframe), "trend")
+            # "7d" und "1w" landen im selben Slot: der neuere gewinnt
+            if key not in restored or restored[key][1] < event.received_at:
+                restored[key] = (event.value, event.received_at)
+        rows.update(restored)
+
+        if rows:
+            now = datetime.utcnow()
+            storage.upsert(db, IndicatorState, [
+                {"kind": kind, "symbol": symbol, "timeframe": timeframe, "indicator": indicator,
+                 "value": encode_value(value), "updated_at": at or now}
+                for (kind, symbol, timeframe, indicator), (value, at) in rows.items()
+            ], keys=INDICATOR_KEYS, update=())
+            db.commit()
+            logger.info(f"📊 indicator_states migriert: {len(rows)} Stände ({len(restored)} aus der Historie)")
+    finally:
+        db.close()
+
+
+def stored_schema_version() -> int:
+    """Schema-Stand aus schema_version (0 = neue Datenbank oder älter als die Tabelle)"""
+    try:
+        with engine.connect() as conn:
+            version = conn.execute(
+                select(SchemaVersion.version).where(SchemaVersion.name == "app")
+            ).scalar()
+    except DBAPIError:
+        # Tabelle fehlt noch
+        return 0
+    return version or 0
+
+
+def seed_db(db):
+    """
+    Demo-Coins und Macro-Indikatoren, soweit sie fehlen.
+    Ein Upsert pro Tabelle (DO NOTHING); Trends nur für neu angelegte Coins.
+    """
+    now = datetime.utcnow()
+    
+    # Initial Coins mit Beispieldaten für Demo
+    initial_coins = [
+        {
+            "symbol": "HYPEUSDT.P", 
+            "display_name": "HYPE",
+            "trend_1w": "downtrend",
+            "trend_3d": "uptrend",
+            "trend_1d": "downtrend",
+            "last_signal_type": "sell",
+            "last_signal_time": now - timedelta(minutes=5),
+            "last_updated": now - timedelta(minutes=2)
+        },
+        {
+            "symbol": "VIRTUALUSDT.P", 
+            "display_name": "VIRTUAL",
+            "trend_1w": "uptrend",
+            "trend_3d": "uptrend",
+            "trend_1d": "uptrend",
+            "last_signal_type": "buy",
+            "last_signal_time": now - timedelta(minutes=12),
+            "last_updated": now - timedelta(minutes=1)
+        },
+        {
+            "symbol": "FARTCOINUSDT.P", 
+            "display_name": "FARTCOIN",
+            "trend_1w": "downtrend",
+            "trend_3d": "uptrend",
+            "trend_1d": "uptrend",
+            "last_signal_type": "buy",
+            "last_signal_time": now - timedelta(hours=1),
+            "last_updated": now - timedelta(minutes=5)
+        },
+        {
+            "symbol": "PEPEUSDT.P", 
+            "display_name": "PEPE",
+            "trend_1w": "uptrend",
+            "trend_3d": "downtrend",
+            "trend_1d": "uptrend",
+            "last_signal_type": "sell",
+            "last_signal_time": now - timedelta(hours=3),
+            "last_updated": now - timedelta(minutes=3)
+        },
+        {
+            "symbol": "DOGEUSDT.P", 
+            "display_name": "DOGE",
+            "trend_1w": "uptrend",
+            "trend_3d": "uptrend",
+            "trend_1d": "downtrend",
+            "last_signal_type": "buy",
+            "last_signal_time": now - timedelta(hours=6),
+            "last_updated": now - timedelta(minutes=4)
+        },
+    ]
     
-    if 'macro_states' in inspector.get_table_names():
-        # Check if new columns exist
-        columns = [col['name'] for col in inspector.get_columns('macro_states')]
-        
-        if 'trend_1m' not in columns or 'macd_1m' not in columns:
-            logger.info("📊 Migrating macro_states table to new schema...")
-            
-            # Drop old table and recreate
-            with engine.connect() as conn:
-                conn.execute(text("DROP TABLE IF EXISTS macro_states"))
-                conn.commit()
-            
-            logger.info("✅ Old macro_states table dropped")
+    # Initialize Macro Indicators (all bearish by default)
+    initial_macros = [
+        {"symbol": "BTC", "display_name": "Bitcoin"},
+        {"symbol": "USDT.D", "display_name": "Tether Dominance"},
+        {"symbol": "TOTAL", "display_name": "Total Market Cap"},
+        {"symbol": "TOTAL2", "display_name": "Total 2 (Altcoins)"},
+        {"symbol": "TOTAL3", "display_name": "Total 3 (Altcoins ex ETH)"},
+        {"symbol": "OTHERS", "display_name": "Others (Small Caps)"},
+    ]
+    
+    existing = set(db.scalars(
+        select(CoinState.symbol).where(CoinState.symbol.in_([c["symbol"] for c in initial_coins]))
+    ))
+    coins, trends = [], []
+    for coin_data in initial_coins:
+        if coin_data["symbol"] in existing:
+            continue
+        for column, (timeframe, indicator) in COIN_COLUMNS.items():
+            trends.append({
+                "kind": "coin", "symbol": coin_data["symbol"], "timeframe": timeframe, "indicator": indicator,
+                "value": encode_value(coin_data.pop(column)), "updated_at": coin_data["last_updated"],
+            })
+        coins.append(dict(coin_data, created_at=now))
+    storage.upsert(db, CoinState, coins, update=())
+    storage.upsert(db, IndicatorState, trends, keys=INDICATOR_KEYS, update=())
+    storage.upsert(db, MacroState, [
+        dict(macro_data, created_at=now, last_updated=now) for macro_data in initial_macros
+    ], update=())
+    if coins:
+        logger.info(f"➕ Coins hinzugefügt: {', '.join(c['display_name'] for c in coins)}")
+    logger.info(f"✅ {len(initial_coins)} Coins und {len(initial_macros)} Macro-Indikatoren in Datenbank")
 
 
-def init_db():
+def migrate_schema(from_version: int):
     """
-    Initialisiert die Datenbank und fügt Seed-Daten hinzu.
-    Wird beim App-Start aufgerufen.
+    Langsamer Pfad von init_db: Reflection, create_all, Migrationen und
+    Seeds; speichert danach SCHEMA_VERSION (zusammen mit den Seeds).
     """
     # Migrate old tables if needed
     migrate_macro_table()
+    storage.prepare()
     
     # Create all tables
     Base.metadata.create_all(bind=engine)
+    migrate_indicator_states()
     
     db = SessionLocal()
-    
     try:
-        # Initial Coins mit Beispieldaten für Demo
-        now = datetime.utcnow()
-        
-        initial_coins = [
-            {
-                "symbol": "HYPEUSDT.P", 
-                "display_name": "HYPE",
-                "trend_1w": "downtrend",
-                "trend_3d": "uptrend",
-                "trend_1d": "downtrend",
-                "last_signal_type": "sell",
-                "last_signal_time": now - timedelta(minutes=5),
-                "last_updated": now - timedelta(minutes=2)
-            },
-            {
-                "symbol": "VIRTUALUSDT.P", 
-                "display_name": "VIRTUAL",
-                "trend_1w": "uptrend",
-                "trend_3d": "uptrend",
-                "trend_1d": "uptrend",
-                "last_signal_type": "buy",
-                "last_signal_time": now - timedelta(minutes=12),
-                "last_updated": now - timedelta(minutes=1)
-            },
-            {
-                "symbol": "FARTCOINUSDT.P", 
-                "display_name": "FARTCOIN",
-                "trend_1w": "downtrend",
-                "trend_3d": "uptrend",
-                "trend_1d": "uptrend",
-                "last_signal_type": "buy",
-                "last_signal_time": now - timedelta(hours=1),
-                "last_updated": now - timedelta(minutes=5)
-            },
-            {
-                "symbol": "PEPEUSDT.P", 
-                "display_name": "PEPE",
-                "trend_1w": "uptrend",
-                "trend_3d": "downtrend",
-                "trend_1d": "uptrend",
-                "last_signal_type": "sell",
-                "last_signal_time": now - timedelta(hours=3),
-                "last_updated": now - timedelta(minutes=3)
-            },
-            {
-                "symbol": "DOGEUSDT.P", 
-                "display_name": "DOGE",
-                "trend_1w": "uptrend",
-                "trend_3d": "uptrend",
-                "trend_1d": "downtrend",
-                "last_signal_type": "buy",
-                "last_signal_time": now - timedelta(hours=6),
-                "last_updated": now - timedelta(minutes=4)
-            },
-        ]
-        
-        for coin_data in initial_coins:
-            existing = db.query(CoinState).filter_by(symbol=coin_data["symbol"]).first()
-            if not existing:
-                coin = CoinState(**coin_data, created_at=now)
-                db.add(coin)
-                logger.info(f"➕ Coin hinzugefügt: {coin_data['display_name']}")
-        
+        seed_db(db)
+        storage.upsert(db, SchemaVersion, [
+            {"name": "app", "version": SCHEMA_VERSION, "migrated_at": datetime.utcnow()}
+        ], keys=("name",))
         db.commit()
-        logger.info(f"✅ {len(initial_coins)} Coins in Datenbank")
-        
-        # Initialize Macro Indicators (all bearish by default)
-        initial_macros = [
-            {"symbol": "BTC", "display_name": "Bitcoin"},
-            {"symbol": "USDT.D", "display_name": "Tether Dominance"},
-            {"symbol": "TOTAL", "display_name": "Total Market Cap"},
-            {"symbol": "TOTAL2", "display_name": "Total 2 (Altcoins)"},
-            {"symbol": "TOTAL3", "display_name": "Total 3 (Altcoins ex ETH)"},
-            {"symbol": "OTHERS", "display_name": "Others (Small Caps)"},
-        ]
-        
-        for macro_data in initial_macros:
-            existing = db.query(MacroState).filter_by(symbol=macro_data["symbol"]).first()
-            if not existing:
-                macro = MacroState(
-                    symbol=macro_data["symbol"],
-                    display_name=macro_data["display_name"],
-                    trend_1m="bearish",
-                    macd_1m="bearish",
-                    created_at=now,
-                    last_updated=now
-                )
-                db.add(macro)
-                logger.info(f"📊 Macro hinzugefügt: {macro_data['display_name']}")
-        
-        db.commit()
-        logger.info(f"✅ {len(initial_macros)} Macro-Indikatoren in Datenbank")
-        
     except Exception as e:
         logger.error(f"❌ Database init error: {e}")
         db.rollback()
         raise
     finally:
         db.close()
+    logger.info(f"✅ Schema v{from_version} -> v{SCHEMA_VERSION}")
+
+
+def init_db():
+    """
+    Initialisiert die Datenbank und fügt Seed-Daten hinzu.
+    Wird beim App-Start aufgerufen.
+    
+    Ist das Schema schon auf SCHEMA_VERSION, kostet das nur eine Abfrage;
+    Reflection, Migrationen und Seeds laufen nur bei neuer oder älterer
+    Datenbank.
+    """
+    version = stored_schema_version()
+    if version == SCHEMA_VERSION:
+        return
+    if version > SCHEMA_VERSION:
+        # Rollback auf einen älteren Deploy: Schema nicht anfassen
+        logger.warning(f"⚠️ Schema v{version} ist neuer als dieser Code (v{SCHEMA_VERSION})")
+        return
+    migrate_schema(version)
 
 
 def get_db():
@@ -218,3 +425,16 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    """
+    Dependency für lesende Endpoints.
+    Session aus dem Read-Only Pool (im Production-Profil), damit pollende
+    Leser nicht mit den Webhook-Writes um Verbindungen oder Locks konkurrieren.
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,134 @@
+"""
+Dedup für Webhooks: TradingView wiederholt Alerts bei Timeouts, und
+mehrere Charts feuern oft denselben Alert. Duplikate werden vor State,
+Live-Stream und Writer erkannt und nur noch mit 200 bestätigt.
+
+Fingerprint = (Typ, Symbol, Ziel, Wert, Zeit-Bucket), Ziel ist
+(Timeframe, Indikator), auch bei Signalen. Pro Serie (Typ, Symbol, Ziel) zählt nur der zuletzt angenommene Fingerprint: ein
+Wechsel UPTREND -> DOWNTREND -> UPTREND im selben Bucket ist kein Duplikat.
+
+Optional kann der Client einen Idempotency-Key Header mitschicken; dieser
+Schlüssel wird dann für IDEMPOTENCY_TTL_SECONDS gemerkt.
+
+Der Cache ist begrenzt (LRU) und Einträge laufen nach einer TTL ab.
+Alle Zugriffe laufen im Event-Loop, daher ohne Locks.
+"""
+
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+import os
+import time
+
+from .ingest import Update, update_target
+
+# Zeitfenster für inhaltsgleiche Alerts (0 = Dedup aus)
+DEDUP_WINDOW_SECONDS = int(os.environ.get("DEDUP_WINDOW_SECONDS", "60"))
+# Max. gemerkte Fingerprints/Keys
+DEDUP_MAX_ENTRIES = int(os.environ.get("DEDUP_MAX_ENTRIES", "10000"))
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get("IDEMPOTENCY_TTL_SECONDS", "86400"))
+
+
+def fingerprint(update: Update, window: int = DEDUP_WINDOW_SECONDS, now: Optional[float] = None) -> Tuple[Tuple, Tuple]:
+    """
+    Normalisierter Fingerprint eines Updates.
+
+    Returns:
+        (Fingerprint, Serie)
+    """
+    # Ziel: ("4h", "trend"), ("1d", "signal"), ("1m", "macd"), ...
+    series = (update.kind, update.symbol, update_target(update))
+    bucket = int((now if now is not None else time.time()) // window) if window > 0 else 0
+    return series + (update.parsed["value"], bucket), series
+
+
+class DedupCache:
+    """Begrenzter LRU/TTL-Cache für Fingerprints und Idempotency-Keys"""
+
+    def __init__(self, max_entries: int = DEDUP_MAX_ENTRIES, ttl: float = DEDUP_WINDOW_SECONDS,
+                 key_ttl: float = IDEMPOTENCY_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.key_ttl = key_ttl
+        # Schlüssel -> (Ablaufzeit, Serie)
+        self._entries: "OrderedDict[Hashable, Tuple[float, Optional[Tuple]]]" = OrderedDict()
+        # Serie -> zuletzt angenommener Fingerprint
+        self._latest: Dict[Tuple, Hashable] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def _remove(self, key: Hashable):
+        _, series = self._entries.pop(key)
+        if series is not None and self._latest.get(series) == key:
+            del self._latest[series]
+
+    def seen(self, key: Hashable, series: Optional[Tuple] = None, ttl: Optional[float] = None) -> bool:
+        """
+        Prüft einen Schlüssel und merkt ihn sich, falls er neu ist.
+
+        Args:
+            key: Fingerprint oder ("idempotency", Header-Wert)
+            series: Serie des Fingerprints; ersetzt den vorherigen Fingerprint der Serie
+            ttl: Abweichende Lebensdauer (Default: self.ttl)
+
+        Returns:
+            True wenn der Schlüssel ein Duplikat ist
+        """
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True
+            self._remove(key)
+            self.expirations += 1
+
+        self.misses += 1
+        if series is not None:
+            previous = self._latest.get(series)
+            if previous is not None and previous in self._entries:
+                self._remove(previous)
+            self._latest[series] = key
+
+        self._entries[key] = (now + (ttl if ttl is not None else self.ttl), series)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+        return False
+
+    def is_duplicate(self, update: Update) -> bool:
+        """Fingerprint-Prüfung für ein Update (False wenn Dedup aus ist)"""
+        if not self.enabled:
+            return False
+        key, series = fingerprint(update, int(self.ttl))
+        return self.seen(key, series)
+
+    def is_replay(self, idempotency_key: Optional[str]) -> bool:
+        """Prüft einen client-seitigen Idempotency-Key"""
+        if not idempotency_key or self.max_entries <= 0:
+            return False
+        return self.seen(("idempotency", idempotency_key), ttl=self.key_ttl)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+dedup = DedupCache()
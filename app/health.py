@@ -0,0 +1,119 @@
+"""
+Health-Probes ohne Datenbank-Zugriff im Request
+
+- /livez:  Prozess und Event-Loop antworten (keine I/O)
+- /readyz: liest nur den zwischengespeicherten DB-Heartbeat
+- /health: Details aus In-Memory-Zählern
+
+Der Heartbeat läuft in einem eigenen Thread und prüft die Datenbank alle
+HEALTH_HEARTBEAT_SECONDS mit einer kurzen Lese-Abfrage über den Read-Pool.
+Eine Probe wartet damit nie auf SQLite, auch nicht bei Schreiblast.
+"""
+
+from datetime import datetime
+from typing import Dict, Optional
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import text
+
+from .database import read_engine
+from .serializers import isoformat_utc
+
+logger = logging.getLogger(__name__)
+
+# Abstand zwischen zwei DB-Prüfungen
+HEALTH_HEARTBEAT_SECONDS = float(os.environ.get("HEALTH_HEARTBEAT_SECONDS", "5"))
+# Ältere erfolgreiche Heartbeats gelten als "nicht bereit"
+HEALTH_MAX_STALENESS_SECONDS = float(os.environ.get("HEALTH_MAX_STALENESS_SECONDS", "30"))
+
+
+class DatabaseHeartbeat:
+    """Prüft die Datenbank im Hintergrund und merkt sich das Ergebnis"""
+
+    def __init__(self, engine=read_engine, interval: float = HEALTH_HEARTBEAT_SECONDS,
+                 max_staleness: float = HEALTH_MAX_STALENESS_SECONDS):
+        self._engine = engine
+        self.interval = interval
+        self.max_staleness = max_staleness
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # monotonic Zeitpunkt des letzten erfolgreichen Checks
+        self._last_ok: Optional[float] = None
+        self.last_checked_at: Optional[datetime] = None
+        self.last_latency_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.consecutive_failures = 0
+
+    def check(self) -> bool:
+        """Eine Prüfung (SELECT auf coin_states); aktualisiert den Cache"""
+        started = time.perf_counter()
+        try:
+            with self._engine.connect() as conn:
+                conn.execute(text("SELECT 1 FROM coin_states LIMIT 1")).fetchall()
+        except Exception as e:
+            self.consecutive_failures += 1
+            self.last_error = str(e)[:200]
+            if self.consecutive_failures == 1:
+                logger.warning(f"⚠️ DB-Heartbeat fehlgeschlagen: {e}")
+            return False
+        finally:
+            self.last_checked_at = datetime.utcnow()
+            self.last_latency_ms = round((time.perf_counter() - started) * 1000, 2)
+
+        if self.consecutive_failures:
+            logger.info(f"✅ DB-Heartbeat wieder ok nach {self.consecutive_failures} Fehlversuchen")
+        self._last_ok = time.monotonic()
+        self.consecutive_failures = 0
+        self.last_error = None
+        return True
+
+    @property
+    def age(self) -> Optional[float]:
+        """Sekunden seit dem letzten erfolgreichen Check"""
+        return None if self._last_ok is None else time.monotonic() - self._last_ok
+
+    @property
+    def is_healthy(self) -> bool:
+        age = self.age
+        return age is not None and age <= self.max_staleness and self.consecutive_failures == 0
+
+    def stats(self) -> Dict:
+        age = self.age
+        return {
+            "healthy": self.is_healthy,
+            "last_checked_at": isoformat_utc(self.last_checked_at),
+            "age_seconds": round(age, 1) if age is not None else None,
+            "latency_ms": self.last_latency_ms,
+            "consecutive_failures": self.consecutive_failures,
+            "error": self.last_error,
+        }
+
+    # ===== Hintergrund-Thread =====
+
+    def start(self):
+        """Checks im Thread; der erste sofort, falls noch keiner gelaufen ist (nie im Event-Loop)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="db-heartbeat", daemon=True)
+        self._thread.start()
+        logger.info(f"✅ DB-Heartbeat gestartet (alle {self.interval:.0f}s)")
+
+    def stop(self, timeout: float = 5.0):
+        if not self._thread:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        if self.last_checked_at is None:
+            self.check()
+        while not self._stop.wait(self.interval):
+            self.check()
+
+
+heartbeat = DatabaseHeartbeat()
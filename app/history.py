@@ -0,0 +1,99 @@
+"""
+Abfragen auf das Webhook-Log (webhook_events)
+Keyset-Pagination über (received_at, id): jede Seite ist ein Index-Range-Scan
+mit LIMIT, unabhängig davon wie weit hinten sie liegt - auch bei zig
+Millionen Zeilen kein OFFSET-Scan.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import base64
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+
+from .database import WebhookEvent
+from .serializers import isoformat_utc
+
+
+class InvalidCursor(ValueError):
+    """Cursor konnte nicht dekodiert werden"""
+
+
+def encode_cursor(received_at: datetime, event_id: int) -> str:
+    """Opaquer Cursor für die nächste Seite"""
+    raw = f"{received_at.isoformat()}|{event_id}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, _, event_id = base64.urlsafe_b64decode(padded).decode("ascii").partition("|")
+        return datetime.fromisoformat(timestamp), int(event_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+
+def event_to_dict(event: WebhookEvent) -> Dict:
+    return {
+        "id": event.id,
+        "symbol": event.symbol,
+        "type": event.type,
+        "timeframe": event.timeframe,
+        "indicator": event.indicator,
+        "value": event.value,
+        "received_at": isoformat_utc(event.received_at)
+    }
+
+
+def query_history(
+    db: Session,
+    symbol: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    descending: bool = False,
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Liest eine Seite aus dem Webhook-Log.
+
+    Args:
+        symbol: Nur dieses Symbol (nutzt den Index (symbol, received_at))
+        start: Inklusive Untergrenze für received_at
+        end: Exklusive Obergrenze für received_at
+        limit: Max. Anzahl Events
+        cursor: next_cursor der vorherigen Seite
+        descending: Neueste zuerst
+
+    Returns:
+        (Events, next_cursor oder None wenn keine weiteren Daten)
+    """
+
+    query = db.query(WebhookEvent)
+
+    if symbol:
+        query = query.filter(WebhookEvent.symbol == symbol)
+    if start:
+        query = query.filter(WebhookEvent.received_at >= start)
+    if end:
+        query = query.filter(WebhookEvent.received_at < end)
+
+    key = tuple_(WebhookEvent.received_at, WebhookEvent.id)
+    if cursor:
+        position = decode_cursor(cursor)
+        query = query.filter(key < position if descending else key > position)
+
+    if descending:
+        query = query.order_by(WebhookEvent.received_at.desc(), WebhookEvent.id.desc())
+    else:
+        query = query.order_by(WebhookEvent.received_at, WebhookEvent.id)
+
+    # Eine Zeile mehr lesen, um zu wissen ob es eine nächste Seite gibt
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = encode_cursor(rows[-1].received_at, rows[-1].id) if has_more else None
+    return [event_to_dict(row) for row in rows], next_cursor
@@ -0,0 +1,146 @@
+"""
+Indikator-Stände pro (Symbol, Timeframe, Indikator) als kleine Integer-Enums
+
+Statt fester Spalten (trend_1w/trend_3d/trend_1d, trend_1m/macd_1m) gibt es:
+    - in der DB: indicator_states, eine Zeile pro (Symbol, Timeframe, Indikator)
+      mit dem Wert als SmallInteger (VALUES) - neue Timeframes brauchen
+      keine Schema-Migration
+    - im Speicher: pro Coin/Macro ein bytearray, Index = Slot aus dem
+      globalen SlotRegistry (ein Byte pro Stand, Lesen ist ein Index-Zugriff)
+
+Timeframes werden normalisiert ("7d" -> "1w", "24h" -> "1d"); alles andere
+(4h, 12h, 1m, ...) bekommt einen eigenen Slot statt trend_1d zu überschreiben.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+# Wert-Codes: Position im Tuple; nur anhängen, nie umsortieren (stehen so in der DB)
+VALUES = (None, "uptrend", "downtrend", "bullish", "bearish")
+VALUE_CODES = {value: code for code, value in enumerate(VALUES)}
+
+# Synonyme aus TradingView-Alerts -> kanonischer Timeframe
+TIMEFRAME_ALIASES = {"7d": "1w", "24h": "1d"}
+# Macro-Alerts haben keinen Timeframe im Text ("MACRO 1M ...")
+MACRO_TIMEFRAME = "1m"
+
+# Alte Spalten -> (Timeframe, Indikator); Migration und Attribut-Namen der Records
+COIN_COLUMNS = {
+    "trend_1w": ("1w", "trend"),
+    "trend_3d": ("3d", "trend"),
+    "trend_1d": ("1d", "trend"),
+}
+MACRO_COLUMNS = {
+    "trend_1m": (MACRO_TIMEFRAME, "trend"),
+    "macd_1m": (MACRO_TIMEFRAME, "macd"),
+}
+# Macro-Default wie früher in den Spalten von macro_states
+MACRO_DEFAULT = "bearish"
+
+IndicatorKey = Tuple[str, str]     # (Timeframe, Indikator)
+
+
+def normalize_timeframe(timeframe: str) -> str:
+    """Kanonischer Timeframe ("7D" -> "1w", "4H" -> "4h")"""
+    timeframe = timeframe.lower()
+    return TIMEFRAME_ALIASES.get(timeframe, timeframe)
+
+
+def timeframe_aliases(timeframe: str) -> Tuple[str, ...]:
+    """Alle Schreibweisen eines kanonischen Timeframes (für Abfragen auf webhook_events)"""
+    return (timeframe,) + tuple(alias for alias, target in TIMEFRAME_ALIASES.items() if target == timeframe)
+
+
+def is_indicator(key) -> bool:
+    """Update-Feld für indicator_states ((Timeframe, Indikator)) statt einer Spalte"""
+    return type(key) is tuple
+
+
+def encode_value(value: Optional[str]) -> int:
+    return VALUE_CODES[value]
+
+
+def decode_value(code: int) -> Optional[str]:
+    return VALUES[code]
+
+
+class SlotRegistry:
+    """
+    (Timeframe, Indikator) -> Index in den bytearrays der Records.
+    Wächst bei neuen Timeframes; Slots werden nie entfernt oder verschoben.
+    """
+
+    def __init__(self):
+        self._slots: Dict[IndicatorKey, int] = {}
+        self.keys: List[IndicatorKey] = []
+        # Bekannte Spalten zuerst: gleiche Reihenfolge in jedem Prozess
+        for key in list(COIN_COLUMNS.values()) + list(MACRO_COLUMNS.values()):
+            self.slot(key)
+
+    def slot(self, key: IndicatorKey) -> int:
+        index = self._slots.get(key)
+        if index is None:
+            index = self._slots[key] = len(self.keys)
+            self.keys.append(key)
+        return index
+
+    def find(self, key: IndicatorKey) -> Optional[int]:
+        return self._slots.get(key)
+
+
+slots = SlotRegistry()
+
+
+class IndicatorValues:
+    """
+    Mixin für CoinRecord/MacroRecord: Stände im bytearray "values".
+    Die alten Spaltennamen (trend_1w, macd_1m, ...) bleiben als Properties lesbar.
+    """
+
+    __slots__ = ()
+
+    def get(self, key: IndicatorKey) -> Optional[str]:
+        index = slots.find(key)
+        if index is None or index >= len(self.values):
+            return None
+        return VALUES[self.values[index]]
+
+    def set(self, key: IndicatorKey, value: Optional[str]):
+        self.set_code(key, VALUE_CODES[value])
+
+    def set_code(self, key: IndicatorKey, code: int):
+        index = slots.slot(key)
+        values = self.values
+        if index >= len(values):
+            values.extend(bytes(index + 1 - len(values)))
+        values[index] = code
+
+    def assign(self, fields: Dict):
+        """Felder eines Updates: (Timeframe, Indikator) in values, sonst Attribut"""
+        for key, value in fields.items():
+            if is_indicator(key):
+                self.set(key, value)
+            else:
+                setattr(self, key, value)
+
+    def indicator(self, indicator: str) -> Dict[str, Optional[str]]:
+        """Timeframe -> Wert für alle gesetzten Slots eines Indikators"""
+        values = self.values
+        return {
+            timeframe: VALUES[values[index]]
+            for index, (timeframe, name) in enumerate(slots.keys[:len(values)])
+            if name == indicator and values[index]
+        }
+
+
+def _column_property(key: IndicatorKey, default: Optional[str] = None):
+    def getter(self):
+        value = self.get(key)
+        return default if value is None else value
+    return property(getter)
+
+
+def install_columns(cls, columns: Dict[str, IndicatorKey], default: Optional[str] = None):
+    """Alte Spaltennamen als Properties auf einer Record-Klasse"""
+    for name, key in columns.items():
+        setattr(cls, name, _column_property(key, default))
+    return cls
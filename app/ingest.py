@@ -0,0 +1,355 @@
+"""
+Webhook-Ingestion über einen dedizierten Writer-Thread (Write-Behind)
+Alle Schreibzugriffe auf die States laufen in genau einem Thread hinter einer Queue.
+receive_webhook aktualisiert den In-Memory State (app/state.py), reiht das
+Update für die Persistenz ein und antwortet sofort.
+
+Der Writer sammelt Updates bis INGEST_FLUSH_INTERVAL_MS vergangen sind oder
+INGEST_MAX_BATCH Updates anliegen, fasst Updates auf dasselbe Symbol und
+Feld zusammen (späterer Alert gewinnt) und schreibt alles per Bulk-Upsert
+(app/storage.py) in einer Transaktion - ein fsync pro Burst statt pro
+Alert. Jeder einzelne Alert landet zusätzlich (nicht zusammengefasst) im
+Append-only Log webhook_events.
+"""
+
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import logging
+import os
+import queue
+import threading
+import time
+
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal, CoinState, MacroState, IndicatorState, INDICATOR_KEYS, WebhookEvent, storage
+from .indicators import MACRO_TIMEFRAME, encode_value, is_indicator, normalize_timeframe
+from . import metrics
+from .serializers import isoformat_utc
+
+logger = logging.getLogger(__name__)
+
+# Wie lange der Writer nach dem ersten Update auf weitere wartet
+FLUSH_INTERVAL = int(os.environ.get("INGEST_FLUSH_INTERVAL_MS", "20")) / 1000.0
+# Max. Updates pro Transaktion
+MAX_BATCH = int(os.environ.get("INGEST_MAX_BATCH", "500"))
+# Versuche pro Batch, falls SQLite gesperrt ist
+FLUSH_RETRIES = 3
+
+_STOP = object()
+
+
+class Update(NamedTuple):
+    """Ein einzelner Webhook als Feld-Änderungen an einer Zeile"""
+    kind: str                   # "coin" / "macro"
+    symbol: str
+    fields: Dict                # Spalte bzw. (Timeframe, Indikator) -> neuer Wert
+    received_at: datetime
+    message: str                # Beschreibung für Response und Log
+    parsed: Dict                # Original von parse_webhook (für die Historie)
+    seq: int = 0                # Sequenz im Cluster-Modus (app/cluster.py), sonst 0
+
+
+def display_name_for(symbol: str) -> str:
+    """Anzeigename für automatisch angelegte Coins ("HYPEUSDT.P" -> "HYPE")"""
+    return symbol.replace("USDT.P", "").replace("USDT", "")
+
+
+def build_update(parsed: Dict, received_at: Optional[datetime] = None) -> Update:
+    """
+    Übersetzt einen geparsten Webhook in Spalten-Änderungen.
+    Reine Funktion, kein Datenbank-Zugriff.
+
+    Args:
+        parsed: Ergebnis von parse_webhook
+        received_at: Empfangszeitpunkt (Default: jetzt)
+
+    Returns:
+        Update für den Writer
+    """
+
+    now = received_at or datetime.utcnow()
+    value = parsed["value"]
+
+    if parsed["type"] == "macro":
+        # Macro Update (BTC, USDT.D, TOTAL, etc.)
+        indicator = parsed["indicator"]
+        return Update(
+            "macro", parsed["symbol"], {(MACRO_TIMEFRAME, indicator): value}, now,
+            f"Macro {parsed['symbol']} updated: {indicator}_{MACRO_TIMEFRAME} = {value}", parsed
+        )
+
+    if parsed["type"] == "signal":
+        # Signal Update (Buy/Sell)
+        return Update(
+            "coin", parsed["symbol"],
+            {"last_signal_type": value, "last_signal_time": now}, now,
+            f"{parsed['symbol']} updated: signal = {value}", parsed
+        )
+
+    # Trend Update: eigener Stand pro Timeframe ("7d" -> "1w", "4h" bleibt "4h")
+    timeframe = normalize_timeframe(parsed["timeframe"])
+    note = "" if timeframe == parsed["timeframe"] else f" (from {parsed['timeframe']})"
+
+    return Update(
+        "coin", parsed["symbol"], {(timeframe, "trend"): value}, now,
+        f"{parsed['symbol']} updated: trend_{timeframe} = {value}{note}", parsed
+    )
+
+
+def update_target(update: Update) -> Tuple:
+    """
+    Fachliches Ziel eines Updates für Dedup: (Timeframe, Indikator).
+    Signale schreiben nur last_signal_*, sind aber pro Timeframe eigene Alerts.
+    """
+    if update.parsed["type"] == "signal":
+        return normalize_timeframe(update.parsed["timeframe"]), "signal"
+    return next(iter(update.fields))
+
+
+def coalesce(updates: List[Update]) -> Dict[Tuple[str, str], Dict]:
+    """
+    Fasst Updates pro (Typ, Symbol) zusammen.
+    Die Reihenfolge der Queue bleibt erhalten: spätere Werte überschreiben frühere.
+    """
+    merged: Dict[Tuple[str, str], Dict] = {}
+    for update in updates:
+        fields = merged.setdefault((update.kind, update.symbol), {})
+        fields.update(update.fields)
+        fields["last_updated"] = update.received_at
+    return merged
+
+
+def history_row(update: Update) -> Dict:
+    """Zeile für webhook_events aus einem Update"""
+    parsed = update.parsed
+    return {
+        "symbol": update.symbol,
+        "type": parsed["type"],
+        "timeframe": "1m" if parsed["type"] == "macro" else parsed.get("timeframe"),
+        "indicator": parsed.get("indicator"),
+        "value": parsed["value"],
+        "received_at": update.received_at
+    }
+
+
+def upsert_rows(merged: Dict[Tuple[str, str], Dict]) -> Dict[Tuple[str, Tuple[str, ...]], List[Dict]]:
+    """
+    Zeilen für die Upserts von coin_states/macro_states, gruppiert nach
+    (Typ, geänderte Spalten). Ein mehrzeiliges INSERT braucht überall
+    dieselben Spalten; neue Zeilen bekommen Anzeigename und created_at.
+    Indikator-Felder gehen separat nach indicator_states (indicator_rows).
+    """
+    groups: Dict[Tuple[str, Tuple[str, ...]], List[Dict]] = {}
+    for (kind, symbol), fields in merged.items():
+        columns = {key: value for key, value in fields.items() if not is_indicator(key)}
+        row = {"symbol": symbol, "created_at": fields["last_updated"], **columns}
+        row["display_name"] = symbol if kind == "macro" else display_name_for(symbol)
+        groups.setdefault((kind, tuple(sorted(columns))), []).append(row)
+    return groups
+
+
+def indicator_rows(merged: Dict[Tuple[str, str], Dict]) -> List[Dict]:
+    """Eine Zeile pro geändertem (Typ, Symbol, Timeframe, Indikator), Wert als Code"""
+    return [
+        {"kind": kind, "symbol": symbol, "timeframe": key[0], "indicator": key[1],
+         "value": encode_value(value), "updated_at": fields["last_updated"]}
+        for (kind, symbol), fields in merged.items()
+        for key, value in fields.items()
+        if is_indicator(key)
+    ]
+
+
+def write_updates(db: Session, updates: List[Update], history: bool = True):
+    """
+    Schreibt einen Batch ohne Commit (Writer-Thread und app/replay.py).
+    States per ON CONFLICT DO UPDATE (ein Statement pro Spalten-Kombination,
+    eins für alle Indikator-Stände, kein vorheriges SELECT), die Historie
+    als executemany.
+    """
+    merged = coalesce(updates)
+    for (kind, columns), rows in upsert_rows(merged).items():
+        table = MacroState if kind == "macro" else CoinState
+        # Bei bestehenden Zeilen nur die geänderten Spalten überschreiben
+        storage.upsert(db, table, rows, update=columns)
+    indicators = indicator_rows(merged)
+    if indicators:
+        storage.upsert(db, IndicatorState, indicators, keys=INDICATOR_KEYS, update=("value", "updated_at"))
+
+    if history:
+        # Historie: jeder Alert einzeln, als executemany in derselben Transaktion
+        # (Core-Insert auf die Tabelle, ohne den ORM-Bulk-Pfad)
+        db.execute(insert(WebhookEvent.__table__), [history_row(update) for update in updates])
+
+
+def flush_updates(db: Session, updates: List[Update]):
+    """Schreibt einen Batch in einer Transaktion (mit Metriken)"""
+
+    started = time.perf_counter()
+    write_updates(db, updates)
+
+    committing = time.perf_counter()
+    db.commit()
+    finished = time.perf_counter()
+
+    metrics.db_query_seconds.observe(committing - started)
+    metrics.db_commit_seconds.observe(finished - committing)
+    metrics.writer_batch_size.observe(len(updates))
+
+
+class WebhookWriter:
+    """
+    Single-Writer mit Group Commit: ein Thread mit eigener Session
+    arbeitet die Queue in Batches ab. SQLite erlaubt ohnehin nur einen
+    Schreiber, so gibt es keine Lock-Konflikte zwischen parallelen Webhooks.
+    """
+
+    def __init__(self, session_factory=SessionLocal, flush_interval: float = FLUSH_INTERVAL,
+                 max_batch: int = MAX_BATCH):
+        self._session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue: "queue.Queue" = queue.Queue()
+        # Eingereihte Updates (nicht Queue-Einträge: submit_many legt eine Liste ab)
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        # Für /health (nur vom Writer-Thread geschrieben)
+        self.last_flush_at: Optional[datetime] = None
+        self.flushed_updates = 0
+        self.consecutive_failures = 0
+        # Höchste Cluster-Sequenz, die abgearbeitet ist (Checkpoint für andere Worker)
+        self.committed_seq = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Eingereihte, noch nicht abgeholte Updates"""
+        return self._pending
+
+    def _put(self, item, count: int):
+        with self._pending_lock:
+            self._pending += count
+        self._queue.put(item)
+
+    def _taken(self, item):
+        """Nach jedem get() im Writer-Thread"""
+        if item is _STOP:
+            return
+        with self._pending_lock:
+            self._pending -= len(item) if isinstance(item, list) else 1
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def start(self):
+        """Startet den Writer-Thread"""
+        if self.is_running:
+            return
+        self._thread = threading.Thread(target=self._run, name="webhook-writer", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"✅ Webhook-Writer gestartet (flush {self.flush_interval * 1000:.0f}ms, "
+            f"max batch {self.max_batch})"
+        )
+
+    def stop(self, timeout: float = 10.0):
+        """Schreibt alle eingereihten Updates und beendet dann den Thread"""
+        if not self._thread:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def stats(self) -> Dict:
+        return {
+            "running": self.is_running,
+            "queue_depth": self.queue_depth,
+            "last_flush_at": isoformat_utc(self.last_flush_at),
+            "flushed_updates": self.flushed_updates,
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+    def submit(self, update: Update):
+        """Reiht ein Update ein, ohne auf den Commit zu warten"""
+        if not self._thread:
+            raise RuntimeError("Webhook-Writer ist nicht gestartet")
+        self._put(update, 1)
+
+    def submit_many(self, updates: List[Update]):
+        """
+        Reiht mehrere Updates als Einheit ein (/webhook/batch).
+        Sie landen immer gemeinsam in einer Transaktion, auch wenn das
+        mehr als max_batch sind.
+        """
+        if not self._thread:
+            raise RuntimeError("Webhook-Writer ist nicht gestartet")
+        if updates:
+            self._put(list(updates), len(updates))
+
+    def _collect(self, first) -> Tuple[List[Update], bool]:
+        """Sammelt Updates bis Flush-Intervall oder Max-Batch erreicht sind"""
+        batch = list(first) if isinstance(first, list) else [first]
+        deadline = time.monotonic() + self.flush_interval
+
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._taken(item)
+            if item is _STOP:
+                return batch, True
+            if isinstance(item, list):
+                batch.extend(item)
+            else:
+                batch.append(item)
+
+        return batch, False
+
+    def _flush(self, db: Session, batch: List[Update]):
+        for attempt in range(1, FLUSH_RETRIES + 1):
+            try:
+                flush_updates(db, batch)
+                break
+            except OperationalError as e:
+                db.rollback()
+                if attempt == FLUSH_RETRIES:
+                    metrics.writer_failures.inc()
+                    self.consecutive_failures += 1
+                    logger.error("❌ Database error, %d Updates verworfen: %s", len(batch), e)
+                    return
+                logger.warning("⚠️ Flush fehlgeschlagen (Versuch %d), neuer Versuch: %s", attempt, e)
+                time.sleep(0.05 * attempt)
+            except Exception as e:
+                db.rollback()
+                metrics.writer_failures.inc()
+                self.consecutive_failures += 1
+                logger.error("❌ Database error, %d Updates verworfen: %s", len(batch), e)
+                return
+
+        self.last_flush_at = datetime.utcnow()
+        self.flushed_updates += len(batch)
+        self.consecutive_failures = 0
+        self.committed_seq = max(self.committed_seq, batch[-1].seq)
+        logger.info("✅ %d Updates in einer Transaktion geschrieben", len(batch), extra={"category": "flush"})
+
+    def _run(self):
+        db = self._session_factory()
+        try:
+            stopping = False
+            while not stopping:
+                item = self._queue.get()
+                self._taken(item)
+                if item is _STOP:
+                    break
+                batch, stopping = self._collect(item)
+                self._flush(db, batch)
+        finally:
+            db.close()
+
+
+writer = WebhookWriter()
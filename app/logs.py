@@ -0,0 +1,193 @@
+"""
+Logging-Setup: Ausgabe in einem eigenen Thread, optional JSON und Sampling
+
+Statt logging.basicConfig auf dem Request-Thread:
+    - QueueHandler -> QueueListener: der Event-Loop und der Webhook-Writer
+      legen nur den LogRecord in eine Queue; Formatieren (lazy %-Argumente)
+      und das Schreiben nach stderr passieren im Listener-Thread
+    - LOG_FORMAT=json: eine JSON-Zeile pro Record mit allen extra-Feldern
+      (z.B. category, symbol) für Log-Aggregatoren
+    - LOG_SAMPLE="webhook=100,flush=10": von wiederkehrenden Erfolgszeilen
+      einer Kategorie (extra={"category": ...}) nur jede N-te ausgeben.
+      Warnungen und Fehler (auch ungültige Webhooks) werden nie gesampelt
+      und nie verworfen.
+
+Ist die Queue voll (LOG_QUEUE_SIZE), werden INFO/DEBUG-Records gezählt und
+verworfen; ab WARNING wartet der Aufrufer, bis wieder Platz ist.
+Argumente werden erst im Listener formatiert: nur unveränderliche Werte
+(Strings, Zahlen) als %-Argumente übergeben.
+"""
+
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+import atexit
+import json
+import logging
+import os
+import queue
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson ist optional
+    orjson = None
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")          # "text" / "json"
+LOG_QUEUE = os.environ.get("LOG_QUEUE", "1") != "0"
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+# Kategorie=N: nur jede N-te INFO/DEBUG-Zeile dieser Kategorie
+LOG_SAMPLE = os.environ.get("LOG_SAMPLE", "")
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+# Attribute jedes LogRecords; alles andere kam über extra= und landet im JSON
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+def parse_sample_rates(spec: str) -> Dict[str, int]:
+    """ "webhook=100,flush=10" -> {"webhook": 100, "flush": 10} """
+    rates = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        category, _, rate = item.partition("=")
+        rates[category.strip()] = max(int(rate), 1)
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Lässt pro Kategorie nur jede N-te INFO/DEBUG-Zeile durch (die erste immer).
+    Läuft im aufrufenden Thread, gesampelte Records kosten also nur einen Zähler.
+    """
+
+    def __init__(self, rates: Dict[str, int]):
+        super().__init__()
+        self.rates = rates
+        self.seen: Dict[str, int] = {}
+        self.suppressed: Dict[str, int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        category = getattr(record, "category", None)
+        rate = self.rates.get(category, 1) if category else 1
+        if rate == 1:
+            return True
+        count = self.seen.get(category, 0)
+        self.seen[category] = count + 1
+        if count % rate:
+            self.suppressed[category] = self.suppressed.get(category, 0) + 1
+            return False
+        record.sample_rate = rate
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Eine JSON-Zeile pro Record: ts, level, logger, msg plus extra-Felder"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds")[:-6] + "Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        if orjson is not None:
+            return orjson.dumps(entry, default=str).decode("utf-8")
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler ohne Formatieren im aufrufenden Thread.
+    Der Standard-QueueHandler baut die Nachricht schon in prepare() (für
+    Queues über Prozessgrenzen); hier bleibt der Record unverändert.
+    """
+
+    def __init__(self, log_queue: "queue.Queue"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        if record.levelno >= logging.WARNING:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(QueueListener):
+    """QueueListener, dessen stop() auch bei voller Queue wartet statt zu scheitern"""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class LogSetup:
+    """Konfiguriert den Root-Logger einmal pro Prozess"""
+
+    def __init__(self):
+        self.listener: Optional[QueueListener] = None
+        self.queue_handler: Optional[DeferredQueueHandler] = None
+        self.sampling: Optional[SamplingFilter] = None
+
+    def configure(self, level: str = LOG_LEVEL, fmt: str = LOG_FORMAT, use_queue: bool = LOG_QUEUE,
+                  sample: str = LOG_SAMPLE, stream=None):
+        """Wie basicConfig: ohne Wirkung, wenn der Root-Logger schon Handler hat"""
+        root = logging.getLogger()
+        if root.handlers:
+            return
+        output = logging.StreamHandler(stream)
+        output.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+        handler: logging.Handler = output
+        if use_queue:
+            handler = self.queue_handler = DeferredQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+            self.listener = _Listener(handler.queue, output, respect_handler_level=True)
+            self.listener.start()
+            # Beim Beenden alles noch ausstehende schreiben
+            atexit.register(self.stop)
+
+        # Kein Format nutzt Aufrufer, Thread oder Prozess: die Suche nach
+        # dem Stack-Frame ist der teuerste Teil eines LogRecords
+        logging._srcfile = None
+        logging.logThreads = False
+        logging.logProcesses = False
+        logging.logMultiprocessing = False
+
+        rates = parse_sample_rates(sample)
+        if rates:
+            self.sampling = SamplingFilter(rates)
+            handler.addFilter(self.sampling)
+        root.addHandler(handler)
+        root.setLevel(level)
+
+    def stop(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    @property
+    def dropped(self) -> int:
+        return self.queue_handler.dropped if self.queue_handler else 0
+
+    @property
+    def suppressed(self) -> Dict[str, int]:
+        return dict(self.sampling.suppressed) if self.sampling else {}
+
+
+logs = LogSetup()
@@ -5,23 +5,34 @@ Version 2.0 - Mit Macro Dashboard
 """
 
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
 from contextlib import asynccontextmanager
 import logging
-import os
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+from .logs import logs
+from .metrics import METRICS_ENABLED, MetricsMiddleware
+
+# Log-Ausgabe im eigenen Thread, optional JSON und Sampling (app/logs.py)
+logs.configure()
 logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    from .database import init_db
-    init_db()
-    logger.info("✅ Database initialized")
+    from .cluster import cluster
+    from .health import heartbeat
+    from .ingest import writer
+    from .retention import retention
+    from .startup import startup
+    # Schema, State und statische Dateien im Hintergrund (app/startup.py);
+    # Webhooks werden bis dahin angenommen und eingereiht
+    startup.begin()
     yield
     logger.info("👋 Shutting down")
+    await startup.stop()
+    heartbeat.stop()
+    retention.stop()
+    writer.stop()
+    await cluster.stop()
 
 
 app = FastAPI(
@@ -31,31 +42,13 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-# Static directory
-static_dir = os.path.join(os.path.dirname(__file__), "..", "static")
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 # Import API routes
 from .api import router
 app.include_router(router)
 
-
-@app.get("/")
-async def root():
-    """Serve the dashboard"""
-    index_path = os.path.join(static_dir, "index.html")
-    if os.path.exists(index_path):
-        return FileResponse(index_path)
-    return {"message": "Dashboard not found"}
-
-
-@app.get("/{path:path}")
-async def static_files(path: str):
-    """Serve static files"""
-    file_path = os.path.join(static_dir, path)
-    if os.path.exists(file_path) and os.path.isfile(file_path):
-        return FileResponse(file_path)
-    # Fallback to index.html for SPA routing
-    index_path = os.path.join(static_dir, "index.html")
-    if os.path.exists(index_path):
-        return FileResponse(index_path)
-    return {"message": "Not found"}
+# Statische Dateien (Dashboard, React-Build) aus dem Speicher; muss als letztes gemountet werden
+from .assets import assets
+app.mount("/", assets, name="static")
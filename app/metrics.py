@@ -0,0 +1,243 @@
+"""
+Prometheus-Metriken im Text-Format (GET /metrics), ohne externe Abhängigkeit
+
+Lock-light: jede Metrik wird nur aus genau einem Thread geschrieben
+(HTTP-Metriken und Webhook-Zähler im Event-Loop, DB-Zeiten im
+Webhook-Writer). Ein Increment ist damit ein Dict-Lookup plus eine
+Addition ohne Lock. /metrics liest die Werte ohne Synchronisation; ein
+Scrape kann daher minimal "zwischen" zwei Updates liegen.
+
+Queue-Tiefen und Cache-Trefferquoten werden erst beim Scrape über
+Callbacks gelesen und kosten im Hot Path nichts.
+"""
+
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+import os
+import time
+
+from starlette.routing import Mount
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") != "0"
+
+# Sekunden; fein im Bereich weniger Millisekunden (typische Webhook-Latenz)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+PARSE_BUCKETS = (0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001)
+BATCH_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+def _labels(names: Sequence[str], values: Tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+def _number(value) -> str:
+    if isinstance(value, float):
+        if value == float("inf"):
+            return "+Inf"
+        return repr(value)
+    return str(value)
+
+
+class Counter:
+    """Monoton steigender Zähler mit optionalen Labels"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_labels(self.label_names, labels)} {_number(value)}"
+            for labels, value in sorted(self._values.items())
+        ]
+
+
+class Histogram:
+    """Histogramm mit festen Buckets (kumulativ erst beim Rendern)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        # Labels -> [Zähler pro Bucket inkl. +Inf, Summe, Anzahl]
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def samples(self) -> List[str]:
+        lines = []
+        bucket_names = self.label_names + ("le",)
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                lines.append(
+                    f"{self.name}_bucket{_labels(bucket_names, labels + (_number(float(bound)),))} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+class CallbackMetric:
+    """Wert wird erst beim Scrape abgefragt (Queue-Tiefen, Cache-Statistiken)"""
+
+    def __init__(self, name: str, help_text: str, callback: Callable[[], Dict[Tuple, float]],
+                 labels: Sequence[str] = (), kind: str = "gauge"):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.label_names = tuple(labels)
+        self._callback = callback
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_labels(self.label_names, labels)} {_number(value)}"
+            for labels, value in sorted(self._callback().items())
+        ]
+
+
+def _disabled(*args, **kwargs):
+    pass
+
+
+if not METRICS_ENABLED:
+    # METRICS_ENABLED=0: Aufrufe im Hot Path werden zu No-ops (Vergleichsbasis für bench.metrics_overhead)
+    Counter.inc = _disabled
+    Histogram.observe = _disabled
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labels, buckets))
+
+    def callback(self, name: str, help_text: str, callback, labels: Sequence[str] = (),
+                 kind: str = "gauge") -> CallbackMetric:
+        return self.register(CallbackMetric(name, help_text, callback, labels, kind))
+
+    def render(self) -> str:
+        """Text Exposition Format 0.0.4"""
+        lines = []
+        for metric in self._metrics:
+            samples = metric.samples()
+            if not samples:
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# ===== HTTP (Event-Loop) =====
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+http_latency = registry.histogram(
+    "http_request_duration_seconds", "Time until the response starts, by route", ("method", "route"))
+
+# ===== Webhooks (Event-Loop) =====
+webhooks = registry.counter(
+    "webhooks_total", "Webhook messages by type and outcome", ("type", "outcome"))
+parse_seconds = registry.histogram(
+    "webhook_parse_seconds", "Time spent in parse_webhook", buckets=PARSE_BUCKETS)
+
+# ===== Datenbank (Webhook-Writer Thread) =====
+db_query_seconds = registry.histogram(
+    "db_query_seconds", "Writer time for statements of one flush (before commit)")
+db_commit_seconds = registry.histogram(
+    "db_commit_seconds", "Writer time for the commit of one flush")
+writer_batch_size = registry.histogram(
+    "writer_batch_size", "Updates per writer transaction", buckets=BATCH_BUCKETS)
+writer_failures = registry.counter(
+    "writer_failed_flushes_total", "Flushes that failed after all retries")
+
+
+def observe_request(method: str, route: str, status: int, seconds: float):
+    http_requests.inc(method, route, status)
+    http_latency.observe(seconds, method, route)
+
+
+class MetricsMiddleware:
+    """
+    Reine ASGI-Middleware (kein BaseHTTPMiddleware, kein Task pro Request).
+    Misst die Zeit bis http.response.start; bei /api/stream ist das die
+    Zeit bis der Stream steht, nicht die Verbindungsdauer.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes: Dict[object, str] = {}
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        route = self._routes.get(endpoint)
+        if route is None:
+            route = "unmatched"
+            for candidate in scope["app"].router.routes:
+                if getattr(candidate, "endpoint", None) is endpoint:
+                    route = candidate.path
+                    break
+                if isinstance(candidate, Mount) and candidate.app is endpoint:
+                    route = candidate.path + "/{path:path}"
+                    break
+            self._routes[endpoint] = route
+        return route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                observe_request(scope["method"], self._route(scope), message["status"],
+                                time.perf_counter() - started)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
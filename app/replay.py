@@ -0,0 +1,285 @@
+"""
+Replay / Backfill von Alerts direkt in die Datenbank (ohne HTTP)
+
+Zum Wiederherstellen einer Instanz oder nach einer Migration: statt jeden
+Alert einzeln per curl zu schicken (test_webhooks.sh), wird ein Export
+gestreamt, durch parse_webhook geschickt und in großen Transaktionen
+über denselben Schreibpfad wie der Webhook-Writer geschrieben
+(app/ingest.write_updates: Upserts plus webhook_events).
+
+Eingabeformate (Endung oder --format, jeweils optional .gz):
+    .txt            eine Nachricht pro Zeile ("HYPEUSDT.P, 1W - UPTREND")
+    .ndjson/.jsonl  pro Zeile {"message": "...", "received_at": "..."},
+                    ein JSON-String, oder ein Event aus /api/history
+                    ({"symbol", "type", "timeframe", "indicator", "value", "received_at"})
+    .csv            Kopfzeile mit "message" und optional "received_at"
+                    oder den Spalten eines /api/history Events
+
+Ohne received_at zählt der Zeitpunkt des Einlesens. Die Reihenfolge der
+Datei ist die Reihenfolge der Anwendung (spätere Alerts gewinnen).
+
+Checkpoints: die Position in der Quelle wird in replay_checkpoints in
+derselben Transaktion wie die Daten gespeichert. Ein abgebrochener Lauf
+setzt beim nächsten Start genau dort fort (--restart beginnt von vorn).
+
+Der Server lädt den State nur beim Start: Replay bei gestopptem Server
+laufen lassen oder ihn danach neu starten.
+
+Usage:
+    python -m app.replay alerts.ndjson.gz
+    python -m app.replay export.csv --batch-size 20000 --no-history
+    python -m app.replay alerts.txt --dry-run
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+import argparse
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import sys
+import time
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover - orjson ist optional
+    _loads = json.loads
+
+logger = logging.getLogger("app.replay")
+
+FORMATS = ("txt", "ndjson", "csv")
+# Fortschritt auf stderr höchstens so oft
+PROGRESS_INTERVAL = 5.0
+
+# Ein Datensatz der Quelle: (Nachricht oder None, received_at oder None)
+Record = Tuple[Optional[str], Optional[datetime]]
+
+
+def detect_format(path: str) -> str:
+    name = path[:-3] if path.endswith(".gz") else path
+    extension = os.path.splitext(name)[1].lstrip(".").lower()
+    if extension in ("ndjson", "jsonl", "json"):
+        return "ndjson"
+    if extension == "csv":
+        return "csv"
+    return "txt"
+
+
+def open_text(path: str):
+    """Textstream, bei .gz transparent entpackt ("-" = stdin)"""
+    if path == "-":
+        return io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", errors="replace")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, "r", encoding="utf-8", errors="replace", newline="")
+
+
+def parse_time(value: Optional[str]) -> Optional[datetime]:
+    """ISO 8601 (mit "Z" oder Offset) -> naive UTC wie in der DB; ungültig -> None"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        if value.endswith("Z"):
+            # Häufigster Fall (Exporte dieser App): schon UTC
+            return datetime.fromisoformat(value[:-1])
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def message_from_event(event: Dict) -> Optional[str]:
+    """Alert-Text aus einem /api/history Event (Umkehrung von parse_webhook)"""
+    symbol, kind, value = event.get("symbol"), event.get("type"), event.get("value")
+    if not symbol or not kind or not value:
+        return None
+    if kind == "macro":
+        return f"{symbol} MACRO 1M {str(event.get('indicator') or 'trend').upper()} - {value.upper()}"
+    timeframe = str(event.get("timeframe") or "1d").upper()
+    if kind == "signal":
+        return f"{symbol}, {timeframe} - {value.capitalize()} Signal"
+    return f"{symbol}, {timeframe} - {value.upper()}"
+
+
+def _record_from_mapping(item: Dict) -> Record:
+    message = item.get("message")
+    if not isinstance(message, str):
+        message = message_from_event(item)
+    return message, parse_time(item.get("received_at"))
+
+
+def iter_records(stream, fmt: str, skip: int = 0) -> Iterator[Record]:
+    """
+    Datensätze der Quelle, gestreamt (Speicher unabhängig von der Dateigröße).
+    Die ersten skip Datensätze werden nur gezählt, nicht geparst (Fortsetzen).
+    """
+    if fmt == "csv":
+        for number, row in enumerate(csv.DictReader(stream)):
+            if number >= skip:
+                yield _record_from_mapping(row)
+        return
+    number = 0
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        number += 1
+        if number <= skip:
+            continue
+        if fmt == "ndjson" or line[:1] in ("{", '"'):
+            try:
+                item = _loads(line)
+            except ValueError:
+                yield None, None
+                continue
+            if isinstance(item, str):
+                yield item, None
+            elif isinstance(item, dict):
+                yield _record_from_mapping(item)
+            else:
+                yield None, None
+        else:
+            yield line, None
+
+
+class Replay:
+    """Ein Replay-Lauf: lesen, parsen, in Batches schreiben, Checkpoint mitschreiben"""
+
+    def __init__(self, source: str, fmt: str, checkpoint: str, batch_size: int,
+                 history: bool = True, dry_run: bool = False, limit: Optional[int] = None):
+        self.source = source
+        self.fmt = fmt
+        self.checkpoint = checkpoint
+        self.batch_size = batch_size
+        self.history = history
+        self.dry_run = dry_run
+        self.limit = limit
+        self.stats = {"read": 0, "skipped": 0, "applied": 0, "invalid": 0, "batches": 0,
+                      "by_type": {"trend": 0, "signal": 0, "macro": 0}}
+
+    def _resume_position(self, db) -> Tuple[int, int]:
+        from .database import ReplayCheckpoint
+        row = db.get(ReplayCheckpoint, self.checkpoint)
+        return (row.position, row.applied) if row else (0, 0)
+
+    def _commit(self, db, batch: List, position: int, applied: int):
+        from .database import ReplayCheckpoint, storage
+        from .ingest import write_updates
+        if batch:
+            write_updates(db, batch, history=self.history)
+        storage.upsert(db, ReplayCheckpoint, [{
+            "source": self.checkpoint, "position": position, "applied": applied,
+            "updated_at": datetime.utcnow(),
+        }], keys=("source",), update=("position", "applied", "updated_at"))
+        db.commit()
+        self.stats["batches"] += 1
+
+    def run(self, restart: bool = False) -> Dict:
+        from .ingest import build_update
+        from .webhook_parser import parse_webhook
+
+        db = None
+        start, applied_before = 0, 0
+        if not self.dry_run:
+            from .database import SessionLocal
+            db = SessionLocal()
+            if not restart:
+                start, applied_before = self._resume_position(db)
+                if start:
+                    logger.info(f"↪️ Fortsetzen ab Datensatz {start} ({applied_before} bereits geschrieben)")
+
+        began = time.perf_counter()
+        last_progress = began
+        batch: List = []
+        position = start
+        stats = self.stats
+        try:
+            with open_text(self.source) as stream:
+                for message, received_at in iter_records(stream, self.fmt, skip=start):
+                    position += 1
+                    stats["read"] += 1
+                    parsed = parse_webhook(message) if message else None
+                    if parsed is None:
+                        stats["invalid"] += 1
+                    else:
+                        stats["by_type"][parsed["type"]] += 1
+                        batch.append(build_update(parsed, received_at))
+
+                    if len(batch) >= self.batch_size:
+                        stats["applied"] += len(batch)
+                        if db is not None:
+                            self._commit(db, batch, position, applied_before + stats["applied"])
+                        batch = []
+                        now = time.perf_counter()
+                        if now - last_progress >= PROGRESS_INTERVAL:
+                            last_progress = now
+                            logger.info(f"⏩ {position} Datensätze, {stats['read'] / (now - began):,.0f} Events/s")
+                    if self.limit is not None and stats["read"] >= self.limit:
+                        break
+
+            stats["applied"] += len(batch)
+            if db is not None and stats["read"]:
+                # Rest plus Checkpoint (auch wenn nur ungültige Zeilen übrig waren)
+                self._commit(db, batch, position, applied_before + stats["applied"])
+        finally:
+            if db is not None:
+                db.close()
+
+        elapsed = time.perf_counter() - began
+        stats["skipped"] = start
+        stats["position"] = position
+        stats["seconds"] = round(elapsed, 3)
+        stats["events_per_second"] = round(stats["read"] / elapsed) if elapsed > 0 else 0
+        return stats
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m app.replay", description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("source", help="Datei (.txt/.ndjson/.csv, optional .gz) oder - für stdin")
+    parser.add_argument("--format", choices=FORMATS, help="Statt Erkennung über die Endung")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="Alerts pro Transaktion")
+    parser.add_argument("--checkpoint", help="Name des Checkpoints (Default: absoluter Pfad der Quelle)")
+    parser.add_argument("--restart", action="store_true", help="Checkpoint ignorieren, von vorn beginnen")
+    parser.add_argument("--no-history", action="store_true", help="Nur States, keine Zeilen in webhook_events")
+    parser.add_argument("--dry-run", action="store_true", help="Nur lesen und parsen, nichts schreiben")
+    parser.add_argument("--limit", type=int, help="Höchstens N Datensätze (ab Checkpoint)")
+    args = parser.parse_args(argv)
+
+    from .logs import logs
+    logs.configure(stream=sys.stderr)
+    # Ungültige Zeilen werden gezählt statt einzeln geloggt
+    logging.getLogger("app.webhook_parser").setLevel(logging.ERROR)
+
+    if args.source == "-" and not args.checkpoint and not args.dry_run:
+        parser.error("stdin braucht --checkpoint")
+    checkpoint = args.checkpoint or os.path.abspath(args.source)
+    fmt = args.format or detect_format(args.source)
+
+    if not args.dry_run:
+        from .database import init_db
+        init_db()
+
+    replay = Replay(args.source, fmt, checkpoint, args.batch_size,
+                    history=not args.no_history, dry_run=args.dry_run, limit=args.limit)
+    stats = replay.run(restart=args.restart)
+    logger.info(
+        f"✅ Replay fertig: {stats['applied']} Alerts in {stats['seconds']}s "
+        f"({stats['events_per_second']:,} Events/s, {stats['invalid']} ungültig)"
+    )
+    report = {"source": args.source, "format": fmt, "checkpoint": checkpoint,
+              "dry_run": args.dry_run, **stats}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Retention, Downsampling und Compaction für webhook_events
+Ein Hintergrund-Thread verdichtet Rohdaten älter als HISTORY_RETENTION_DAYS
+zu Tages-Summaries (webhook_daily_summary) und löscht sie danach.
+
+Gearbeitet wird in kleinen Batches (RETENTION_BATCH_SIZE) mit je einer
+kurzen Transaktion und einer Pause dazwischen, damit der Webhook-Writer
+nie lange auf den SQLite-Lock warten muss. Freie Pages werden per
+PRAGMA incremental_vacuum zurückgegeben.
+
+Jeder Lauf liefert Kennzahlen: verdichtete Zeilen/s und die längste
+Lock-Haltezeit einer Batch-Transaktion.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+import logging
+import threading
+import time
+
+from sqlalchemy import delete, select, text, tuple_
+from sqlalchemy.orm import Session
+
+from .database import (
+    SessionLocal, WebhookEvent, WebhookDailySummary, engine, storage,
+    HISTORY_RETENTION_DAYS, RETENTION_INTERVAL_SECONDS, RETENTION_BATCH_SIZE,
+    RETENTION_PAUSE_MS, RETENTION_VACUUM_PAGES,
+)
+
+logger = logging.getLogger(__name__)
+
+# Pages pro Vacuum-Transaktion
+VACUUM_CHUNK_PAGES = 256
+
+
+def series_key(event) -> str:
+    """Serie eines Events: "trend:1w", "signal:1d", "macro:trend", ..."""
+    if event.type == "macro":
+        return f"macro:{event.indicator}"
+    return f"{event.type}:{event.timeframe}"
+
+
+class RetentionJob:
+    """Verdichtet alte Webhook-Events in Batches"""
+
+    def __init__(self, retention_days: int = HISTORY_RETENTION_DAYS,
+                 batch_size: int = RETENTION_BATCH_SIZE,
+                 pause: float = RETENTION_PAUSE_MS / 1000.0,
+                 interval: float = RETENTION_INTERVAL_SECONDS,
+                 vacuum_pages: int = RETENTION_VACUUM_PAGES,
+                 session_factory=SessionLocal):
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.pause = pause
+        self.interval = interval
+        self.vacuum_pages = vacuum_pages
+        self._session_factory = session_factory
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_stats: Optional[Dict] = None
+
+    # ===== Hintergrund-Thread =====
+
+    def start(self):
+        if self.retention_days <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="history-retention", daemon=True)
+        self._thread.start()
+        logger.info(f"✅ Retention gestartet: {self.retention_days} Tage, alle {self.interval:.0f}s")
+
+    def stop(self, timeout: float = 10.0):
+        if not self._thread:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"❌ Retention fehlgeschlagen: {e}")
+            self._stop.wait(self.interval)
+
+    # ===== Ein Lauf =====
+
+    def run_once(self, now: Optional[datetime] = None) -> Dict:
+        """
+        Verdichtet alle Events vor dem Cutoff.
+
+        Returns:
+            Kennzahlen: rows_compacted, batches, seconds, rows_per_second,
+            max_lock_ms, vacuumed_pages
+        """
+        cutoff = (now or datetime.utcnow()) - timedelta(days=self.retention_days)
+        rows = batches = 0
+        max_lock = 0.0
+        started = time.perf_counter()
+
+        db = self._session_factory()
+        try:
+            last_values = self._load_last_values(db)
+
+            while not self._stop.is_set():
+                compacted, lock_seconds = self._compact_batch(db, cutoff, last_values)
+                if not compacted:
+                    break
+                rows += compacted
+                batches += 1
+                max_lock = max(max_lock, lock_seconds)
+                # Lock freigeben und dem Writer Zeit geben
+                time.sleep(self.pause)
+        finally:
+            db.close()
+
+        vacuumed = self._incremental_vacuum() if rows else 0
+        elapsed = time.perf_counter() - started
+
+        self.last_stats = {
+            "cutoff": cutoff.isoformat() + "Z",
+            "rows_compacted": rows,
+            "batches": batches,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(rows / elapsed) if elapsed and rows else 0,
+            "max_lock_ms": round(max_lock * 1000, 2),
+            "vacuumed_pages": vacuumed,
+        }
+        if rows:
+            logger.info(f"🧹 Retention: {self.last_stats}")
+        return self.last_stats
+
+    def _load_last_values(self, db: Session) -> Dict[Tuple[str, str], Optional[str]]:
+        """
+        Letzter bekannter Wert pro (Symbol, Serie) aus den Summaries,
+        damit Flips über Batch- und Tagesgrenzen korrekt gezählt werden.
+        """
+        # Join auf den letzten Tag pro Serie (portabel, SQLite und PostgreSQL)
+        rows = db.execute(text(
+            "SELECT s.symbol, s.series, s.last_value FROM webhook_daily_summary s "
+            "JOIN (SELECT symbol, series, max(day) AS day FROM webhook_daily_summary "
+            "GROUP BY symbol, series) m ON s.symbol = m.symbol AND s.series = m.series AND s.day = m.day"
+        ))
+        return {(symbol, series): value for symbol, series, value in rows}
+
+    def _compact_batch(self, db: Session, cutoff: datetime,
+                       last_values: Dict[Tuple[str, str], Optional[str]]) -> Tuple[int, float]:
+        """
+        Verdichtet die ältesten batch_size Events vor dem Cutoff.
+
+        Returns:
+            (Anzahl Events, Dauer der schreibenden Transaktion in Sekunden)
+        """
+
+        # Lesen ohne Schreib-Lock (Index auf received_at)
+        events = db.execute(
+            select(
+                WebhookEvent.id, WebhookEvent.symbol, WebhookEvent.type, WebhookEvent.timeframe,
+                WebhookEvent.indicator, WebhookEvent.value, WebhookEvent.received_at,
+            )
+            .where(WebhookEvent.received_at < cutoff)
+            .order_by(WebhookEvent.received_at, WebhookEvent.id)
+            .limit(self.batch_size)
+        ).all()
+        if not events:
+            db.rollback()
+            return 0, 0.0
+
+        # Aggregation pro (Symbol, Tag, Serie) in chronologischer Reihenfolge
+        groups: Dict[Tuple[str, object, str], Dict] = {}
+        for event in events:
+            series = series_key(event)
+            key = (event.symbol, event.received_at.date(), series)
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = {"count": 0, "flips": 0, "first": event.value}
+            previous = last_values.get((event.symbol, series))
+            if previous is not None and previous != event.value:
+                group["flips"] += 1
+            group["count"] += 1
+            group["last"] = event.value
+            group["last_at"] = event.received_at
+            last_values[(event.symbol, series)] = event.value
+
+        # Upsert: neue Tage übernehmen first_value, bestehende addieren die Zähler
+        rows = [
+            {
+                "symbol": symbol, "day": day, "series": series,
+                "event_count": group["count"], "flip_count": group["flips"],
+                "first_value": group["first"], "last_value": group["last"],
+                "last_received_at": group["last_at"],
+            }
+            for (symbol, day, series), group in groups.items()
+        ]
+
+        # Ab hier hält die Transaktion den Schreib-Lock: nur noch Bulk-Statements
+        last = events[-1]
+        max_id = max(event.id for event in events)
+        lock_started = time.perf_counter()
+        try:
+            storage.upsert(
+                db, WebhookDailySummary, rows, keys=("symbol", "day", "series"),
+                update=("last_value", "last_received_at"), increment=("event_count", "flip_count"),
+            )
+            # Range-Delete über den Index statt IN-Liste: die Batch sind genau
+            # die ältesten Events bis einschließlich last. id <= max_id schließt
+            # Zeilen aus, die nach dem Lesen geschrieben wurden (z.B. Replays mit
+            # altem received_at); sie kommen im nächsten Batch in die Summaries
+            db.execute(delete(WebhookEvent).where(
+                WebhookEvent.received_at < cutoff,
+                tuple_(WebhookEvent.received_at, WebhookEvent.id) <= (last.received_at, last.id),
+                WebhookEvent.id <= max_id,
+            ))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return len(events), time.perf_counter() - lock_started
+
+    def _incremental_vacuum(self) -> int:
+        """
+        Gibt bis zu vacuum_pages freie Pages an das Dateisystem zurück.
+
+        PRAGMA incremental_vacuum(N) gibt pro sqlite3_step nur eine Page frei,
+        pysqlite steppt aber nur einmal - daher N Einzelaufrufe, gebündelt in
+        kurze Transaktionen mit Pause dazwischen (wie die Delete-Batches).
+        """
+        if storage.name != "sqlite":
+            return 0
+        conn = engine.raw_connection()
+        try:
+            cursor = conn.cursor()
+            if cursor.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                return 0
+            free_before = cursor.execute("PRAGMA freelist_count").fetchone()[0]
+            remaining = min(free_before, self.vacuum_pages)
+            while remaining > 0 and not self._stop.is_set():
+                chunk = min(remaining, VACUUM_CHUNK_PAGES)
+                vacuum = conn.cursor()
+                vacuum.execute("BEGIN IMMEDIATE")
+                for _ in range(chunk):
+                    vacuum.execute("PRAGMA incremental_vacuum(1)")
+                # Schließen setzt das angefangene Statement zurück, sonst schlägt COMMIT fehl
+                vacuum.close()
+                conn.commit()
+                remaining -= chunk
+                time.sleep(self.pause)
+            free_after = cursor.execute("PRAGMA freelist_count").fetchone()[0]
+        finally:
+            conn.close()
+        return free_before - free_after
+
+
+retention = RetentionJob()
@@ -0,0 +1,66 @@
+"""
+JSON-Darstellung von Coins und Macro-Indikatoren
+Gemeinsam genutzt von API-Endpoints, Live-Stream und Webhook-Writer.
+
+Es werden nur absolute Timestamps ausgeliefert; relative Zeiten ("5m ago")
+berechnen die Clients selbst. Dadurch bleibt ein einmal kodierter Payload
+gültig, bis sich der State ändert.
+"""
+
+from datetime import datetime
+from typing import Optional
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson ist optional
+    orjson = None
+
+from .database import CoinState, MacroState
+
+# Feste Reihenfolge der Macro-Indikatoren im Dashboard
+MACRO_ORDER = ["BTC", "USDT.D", "TOTAL", "TOTAL2", "TOTAL3", "OTHERS"]
+
+
+def dumps(data) -> bytes:
+    """Kompaktes JSON als Bytes (orjson falls installiert)"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def isoformat_utc(dt: Optional[datetime]) -> Optional[str]:
+    """UTC Timestamp als ISO-String mit Z-Suffix"""
+    return dt.isoformat() + "Z" if dt else None
+
+
+def coin_to_dict(coin: CoinState) -> dict:
+    """Serialisiert einen Coin für /api/coins und den Live-Stream"""
+    return {
+        "symbol": coin.symbol,
+        "display_name": coin.display_name,
+        # 1W/3D/1D immer, weitere Timeframes (4h, 12h, ...) sobald gesetzt
+        "trends": {
+            "1w": coin.trend_1w,
+            "3d": coin.trend_3d,
+            "1d": coin.trend_1d,
+            **coin.indicator("trend")
+        },
+        "last_signal": {
+            "type": coin.last_signal_type,
+            "price": coin.last_signal_price,
+            "time": isoformat_utc(coin.last_signal_time)
+        },
+        "last_updated": isoformat_utc(coin.last_updated)
+    }
+
+
+def macro_to_dict(macro: MacroState) -> dict:
+    """Serialisiert einen Macro-Indikator für /api/macro und den Live-Stream"""
+    return {
+        "symbol": macro.symbol,
+        "display_name": macro.display_name,
+        "trend_1m": macro.trend_1m,
+        "macd_1m": macro.macd_1m,
+        "last_updated": isoformat_utc(macro.last_updated)
+    }
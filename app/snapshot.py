@@ -0,0 +1,149 @@
+"""
+Kompakte Kodierungen für /api/snapshot (Coins und Macros in einer Antwort)
+
+Per Accept-Header wählbar:
+    - application/json (Default): dieselben Zeilen wie /api/coins und
+      /api/macro, nur in einer Antwort
+    - application/vnd.dashboard.columnar+json: spaltenweise, ohne
+      wiederholte Schlüssel; Trends/Signale als kleine Integer-Codes
+      (Legende in "values" / "signals"), Zeitpunkte als Epoch-Sekunden
+    - application/msgpack: dieselbe spaltenweise Struktur als MessagePack
+      (nur wenn das msgpack-Paket installiert ist)
+
+Die Codes der Trends sind die Werte aus app/indicators.py (VALUES) und
+ändern sich nie; neue Werte werden nur angehängt.
+"""
+
+from datetime import datetime
+from typing import List, Optional
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack ist optional
+    msgpack = None
+
+from .indicators import COIN_COLUMNS, VALUE_CODES, VALUES, slots
+from .serializers import dumps
+
+MEDIA_JSON = "application/json"
+MEDIA_COLUMNAR = "application/vnd.dashboard.columnar+json"
+MEDIA_MSGPACK = "application/msgpack"
+# Accept-Werte -> Media-Type der Antwort
+MEDIA_TYPES = {
+    MEDIA_JSON: MEDIA_JSON,
+    MEDIA_COLUMNAR: MEDIA_COLUMNAR,
+    MEDIA_MSGPACK: MEDIA_MSGPACK,
+    "application/x-msgpack": MEDIA_MSGPACK,
+    "application/*": MEDIA_JSON,
+    "*/*": MEDIA_JSON,
+}
+# Kurznamen für Metrik-Labels
+FORMAT_NAMES = {MEDIA_JSON: "json", MEDIA_COLUMNAR: "columnar", MEDIA_MSGPACK: "msgpack"}
+
+# Signal-Codes; wie VALUES nur anhängen
+SIGNALS = (None, "buy", "sell")
+SIGNAL_CODES = {value: code for code, value in enumerate(SIGNALS)}
+
+# Trend-Spalten, die immer im Snapshot stehen
+FIXED_TIMEFRAMES = tuple(timeframe for timeframe, _ in COIN_COLUMNS.values())
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def negotiate(accept: Optional[str]) -> Optional[str]:
+    """
+    Media-Type der Antwort aus dem Accept-Header (q-Werte, Reihenfolge bei Gleichstand).
+
+    Returns:
+        Media-Type oder None, wenn nichts Unterstütztes akzeptiert wird (-> 406)
+    """
+    if not accept:
+        return MEDIA_JSON
+    candidates = []
+    for position, item in enumerate(accept.split(",")):
+        media, _, params = item.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        candidates.append((-quality, position, media.strip().lower()))
+    for negative_quality, _, media in sorted(candidates):
+        if negative_quality == 0:
+            break
+        chosen = MEDIA_TYPES.get(media)
+        if chosen == MEDIA_MSGPACK and msgpack is None:
+            continue
+        if chosen is not None:
+            return chosen
+    return None
+
+
+def epoch(dt: Optional[datetime]) -> Optional[int]:
+    """Naiver UTC-Zeitpunkt -> Epoch-Sekunden"""
+    return int((dt - _EPOCH).total_seconds()) if dt else None
+
+
+def compact_row(coin) -> tuple:
+    """Werte eines Coins für die spaltenweise Kodierung (im Index pro Änderung einmal gebaut)"""
+    return (
+        coin.symbol, coin.display_name, bytes(coin.values),
+        SIGNAL_CODES.get(coin.last_signal_type, 0), coin.last_signal_price,
+        epoch(coin.last_signal_time), epoch(coin.last_updated),
+    )
+
+
+def columnar_coins(rows: List[tuple]) -> dict:
+    """Coins spaltenweise aus compact_row-Tupeln (Reihenfolge bleibt erhalten)"""
+    symbol, display_name, values, signal, price, signal_time, updated = (
+        map(list, zip(*rows)) if rows else ([] for _ in range(7))
+    )
+    trends = {}
+    for index, (timeframe, indicator) in enumerate(slots.keys):
+        if indicator != "trend":
+            continue
+        codes = [v[index] if index < len(v) else 0 for v in values]
+        # 1W/3D/1D immer, weitere Timeframes nur wenn irgendwo gesetzt
+        if timeframe in FIXED_TIMEFRAMES or any(codes):
+            trends[timeframe] = codes
+    return {
+        "symbol": symbol,
+        "display_name": display_name,
+        "trends": trends,
+        "signal": signal,
+        "signal_price": price,
+        "signal_time": signal_time,
+        "last_updated": updated,
+    }
+
+
+def columnar_macros(macros: List) -> dict:
+    """Macros spaltenweise (trend_1m/macd_1m mit Default wie in /api/macro)"""
+    return {
+        "symbol": [m.symbol for m in macros],
+        "display_name": [m.display_name for m in macros],
+        "trend_1m": [VALUE_CODES[m.trend_1m] for m in macros],
+        "macd_1m": [VALUE_CODES[m.macd_1m] for m in macros],
+        "last_updated": [epoch(m.last_updated) for m in macros],
+    }
+
+
+def columnar(rows: List[tuple], macros: List, updated_at: Optional[datetime]) -> dict:
+    """Spaltenweiser Snapshot mit Legende der Codes (rows: compact_row pro Coin)"""
+    return {
+        "values": list(VALUES),
+        "signals": list(SIGNALS),
+        "coins": columnar_coins(rows),
+        "macro": columnar_macros(macros),
+        "timestamp": epoch(updated_at),
+    }
+
+
+def encoder(media_type: str):
+    """Funktion Payload -> Bytes für den Media-Type"""
+    if media_type == MEDIA_MSGPACK:
+        return msgpack.packb
+    return dumps
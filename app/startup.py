@@ -0,0 +1,139 @@
+"""
+Schneller Kaltstart: Webhooks sofort annehmen, Datenbank im Hintergrund
+
+Der lifespan-Start wartet nur noch auf den Start dieses Tasks. uvicorn
+nimmt damit Requests an, bevor Schema-Check, State-Laden und statische
+Dateien fertig sind:
+
+- Webhooks, die vorher eintreffen, landen in einer Warteschlange
+  (höchstens STARTUP_QUEUE_MAX Updates, darüber 503 mit Retry-After) und
+  werden nach dem Start in Eingangsreihenfolge über cluster.ingest
+  angewendet (Dedup, State, Writer wie sonst auch).
+- init_db und das Lesen des States laufen in einem Thread; nur der Einbau
+  in den StateStore läuft im Event-Loop.
+- /readyz meldet erst nach dem Abarbeiten der Warteschlange "ready";
+  Lese-Endpoints liefern vorher einen leeren State.
+
+Schlägt der Start fehl, bleibt die App "not ready" (Railway behält dann
+den alten Deploy) und die Warteschlange wird nie angewendet.
+"""
+
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import logging
+import os
+import time
+
+from .analytics import analytics
+from .assets import assets
+from .cluster import cluster
+from .database import init_db
+from .health import heartbeat
+from .ingest import Update, writer
+from .retention import retention
+from .state import state
+
+logger = logging.getLogger(__name__)
+
+# Max. Updates, die vor dem Ende des Starts angenommen werden
+STARTUP_QUEUE_MAX = int(os.environ.get("STARTUP_QUEUE_MAX", "10000"))
+
+
+class StartupQueueFull(Exception):
+    """Warteschlange voll, Start noch nicht fertig (-> 503)"""
+
+
+class Startup:
+    """Start im Hintergrund plus Warteschlange für früh eintreffende Webhooks"""
+
+    def __init__(self, max_queued: int = STARTUP_QUEUE_MAX):
+        self.max_queued = max_queued
+        self.ready = False
+        self.error: Optional[str] = None
+        self._queued: List[Tuple[List[Update], Optional[str]]] = []
+        self._queued_updates = 0
+        self.queued_total = 0
+        self._began = time.monotonic()
+        self.seconds: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def begin(self):
+        """Im lifespan: startet den Hintergrund-Task und kehrt sofort zurück"""
+        self._began = time.monotonic()
+        self._task = asyncio.create_task(self._run())
+
+    def enqueue(self, updates: List[Update], idempotency_key: Optional[str] = None) -> List[bool]:
+        """
+        Merkt sich Updates bis zum Ende des Starts.
+
+        Returns:
+            Duplikat-Flags (immer False; Duplikate erkennt erst cluster.ingest)
+        """
+        if self._queued_updates + len(updates) > self.max_queued:
+            raise StartupQueueFull(f"Startup queue full ({self.max_queued} updates)")
+        self._queued.append((updates, idempotency_key))
+        self._queued_updates += len(updates)
+        self.queued_total += len(updates)
+        return [False] * len(updates)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queued_updates
+
+    def stats(self) -> Dict:
+        return {
+            "ready": self.ready,
+            "seconds": self.seconds,
+            "queue_depth": self.queue_depth,
+            "queued_total": self.queued_total,
+            "error": self.error,
+        }
+
+    @staticmethod
+    def _prepare():
+        """Blockierender Teil (Thread): Dateien, Schema, erster DB-Heartbeat, State lesen"""
+        assets.load()
+        with cluster.startup_lock():
+            init_db()
+        logger.info("✅ Database initialized")
+        # Erster Check hier statt in heartbeat.start(): /readyz ist danach sofort aussagekräftig
+        heartbeat.check()
+        return state.fetch()
+
+    async def _run(self):
+        try:
+            coins, macros = await asyncio.to_thread(self._prepare)
+            state.install(coins, macros)
+            writer.start()
+            if not cluster.enabled:
+                # Im Cluster-Modus startet der gewählte Writer die Retention
+                retention.start()
+            heartbeat.start()
+            await cluster.start()
+            # Erste Writer-Wahl abwarten, bevor die Warteschlange verteilt wird
+            await asyncio.sleep(0)
+            analytics.start_backfill()
+        except Exception as e:
+            self.error = str(e)[:200]
+            logger.exception(f"❌ Start fehlgeschlagen: {e}")
+            return
+
+        queued, self._queued = self._queued, []
+        for updates, idempotency_key in queued:
+            cluster.ingest(updates, idempotency_key)
+        self._queued_updates = 0
+        self.ready = True
+        self.seconds = round(time.monotonic() - self._began, 3)
+        if queued:
+            logger.info(f"📥 {sum(len(u) for u, _ in queued)} Webhooks aus der Start-Warteschlange angewendet")
+        logger.info(f"🚀 Bereit nach {self.seconds}s")
+
+    async def stop(self):
+        """Beim Shutdown: laufenden Start abwarten, bevor Writer & Co. gestoppt werden"""
+        if self._task is not None and not self._task.done():
+            await asyncio.wait([self._task])
+        if self._queued_updates:
+            logger.warning(f"⚠️ {self._queued_updates} Webhooks aus der Start-Warteschlange verworfen")
+
+
+startup = Startup()
@@ -0,0 +1,232 @@
+"""
+In-Memory State Store für Coins und Macro-Indikatoren
+Der komplette Datensatz (bis zu einigen tausend Zeilen) liegt im Prozess.
+Beim Start einmal aus SQLite geladen, danach von receive_webhook direkt
+aktualisiert. SQLite wird nur noch per Write-Through (Webhook-Writer)
+für die Persistenz beschrieben, Lese-Endpoints brauchen keine DB.
+
+Alle Zugriffe laufen im Event-Loop (async Endpoints), daher ohne Locks.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .analytics import TREND_WEIGHTS, analytics
+from .coin_index import CoinIndex
+from .database import SessionLocal, CoinState, MacroState, IndicatorState
+from .indicators import COIN_COLUMNS, MACRO_COLUMNS, MACRO_DEFAULT, IndicatorValues, install_columns, is_indicator
+from .ingest import Update, display_name_for
+from .serializers import MACRO_ORDER, macro_to_dict
+
+logger = logging.getLogger(__name__)
+
+
+class CoinRecord(IndicatorValues):
+    """
+    Speicherschlanke Kopie einer coin_states Zeile (gleiche Attributnamen).
+    Trends pro Timeframe im bytearray values (app/indicators.py);
+    trend_1w/trend_3d/trend_1d sind Properties darauf.
+    """
+
+    COLUMNS = (
+        "symbol", "display_name",
+        "last_signal_type", "last_signal_price", "last_signal_time",
+        "last_updated", "created_at",
+    )
+    __slots__ = COLUMNS + ("values",)
+
+    def __init__(self, symbol: str, display_name: str, created_at: Optional[datetime] = None):
+        self.symbol = symbol
+        self.display_name = display_name
+        self.last_signal_type = None
+        self.last_signal_price = None
+        self.last_signal_time = None
+        self.last_updated = created_at
+        self.created_at = created_at
+        self.values = bytearray()
+
+    @classmethod
+    def from_model(cls, coin) -> "CoinRecord":
+        """Aus einer CoinState-Instanz oder einer Ergebniszeile mit denselben Spalten"""
+        record = cls.__new__(cls)
+        for name in cls.COLUMNS:
+            setattr(record, name, getattr(coin, name))
+        record.values = bytearray()
+        return record
+
+
+class MacroRecord(IndicatorValues):
+    """
+    Speicherschlanke Kopie einer macro_states Zeile (gleiche Attributnamen).
+    trend_1m/macd_1m sind Properties auf values, Default "bearish".
+    """
+
+    COLUMNS = ("symbol", "display_name", "last_updated", "created_at")
+    __slots__ = COLUMNS + ("values",)
+
+    def __init__(self, symbol: str, display_name: str, created_at: Optional[datetime] = None):
+        self.symbol = symbol
+        self.display_name = display_name
+        self.last_updated = created_at
+        self.created_at = created_at
+        self.values = bytearray()
+
+    @classmethod
+    def from_model(cls, macro) -> "MacroRecord":
+        record = cls.__new__(cls)
+        for name in cls.COLUMNS:
+            setattr(record, name, getattr(macro, name))
+        record.values = bytearray()
+        return record
+
+
+install_columns(CoinRecord, COIN_COLUMNS)
+install_columns(MacroRecord, MACRO_COLUMNS, MACRO_DEFAULT)
+
+
+class StateStore:
+    """Autoritativer Stand aller Coins und Macros im Speicher"""
+
+    def __init__(self):
+        self.coins: Dict[str, CoinRecord] = {}
+        self.macros: Dict[str, MacroRecord] = {}
+        self.last_coin_update: Optional[datetime] = None
+        self.last_macro_update: Optional[datetime] = None
+        # Inkrementell im Webhook-Pfad gepflegt (für /health, ohne DB)
+        self.last_webhook: Optional[datetime] = None
+        self.webhooks_applied = 0
+        self.loaded = False
+        # Werden bei jeder Änderung erhöht (Schlüssel für den Payload-Cache)
+        self.coin_version = 0
+        self.macro_version = 0
+        self._sorted_coins: Optional[List[CoinRecord]] = None
+        # Filter, Cursor und since=Version für /api/coins (app/coin_index.py)
+        self.index = CoinIndex()
+
+    def load(self, db: Optional[Session] = None):
+        """Lädt alle Zeilen einmalig aus der Datenbank (beim App-Start)"""
+        self.install(*self.fetch(db))
+
+    @staticmethod
+    def fetch(db: Optional[Session] = None) -> Tuple[Dict[str, "CoinRecord"], Dict[str, "MacroRecord"]]:
+        """
+        Liest Coins, Macros und Indikator-Stände als neue Records.
+        Fasst den Store nicht an, darf also in einem Thread laufen.
+        Liest Spalten-Tupel statt ORM-Objekten (beim Start mit vielen Coins
+        der größte Anteil der Ladezeit).
+        """
+        own_session = db is None
+        db = db or SessionLocal()
+        try:
+            coin_columns = [CoinState.__table__.c[name] for name in CoinRecord.COLUMNS]
+            macro_columns = [MacroState.__table__.c[name] for name in MacroRecord.COLUMNS]
+            coins = {row.symbol: CoinRecord.from_model(row) for row in db.execute(select(*coin_columns))}
+            macros = {row.symbol: MacroRecord.from_model(row) for row in db.execute(select(*macro_columns))}
+            records = {"coin": coins, "macro": macros}
+            for kind, symbol, timeframe, indicator, value in db.execute(select(
+                IndicatorState.kind, IndicatorState.symbol, IndicatorState.timeframe,
+                IndicatorState.indicator, IndicatorState.value,
+            )):
+                record = records[kind].get(symbol)
+                if record is not None:
+                    record.set_code((timeframe, indicator), value)
+        finally:
+            if own_session:
+                db.close()
+        return coins, macros
+
+    def install(self, coins: Dict[str, "CoinRecord"], macros: Dict[str, "MacroRecord"]):
+        """Übernimmt geladene Records und baut Analytics und Index neu auf (im Event-Loop)"""
+        self.coins = coins
+        self.macros = macros
+        self._sorted_coins = None
+        coin_updates = [c.last_updated for c in self.coins.values() if c.last_updated]
+        self.last_coin_update = max(coin_updates) if coin_updates else None
+        macro_updates = [m.last_updated for m in self.macros.values() if m.last_updated]
+        self.last_macro_update = max(macro_updates) if macro_updates else None
+        self.coin_version += 1
+        self.macro_version += 1
+        self.last_webhook = self.updated_at
+        analytics.rebuild(self.coins.values(), self.macros)
+        self.index.rebuild(self.coins.values())
+        self.loaded = True
+        logger.info(f"✅ State geladen: {len(self.coins)} Coins, {len(self.macros)} Macros")
+
+    def is_repeat(self, update: Update) -> bool:
+        """Trend-Update, dessen Wert schon im State steht (für die Admission Control)"""
+        coin = self.coins.get(update.symbol) if update.kind == "coin" else None
+        if coin is None:
+            return False
+        key, value = next(iter(update.fields.items()))
+        return is_indicator(key) and coin.get(key) == value
+
+    def apply(self, update: Update) -> Tuple[Optional[str], dict]:
+        """
+        Wendet ein Update in-place an (gleiche Semantik wie der Writer).
+
+        Returns:
+            (Event, Zeile) für den Live-Stream; Event ist None, wenn der
+            Macro nicht im Dashboard angezeigt wird
+        """
+        self.last_webhook = update.received_at
+        self.webhooks_applied += 1
+        if update.kind == "macro":
+            macro = self.macros.get(update.symbol)
+            if not macro:
+                macro = MacroRecord(update.symbol, update.symbol, update.received_at)
+                self.macros[update.symbol] = macro
+            macro.assign(update.fields)
+            macro.last_updated = update.received_at
+            self.last_macro_update = update.received_at
+            self.macro_version += 1
+            analytics.update_macros(self.macros)
+            event = "macro" if update.symbol in MACRO_ORDER else None
+            return event, macro_to_dict(macro)
+
+        coin = self.coins.get(update.symbol)
+        if not coin:
+            coin = CoinRecord(update.symbol, display_name_for(update.symbol), update.received_at)
+            self.coins[update.symbol] = coin
+            self._sorted_coins = None
+        # Alte Trendwerte für die Flip-Erkennung in app/analytics.py
+        previous = {column: getattr(coin, column) for column in TREND_WEIGHTS if COIN_COLUMNS[column] in update.fields}
+        coin.assign(update.fields)
+        coin.last_updated = update.received_at
+        self.last_coin_update = update.received_at
+        self.coin_version += 1
+        analytics.update_coin(coin, previous, update.received_at)
+        return "coin", self.index.touch(coin)
+
+    @property
+    def version(self) -> int:
+        """Gesamt-Version über Coins und Macros"""
+        return self.coin_version + self.macro_version
+
+    @property
+    def updated_at(self) -> Optional[datetime]:
+        """Zeitpunkt der letzten Änderung insgesamt"""
+        candidates = [dt for dt in (self.last_coin_update, self.last_macro_update) if dt]
+        return max(candidates) if candidates else None
+
+    def sorted_coins(self) -> List[CoinRecord]:
+        """Coins sortiert nach Anzeigename (nur bei neuen Coins neu sortiert)"""
+        if self._sorted_coins is None:
+            # Symbol als zweiter Schlüssel: gleiche Reihenfolge in jedem Worker
+            self._sorted_coins = sorted(self.coins.values(), key=lambda c: (c.display_name or "", c.symbol))
+        return self._sorted_coins
+
+    def coin_rows(self) -> List[dict]:
+        """JSON-Zeilen aller Coins in Anzeige-Reihenfolge (vorgebaut im Index)"""
+        payload = self.index.payload
+        return [payload(coin.symbol) for coin in self.sorted_coins()]
+
+    def ordered_macros(self) -> List[MacroRecord]:
+        """Bekannte Macro-Indikatoren in fester Anzeige-Reihenfolge"""
+        return [self.macros[symbol] for symbol in MACRO_ORDER if symbol in self.macros]
+
+
+state = StateStore()
@@ -0,0 +1,280 @@
+"""
+Storage-Backends: SQLite (Default) und PostgreSQL
+
+Kapselt alles, was vom Datenbank-System abhängt: Engines und Pools,
+Verbindungs-Optionen und native Upserts. Der Rest der App arbeitet mit
+denselben Tabellen (app/database.py) und Sessions.
+
+Upserts sind ein einziges Statement (INSERT ... ON CONFLICT DO UPDATE)
+für alle Zeilen eines Batches - kein Lesen-dann-Schreiben, keine Race
+zwischen zwei Writern.
+
+Auswahl über DATABASE_URL:
+    sqlite:///data/trading.db           SQLite (Production-Profil siehe DB_PROFILE)
+    postgresql://user:pw@host:5432/db   PostgreSQL (Treiber psycopg2)
+    postgres://...                      wie postgresql:// (Railway/Heroku-Schreibweise)
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+import os
+
+from sqlalchemy import bindparam, create_engine, event, inspect, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# SQLite Profil: "production" (WAL, synchronous=NORMAL, Page-Cache, mmap,
+# busy_timeout, separater Read-Only Pool) oder "default" (SQLite-Defaults)
+DB_PROFILE = os.environ.get("DB_PROFILE", "production")
+SQLITE_CACHE_MB = int(os.environ.get("SQLITE_CACHE_MB", "64"))
+SQLITE_MMAP_MB = int(os.environ.get("SQLITE_MMAP_MB", "256"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+# Verbindungen im Read-Only Pool (GET Endpoints)
+DB_READ_POOL_SIZE = int(os.environ.get("DB_READ_POOL_SIZE", "8"))
+# PostgreSQL: Verbindungen im gemeinsamen Pool
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "10"))
+
+
+def sqlite_pragmas(read_only: bool = False) -> list:
+    """PRAGMAs, die das Production-Profil auf jeder neuen Verbindung setzt"""
+    pragmas = [
+        f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}",
+        "PRAGMA synchronous = NORMAL",
+        f"PRAGMA cache_size = -{SQLITE_CACHE_MB * 1024}",
+        f"PRAGMA mmap_size = {SQLITE_MMAP_MB * 1024 * 1024}",
+        "PRAGMA temp_store = MEMORY",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    else:
+        # journal_mode ist persistent in der Datei, wird vom Writer gesetzt
+        pragmas.insert(0, "PRAGMA journal_mode = WAL")
+    return pragmas
+
+
+def _install_pragmas(target_engine, read_only: bool = False):
+    pragmas = sqlite_pragmas(read_only)
+
+    @event.listens_for(target_engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+class Storage:
+    """
+    Gemeinsame Logik aller Backends.
+    Unterklassen legen die Engines an und liefern das INSERT des Dialekts.
+    """
+
+    name = "generic"
+
+    def __init__(self, url: str):
+        self.url = url
+        self.engine: Engine = None
+        self.read_engine: Engine = None
+
+    def insert(self, table):
+        """Dialekt-spezifisches INSERT mit on_conflict_do_update/-nothing"""
+        raise NotImplementedError
+
+    def prepare(self):
+        """Einmalig beim Start vor create_all (Datei-Einstellungen etc.)"""
+
+    def upsert_statement(self, table, columns: Sequence[str], keys: Sequence[str],
+                         update: Sequence[str], increment: Sequence[str]):
+        """INSERT ... ON CONFLICT für executemany mit Zeilen aus columns"""
+        stmt = self.insert(table)
+        if update or increment:
+            set_ = {column: stmt.excluded[column] for column in update}
+            for column in increment:
+                set_[column] = table.c[column] + stmt.excluded[column]
+            return stmt.on_conflict_do_update(index_elements=list(keys), set_=set_)
+        return stmt.on_conflict_do_nothing(index_elements=list(keys))
+
+    def upsert(self, db: Session, table, rows: Sequence[Dict], keys: Sequence[str] = ("symbol",),
+               update: Optional[Iterable[str]] = None, increment: Iterable[str] = ()):
+        """
+        Fügt Zeilen ein oder aktualisiert sie bei Konflikt auf keys.
+        Alle Zeilen müssen dieselben Spalten haben (ein Statement für alle).
+
+        Args:
+            db: Session, deren Transaktion genutzt wird (kein Commit)
+            table: Model oder Table
+            rows: Werte für neue Zeilen
+            keys: Spalten des Unique-/Primary-Keys
+            update: Spalten, die bestehende Zeilen übernehmen (Default: alle außer keys);
+                leer = bestehende Zeilen bleiben unverändert (DO NOTHING)
+            increment: Spalten, die bei Konflikt addiert statt ersetzt werden
+        """
+        if not rows:
+            return
+        table = getattr(table, "__table__", table)
+        columns = tuple(rows[0])
+        # Python-seitige Spalten-Defaults (z.B. created_at) selbst setzen,
+        # damit jedes Backend dieselben Werte schreibt
+        defaults = {
+            column.name: column.default for column in table.columns
+            if column.name not in columns and column.default is not None
+            and (column.default.is_scalar or column.default.is_callable)
+        }
+        if defaults:
+            rows = [
+                dict(row, **{name: default.arg if default.is_scalar else default.arg(None)
+                             for name, default in defaults.items()})
+                for row in rows
+            ]
+            columns += tuple(defaults)
+        if update is None:
+            update = [column for column in columns if column not in keys and column not in increment]
+        stmt = self.upsert_statement(table, columns, tuple(keys), tuple(update), tuple(increment))
+        db.execute(stmt, list(rows))
+
+    def add_missing_columns(self, table, defaults: Dict[str, str]) -> List[str]:
+        """
+        Ergänzt fehlende Spalten einer bestehenden Tabelle (ohne Datenverlust).
+
+        Args:
+            table: Model oder Table
+            defaults: Spalte -> SQL-Default-Literal für bestehende Zeilen
+
+        Returns:
+            Hinzugefügte Spalten
+        """
+        table = getattr(table, "__table__", table)
+        inspector = inspect(self.engine)
+        if table.name not in inspector.get_table_names():
+            return []
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        added = []
+        with self.engine.begin() as conn:
+            for name, default in defaults.items():
+                if name in existing:
+                    continue
+                column_type = table.c[name].type.compile(dialect=self.engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {name} {column_type} DEFAULT {default}"))
+                added.append(name)
+        return added
+
+
+class SQLiteStorage(Storage):
+    """
+    SQLite mit WAL-Profil und separatem Read-Only Pool.
+
+    Upserts laufen als executemany auf einem einmal kompilierten Statement:
+    SQLite arbeitet im Prozess, ein vorbereitetes Statement pro Zeile ist
+    hier billiger als ein mehrzeiliges VALUES, das bei jeder Zeilenzahl neu
+    kompiliert werden müsste.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, url: str, profile: str = DB_PROFILE):
+        super().__init__(url)
+        self.profile = profile
+        self._statements: Dict[Tuple, object] = {}
+        self.engine = create_engine(url, connect_args={"check_same_thread": False}, echo=False)
+
+        if profile == "production":
+            _install_pragmas(self.engine)
+            # Eigener Pool für Leser: mit WAL blockieren sie den Webhook-Writer nie,
+            # und query_only verhindert versehentliche Schreibzugriffe
+            self.read_engine = create_engine(
+                url,
+                connect_args={"check_same_thread": False},
+                pool_size=DB_READ_POOL_SIZE,
+                max_overflow=DB_READ_POOL_SIZE,
+                echo=False
+            )
+            _install_pragmas(self.read_engine, read_only=True)
+        else:
+            self.read_engine = self.engine
+
+    def insert(self, table):
+        return sqlite.insert(table)
+
+    def upsert_statement(self, table, columns, keys, update, increment):
+        # ON CONFLICT-Konstrukte haben in SQLAlchemy keinen Cache-Key und würden
+        # bei jedem Aufruf neu kompiliert; daher einmal pro Form als Text-Statement
+        cache_key = (table.name, columns, keys, update, increment)
+        stmt = self._statements.get(cache_key)
+        if stmt is None:
+            construct = super().upsert_statement(table, columns, keys, update, increment).values(
+                {column: bindparam(column) for column in columns}
+            )
+            sql = str(construct.compile(dialect=self.engine.dialect.__class__(paramstyle="named")))
+            stmt = text(sql).bindparams(*(bindparam(column, type_=table.c[column].type) for column in columns))
+            self._statements[cache_key] = stmt
+        return stmt
+
+    def prepare(self):
+        self.enable_incremental_vacuum()
+
+    def enable_incremental_vacuum(self):
+        """
+        Stellt SQLite auf auto_vacuum=INCREMENTAL um, damit die Retention
+        freie Pages schrittweise zurückgeben kann. Für bestehende Dateien ist
+        dafür ein VACUUM nötig - das wird nur bei kleinen Dateien automatisch
+        gemacht, um den Start nicht zu blockieren.
+        """
+        with self.engine.connect() as conn:
+            if conn.execute(text("PRAGMA auto_vacuum")).scalar() == 2:
+                return
+
+            size = conn.execute(text("PRAGMA page_count")).scalar() * conn.execute(text("PRAGMA page_size")).scalar()
+            if size > 64 * 1024 * 1024:
+                logger.warning("⚠️ auto_vacuum ist nicht INCREMENTAL; einmalig manuell 'PRAGMA auto_vacuum=2; VACUUM;' ausführen")
+                return
+
+            conn.execute(text("PRAGMA auto_vacuum = INCREMENTAL"))
+            conn.execute(text("VACUUM"))
+            logger.info("✅ auto_vacuum = INCREMENTAL aktiviert")
+
+
+class PostgresStorage(Storage):
+    """
+    PostgreSQL über psycopg2. Ein Pool für alle; Leser bekommen
+    read-only Transaktionen (Gegenstück zu query_only bei SQLite).
+
+    Upserts per executemany fasst SQLAlchemy ("insertmanyvalues") zu
+    mehrzeiligen INSERT ... VALUES (...), (...) ON CONFLICT zusammen -
+    ein Roundtrip pro 1000 Zeilen statt pro Zeile.
+    """
+
+    name = "postgresql"
+
+    def __init__(self, url: str, pool_size: int = DB_POOL_SIZE):
+        super().__init__(url)
+        self.engine = create_engine(
+            url,
+            pool_size=pool_size,
+            max_overflow=pool_size,
+            pool_pre_ping=True,
+            echo=False
+        )
+        self.read_engine = self.engine.execution_options(postgresql_readonly=True)
+
+    def insert(self, table):
+        return postgresql.insert(table)
+
+
+def normalize_url(url: str) -> str:
+    """postgres:// (Railway/Heroku) -> postgresql:// (SQLAlchemy)"""
+    if url.startswith("postgres://"):
+        return "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+def create_storage(url: str) -> Storage:
+    """Backend passend zur DATABASE_URL"""
+    url = normalize_url(url)
+    if url.startswith("sqlite"):
+        return SQLiteStorage(url)
+    if url.startswith("postgresql"):
+        return PostgresStorage(url)
+    raise ValueError(f"Nicht unterstützte DATABASE_URL: {url.split('://', 1)[0]}://...")
@@ -0,0 +1,95 @@
+"""
+Live-Updates für das Dashboard per Server-Sent Events
+Jeder offene Tab hält eine Verbindung zu /api/stream:
+    - Beim Verbinden: ein "snapshot" Event mit allen Coins und Macros
+    - Danach: nur noch "coin" / "macro" Deltas, ausgelöst durch /webhook
+
+Damit skaliert die Leselast mit der Webhook-Rate statt mit
+(Anzahl Viewer x Poll-Frequenz).
+"""
+
+import asyncio
+import logging
+from typing import Optional, Set
+
+from .serializers import dumps
+
+logger = logging.getLogger(__name__)
+
+# Max. gepufferte Events pro Client, danach wird der Client getrennt
+# (EventSource verbindet sich automatisch neu und erhält einen frischen Snapshot)
+MAX_PENDING_EVENTS = 256
+
+# Kommentarzeile alle N Sekunden, damit Proxies die Verbindung offen halten
+KEEPALIVE_SECONDS = 15
+
+
+def format_event(event: str, data: dict) -> str:
+    """Formatiert ein Event im SSE Wire-Format"""
+    return f"event: {event}\ndata: {dumps(data).decode('utf-8')}\n\n"
+
+
+class Subscriber:
+    """Ein verbundener Stream-Client"""
+
+    __slots__ = ("queue", "dropped")
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=MAX_PENDING_EVENTS)
+        self.dropped = False
+
+
+class StreamHub:
+    """
+    Verteilt Deltas an alle verbundenen Clients.
+    Wird aus dem Event-Loop heraus benutzt (receive_webhook ist async).
+    """
+
+    def __init__(self):
+        self._subscribers: Set[Subscriber] = set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber()
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._subscribers.discard(subscriber)
+
+    def publish(self, event: str, data: dict):
+        """Serialisiert ein Delta einmal und reiht es bei allen Clients ein"""
+        if not self._subscribers:
+            return
+
+        payload = format_event(event, data)
+
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                # Langsamer Client: trennen statt Speicher unbegrenzt wachsen zu lassen
+                subscriber.dropped = True
+                self._subscribers.discard(subscriber)
+                logger.warning("⚠️ Stream-Client zu langsam, Verbindung wird getrennt")
+
+    async def next_event(self, subscriber: Subscriber) -> Optional[str]:
+        """
+        Wartet auf das nächste Event für einen Client.
+
+        Returns:
+            SSE-Payload, Keepalive-Kommentar bei Leerlauf oder None wenn
+            der Client getrennt wurde
+        """
+        if subscriber.dropped:
+            return None
+        try:
+            return await asyncio.wait_for(subscriber.queue.get(), timeout=KEEPALIVE_SECONDS)
+        except asyncio.TimeoutError:
+            return ": keepalive\n\n"
+
+
+hub = StreamHub()
@@ -6,115 +6,174 @@ Parst eingehende Webhook-Nachrichten im Format:
 Beispiele:
     "HYPEUSDT.P, 1W - DOWNTREND"
     "HYPEUSDT.P, 1D - Buy Signal"
+
+Ein einziges vorkompiliertes Pattern erkennt beide Formen in einem Durchlauf:
+das Zeichen direkt nach dem Symbol entscheidet (Komma = Standard,
+Whitespace = Macro). Symbole und Timeframes werden interniert, damit
+State, Historie und Writer dieselben String-Objekte teilen.
 """
 
-import re
-from typing import Dict, Optional
 import logging
+import re
+import sys
+from typing import Dict, Iterable, List, Optional, Union
 
 logger = logging.getLogger(__name__)
 
+# Gruppen: 1 = Symbol
+#   Standard: 2 = Timeframe, 3 = Wert        "SYMBOL, 1W - DOWNTREND"
+#   Macro:    4 = Indikator, 5 = Wert        "BTC MACRO 1M TREND - BEARISH"
+WEBHOOK_PATTERN = re.compile(
+    r"([A-Z0-9.]+)"
+    r"(?:,\s*(\d+[WDMH])\s*-\s*(.+)"
+    r"|\s+MACRO\s+1M\s+(TREND|MACD)\s*-\s*(BULLISH|BEARISH))",
+    re.IGNORECASE,
+)
+
+# Exakte Werte (nach lower/strip) ohne Substring-Suche
+KNOWN_VALUES = {
+    "uptrend": ("trend", "uptrend"),
+    "downtrend": ("trend", "downtrend"),
+    "buy signal": ("signal", "buy"),
+    "sell signal": ("signal", "sell"),
+    "buy": ("signal", "buy"),
+    "sell": ("signal", "sell"),
+}
+
+# Obergrenze für die Caches, damit zufällige Eingaben sie nicht aufblähen
+MAX_INTERNED = 4096
+_upper: Dict[str, str] = {}
+_lower: Dict[str, str] = {}
+
+# Fast Path: TradingView schickt immer wieder dieselben Strings
+# (Symbol x Timeframe x Wert), gültige Ergebnisse werden pro Rohtext gemerkt
+MAX_CACHED_MESSAGES = 8192
+_results: Dict[str, Dict] = {}
+
+
+def _intern(raw: str, cache: Dict[str, str], normalize) -> str:
+    value = cache.get(raw)
+    if value is None:
+        value = sys.intern(normalize(raw))
+        if len(cache) < MAX_INTERNED:
+            cache[raw] = value
+    return value
+
+
+def _remember(raw: str, result: Dict) -> Dict:
+    if len(_results) < MAX_CACHED_MESSAGES:
+        _results[raw] = result.copy()
+    return result
+
+
+def classify_value(value_raw: str):
+    """
+    Bestimmt (Typ, Wert) aus dem Text nach dem Bindestrich.
+
+    Returns:
+        ("trend", "uptrend"|"downtrend"), ("signal", "buy"|"sell") oder None
+    """
+    value_lower = value_raw.lower()
+    known = KNOWN_VALUES.get(value_lower)
+    if known is not None:
+        return known
+
+    # Freitext wie "Strong Uptrend confirmed": gleiche Priorität wie bisher
+    if "uptrend" in value_lower:
+        return KNOWN_VALUES["uptrend"]
+    if "downtrend" in value_lower:
+        return KNOWN_VALUES["downtrend"]
+    if "buy" in value_lower:
+        return KNOWN_VALUES["buy"]
+    if "sell" in value_lower:
+        return KNOWN_VALUES["sell"]
+    return None
+
 
 def parse_webhook(message: str) -> Optional[Dict]:
     """
     Parse TradingView Webhook Nachricht.
-    
+
     Args:
         message: Rohe Webhook-Nachricht
-        
+
     Returns:
         Dict mit geparsten Daten oder None bei ungültigem Format
-        
+
     Beispiele:
         Input:  "HYPEUSDT.P, 1W - DOWNTREND"
         Output: {"symbol": "HYPEUSDT.P", "timeframe": "1w", "type": "trend", "value": "downtrend"}
-        
+
         Input:  "HYPEUSDT.P, 1D - Buy Signal"
         Output: {"symbol": "HYPEUSDT.P", "timeframe": "1d", "type": "signal", "value": "buy"}
-        
+
         Input:  "BTC MACRO 1M TREND - BEARISH"
         Output: {"symbol": "BTC", "type": "macro", "indicator": "trend", "value": "bearish"}
-        
+
         Input:  "USDT.D MACRO 1M MACD - BULLISH"
         Output: {"symbol": "USDT.D", "type": "macro", "indicator": "macd", "value": "bullish"}
     """
-    
-    if not message or not message.strip():
+
+    cached = _results.get(message)
+    if cached is not None:
+        # Kopie, damit Aufrufer das Ergebnis verändern dürfen
+        return cached.copy()
+
+    if not message:
         logger.warning("Leere Webhook-Nachricht empfangen")
         return None
-    
+
+    raw = message
     message = message.strip()
-    
-    # ===== MACRO PATTERN =====
-    # Format: "BTC MACRO 1M TREND - BEARISH" or "USDT.D MACRO 1M MACD - BULLISH"
-    macro_pattern = r"([A-Z0-9\.]+)\s+MACRO\s+1M\s+(TREND|MACD)\s*-\s*(BULLISH|BEARISH)"
-    macro_match = re.match(macro_pattern, message, re.IGNORECASE)
-    
-    if macro_match:
-        symbol = macro_match.group(1).upper()
-        indicator = macro_match.group(2).lower()  # "trend" or "macd"
-        value = macro_match.group(3).lower()      # "bullish" or "bearish"
-        
-        result = {
-            "symbol": symbol,
-            "type": "macro",
-            "indicator": indicator,
-            "value": value
-        }
-        logger.info(f"✅ Macro Webhook geparst: {result}")
-        return result
-    
-    # ===== STANDARD PATTERN =====
-    # Pattern: SYMBOL, TIMEFRAME - VALUE
-    # Erfasst: Gruppe 1 = Symbol, Gruppe 2 = Timeframe, Gruppe 3 = Wert
-    pattern = r"([A-Z0-9\.]+),\s*(\d+[WDMH])\s*-\s*(.+)"
-    match = re.match(pattern, message, re.IGNORECASE)
-    
-    if not match:
-        logger.warning(f"Ungültiges Webhook-Format: {message}")
+    if not message:
+        logger.warning("Leere Webhook-Nachricht empfangen")
         return None
-    
-    symbol = match.group(1).upper()
-    timeframe = match.group(2).lower()
-    value_raw = match.group(3).strip()
-    
-    # Normalisiere Timeframe (1w, 3d, 1d, etc.)
-    # Akzeptiere auch andere wie 4h, 1h, etc.
-    
-    # Bestimme Typ und Wert
-    value_lower = value_raw.lower()
-    
-    if "uptrend" in value_lower:
-        result = {
-            "symbol": symbol,
-            "timeframe": timeframe,
-            "type": "trend",
-            "value": "uptrend"
-        }
-    elif "downtrend" in value_lower:
-        result = {
-            "symbol": symbol,
-            "timeframe": timeframe,
-            "type": "trend",
-            "value": "downtrend"
-        }
-    elif "buy signal" in value_lower or "buy" in value_lower:
-        result = {
-            "symbol": symbol,
-            "timeframe": timeframe,
-            "type": "signal",
-            "value": "buy"
-        }
-    elif "sell signal" in value_lower or "sell" in value_lower:
+
+    match = WEBHOOK_PATTERN.match(message)
+    if match is None:
+        logger.warning("Ungültiges Webhook-Format: %s", message)
+        return None
+
+    symbol, timeframe, value_raw, indicator, macro_value = match.groups()
+
+    # ===== MACRO =====
+    if indicator is not None:
         result = {
-            "symbol": symbol,
-            "timeframe": timeframe,
-            "type": "signal",
-            "value": "sell"
+            "symbol": _intern(symbol, _upper, str.upper),
+            "type": "macro",
+            "indicator": _intern(indicator, _lower, str.lower),    # "trend" or "macd"
+            "value": _intern(macro_value, _lower, str.lower)       # "bullish" or "bearish"
         }
-    else:
-        logger.warning(f"Unbekannter Wert in Webhook: {value_raw}")
+        logger.debug("✅ Macro Webhook geparst: %s", result)
+        return _remember(raw, result)
+
+    # ===== STANDARD =====
+    value_raw = value_raw.strip()
+    classified = classify_value(value_raw)
+    if classified is None:
+        logger.warning("Unbekannter Wert in Webhook: %s", value_raw)
         return None
-    
-    logger.info(f"✅ Webhook geparst: {result}")
-    return result
+
+    result = {
+        "symbol": _intern(symbol, _upper, str.upper),
+        "timeframe": _intern(timeframe, _lower, str.lower),
+        "type": classified[0],
+        "value": classified[1]
+    }
+    logger.debug("✅ Webhook geparst: %s", result)
+    return _remember(raw, result)
+
+
+def parse_many(lines: Union[str, Iterable[str]]) -> List[Optional[Dict]]:
+    """
+    Parst mehrere Nachrichten, z.B. einen mehrzeiligen Webhook-Body.
+
+    Args:
+        lines: Text mit einer Nachricht pro Zeile oder eine Liste von Zeilen
+
+    Returns:
+        Ein Eintrag pro nicht-leerer Zeile (None bei ungültigem Format)
+    """
+    if isinstance(lines, str):
+        lines = lines.splitlines()
+    return [parse_webhook(line) for line in lines if line and not line.isspace()]
@@ -0,0 +1,5 @@
+"""
+Benchmarks für das Trading Dashboard
+Startet die App gegen ein temporäres DATA_DIR und misst per HTTP.
+Nur Standardbibliothek, damit die Messung auf jeder Linux-Box läuft.
+"""
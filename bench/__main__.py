@@ -0,0 +1,266 @@
+"""
+Benchmark-Suite: gemischter Webhook- und Dashboard-Traffic, vergleichbar zwischen Commits
+
+Pro Runde ein frischer Server (uvicorn-Subprozess, temporäres DATA_DIR):
+    1. Warmup (nicht gemessen): ein Candle-Close über alle Symbole, damit
+       der State gefüllt ist, plus je ein GET pro Lese-Endpoint
+    2. Messung über --duration Sekunden, alles gleichzeitig:
+       - POST /webhook:    zufällige Alerts mit fester Rate (open loop,
+                           Latenz ab geplantem Sendezeitpunkt)
+       - candle_close:     alle --candle-interval Sekunden ein Burst wie
+                           beim Tages-Close (3 Trends pro Symbol plus
+                           Signale), Latenz ab Beginn des Bursts
+       - GET /api/coins, GET /api/macro: je --pollers Dashboard-Leser
+
+Pro Endpoint: Anzahl, Fehler, Statuscodes, Durchsatz und p50/p95/p99/max.
+Bei mehreren Runden steht oben der Median je Kennzahl, die einzelnen
+Runden unter "rounds". Alles ist per --seed deterministisch; "meta" nennt
+Commit, Python und Maschine, damit Reports vergleichbar bleiben.
+--compare meldet nur Verschlechterungen über --threshold, bei denen sich
+die Runden beider Reports nicht überlappen (mehr Runden: weniger Rauschen).
+
+Usage:
+    python -m bench --out before.json
+    python -m bench --out after.json          # nach der Änderung
+    python -m bench --compare before.json after.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from ._http import HttpConnection
+from ._server import REPO_ROOT, running_app
+from ._stats import summarize
+from .alerts import candle_close_burst, make_symbols, random_alert
+
+READ_PATHS = ("/api/coins", "/api/macro")
+COMPARED = ("rps", "p50_ms", "p95_ms", "p99_ms")
+
+
+class Recorder:
+    """Latenzen und Statuscodes pro Endpoint"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.statuses = {}
+
+    def add(self, name: str, status, latency: float):
+        counts = self.statuses.setdefault(name, {})
+        counts[status] = counts.get(status, 0) + 1
+        if isinstance(status, int) and status < 400:
+            self.latencies.setdefault(name, []).append(latency)
+
+    def report(self, name: str, duration: float) -> dict:
+        counts = self.statuses.get(name, {})
+        errors = sum(count for status, count in counts.items() if not isinstance(status, int) or status >= 400)
+        result = summarize(self.latencies.get(name, []), duration, errors)
+        result["statuses"] = {str(status): count for status, count in sorted(counts.items(), key=str)}
+        return result
+
+
+async def webhooks(port: int, args, symbols, recorder: Recorder):
+    """Gleichmäßige Alerts plus Candle-Close-Bursts über einen Verbindungspool"""
+    rng = random.Random(args.seed)
+    pool: asyncio.Queue = asyncio.Queue()
+    for _ in range(args.connections):
+        pool.put_nowait(HttpConnection(port))
+    tasks = []
+
+    async def send(name: str, message: str, scheduled: float):
+        conn = await pool.get()
+        try:
+            status, _, _ = await conn.request("POST", "/webhook", message.encode(), {"Content-Type": "text/plain"})
+        except Exception:
+            status = "error"
+        finally:
+            pool.put_nowait(conn)
+        recorder.add(name, status, time.perf_counter() - scheduled)
+
+    start = time.perf_counter()
+    next_candle = start + args.candle_interval
+    sent = 0
+    while sent / args.rate < args.duration:
+        scheduled = start + sent / args.rate
+        if next_candle <= scheduled:
+            for message in candle_close_burst(rng, symbols):
+                tasks.append(asyncio.create_task(send("candle_close", message, next_candle)))
+            next_candle += args.candle_interval
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(send("POST /webhook", random_alert(rng, symbols), scheduled)))
+        sent += 1
+
+    await asyncio.gather(*tasks)
+    while not pool.empty():
+        await pool.get_nowait().close()
+
+
+async def reader(port: int, path: str, duration: float, interval: float, recorder: Recorder):
+    conn = HttpConnection(port)
+    deadline = time.perf_counter() + duration
+    try:
+        while time.perf_counter() < deadline:
+            sent = time.perf_counter()
+            try:
+                status, _, _ = await conn.request("GET", path)
+            except Exception:
+                status = "error"
+            recorder.add(f"GET {path}", status, time.perf_counter() - sent)
+            await asyncio.sleep(interval)
+    finally:
+        await conn.close()
+
+
+async def warmup(port: int, symbols, seed: int):
+    conn = HttpConnection(port)
+    try:
+        for message in candle_close_burst(random.Random(seed + 1), symbols):
+            await conn.request("POST", "/webhook", message.encode(), {"Content-Type": "text/plain"})
+        for path in READ_PATHS:
+            await conn.request("GET", path)
+    finally:
+        await conn.close()
+
+
+async def run_round(args) -> dict:
+    symbols = make_symbols(args.symbols)
+    recorder = Recorder()
+    with running_app() as port:
+        await warmup(port, symbols, args.seed)
+        start = time.perf_counter()
+        jobs = [webhooks(port, args, symbols, recorder)]
+        for path in READ_PATHS:
+            jobs += [reader(port, path, args.duration, args.poll_interval, recorder) for _ in range(args.pollers)]
+        await asyncio.gather(*jobs)
+        elapsed = time.perf_counter() - start
+    names = ["POST /webhook", "candle_close"] + [f"GET {path}" for path in READ_PATHS]
+    return {name: recorder.report(name, elapsed) for name in names}
+
+
+def median_of(rounds: list) -> dict:
+    """Median je Endpoint und Kennzahl über alle Runden (Zähler: Summe)"""
+    merged = {}
+    for name in rounds[0]:
+        results = [r[name] for r in rounds]
+        entry = {key: round(statistics.median(r[key] for r in results), 3)
+                 for key in ("rps", "p50_ms", "p95_ms", "p99_ms", "max_ms")}
+        entry["count"] = sum(r["count"] for r in results)
+        entry["errors"] = sum(r["errors"] for r in results)
+        merged[name] = entry
+    return merged
+
+
+def git_revision() -> dict:
+    def git(*cmd):
+        try:
+            return subprocess.run(["git", *cmd], cwd=REPO_ROOT, capture_output=True, text=True, timeout=10).stdout.strip()
+        except OSError:
+            return ""
+    return {"commit": git("rev-parse", "--short", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def meta() -> dict:
+    return {
+        **git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def compare(before: dict, after: dict, threshold: float) -> dict:
+    """
+    Änderung je Endpoint und Kennzahl in Prozent (Median der Runden).
+
+    Eine Regression ist eine Verschlechterung (weniger rps, mehr Latenz) um
+    mehr als threshold Prozent, bei der sich die Werte der einzelnen Runden
+    beider Reports nicht überlappen; alles andere gilt als Rauschen.
+
+    Returns:
+        Report mit "changes" und "regressions"
+    """
+    changes, regressions = {}, []
+    for name, new in after["results"].items():
+        old = before["results"].get(name)
+        if old is None:
+            continue
+        changes[name] = {}
+        for key in COMPARED:
+            change = round((new[key] - old[key]) / old[key] * 100, 1) if old[key] else None
+            old_rounds = [r[name][key] for r in before.get("rounds", []) if name in r] or [old[key]]
+            new_rounds = [r[name][key] for r in after.get("rounds", []) if name in r] or [new[key]]
+            if key == "rps":
+                separated = max(new_rounds) < min(old_rounds)
+            else:
+                separated = min(new_rounds) > max(old_rounds)
+            changes[name][key] = {"before": old[key], "after": new[key], "change_pct": change,
+                                  "rounds_overlap": not separated}
+            worse = -change if key == "rps" else change
+            if change is not None and worse > threshold and separated:
+                regressions.append(f"{name} {key}: {old[key]} -> {new[key]} ({change:+}%)")
+    report = {
+        "benchmark": "compare",
+        "before": before.get("meta"),
+        "after": after.get("meta"),
+        "threshold_pct": threshold,
+        "changes": changes,
+        "regressions": regressions,
+    }
+    if before.get("config") != after.get("config"):
+        report["warning"] = "config differs, results are not comparable"
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m bench", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=20, help="Gemessene Sekunden pro Runde")
+    parser.add_argument("--rounds", type=int, default=3, help="Runden mit frischem Server (Median)")
+    parser.add_argument("--rate", type=float, default=200, help="Gleichmäßige Alerts pro Sekunde")
+    parser.add_argument("--symbols", type=int, default=100, help="Coins im State und in den Bursts")
+    parser.add_argument("--candle-interval", type=float, default=5, help="Sekunden zwischen Candle-Close-Bursts")
+    parser.add_argument("--connections", type=int, default=64, help="Keep-Alive Verbindungen für Webhooks")
+    parser.add_argument("--pollers", type=int, default=5, help="Leser pro Lese-Endpoint")
+    parser.add_argument("--poll-interval", type=float, default=0.1, help="Pause zwischen Polls in Sekunden")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="Report zusätzlich in diese Datei schreiben")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+                        help="Zwei Reports vergleichen statt zu messen; Exit-Code 1 bei Regressionen")
+    parser.add_argument("--threshold", type=float, default=10, help="Regression ab dieser Abweichung in Prozent")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f_before, open(args.compare[1]) as f_after:
+            report = compare(json.load(f_before), json.load(f_after), args.threshold)
+        print(json.dumps(report, indent=2))
+        sys.exit(1 if report["regressions"] else 0)
+
+    config = {key: value for key, value in vars(args).items() if key not in ("out", "compare", "threshold")}
+    rounds = [asyncio.run(run_round(args)) for _ in range(args.rounds)]
+    report = {
+        "benchmark": "suite",
+        "meta": meta(),
+        "config": config,
+        "results": median_of(rounds),
+        "rounds": rounds,
+    }
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
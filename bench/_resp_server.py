@@ -0,0 +1,78 @@
+"""
+Minimaler Redis-Stand-in (nur Pub/Sub) für Tests ohne Redis-Server
+
+Versteht PING, SUBSCRIBE, UNSUBSCRIBE und PUBLISH im RESP-Protokoll.
+Reicht für app.bus.RedisBus; kein Ersatz für Redis im Betrieb.
+"""
+
+import asyncio
+import threading
+from typing import Dict, Set
+
+from app.bus import encode_command, read_reply
+
+
+def _bulk(data: bytes) -> bytes:
+    return b"$%d\r\n%s\r\n" % (len(data), data)
+
+
+class RespPubSubServer:
+    """Läuft in einem eigenen Thread mit eigenem Event-Loop"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self._subscribers: Dict[bytes, Set[asyncio.StreamWriter]] = {}
+        self._loop = asyncio.new_event_loop()
+        self._started = threading.Event()
+        self._server = None
+
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        channels = set()
+        try:
+            while True:
+                command = await read_reply(reader)
+                name = command[0].upper()
+                if name == b"PING":
+                    writer.write(b"+PONG\r\n")
+                elif name == b"SUBSCRIBE":
+                    for channel in command[1:]:
+                        channels.add(channel)
+                        self._subscribers.setdefault(channel, set()).add(writer)
+                        writer.write(b"*3\r\n" + _bulk(b"subscribe") + _bulk(channel) + b":%d\r\n" % len(channels))
+                elif name == b"UNSUBSCRIBE":
+                    for channel in command[1:] or list(channels):
+                        channels.discard(channel)
+                        self._subscribers.get(channel, set()).discard(writer)
+                elif name == b"PUBLISH":
+                    channel, data = command[1], command[2]
+                    receivers = self._subscribers.get(channel, set())
+                    message = encode_command(b"message", channel, data)
+                    for receiver in receivers:
+                        receiver.write(message)
+                    writer.write(b":%d\r\n" % len(receivers))
+                else:
+                    writer.write(b"-ERR unknown command\r\n")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for channel in channels:
+                self._subscribers.get(channel, set()).discard(writer)
+            writer.close()
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(asyncio.start_server(self._client, self.host, self.port))
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started.set()
+        self._loop.run_forever()
+
+    def start(self) -> str:
+        """Startet den Server und liefert die URL für CLUSTER_BUS_URL"""
+        threading.Thread(target=self._run, name="resp-standin", daemon=True).start()
+        self._started.wait()
+        return f"redis://{self.host}:{self.port}"
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._server.close)
+        self._loop.call_soon_threadsafe(self._loop.stop)
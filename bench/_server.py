@@ -0,0 +1,92 @@
+"""
+Startet die App als uvicorn-Subprozess gegen ein temporäres DATA_DIR
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from contextlib import contextmanager
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    """Freien lokalen TCP-Port finden"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(port: int, timeout: float = 20.0, path: str = "/readyz"):
+    """Pollt bis die App antwortet"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.05)
+    raise RuntimeError(f"Server auf Port {port} nicht bereit nach {timeout}s")
+
+
+@contextmanager
+def _data_dir(path: str = None):
+    """Vorhandenes Verzeichnis nutzen oder ein temporäres anlegen"""
+    if path:
+        yield path
+        return
+    with tempfile.TemporaryDirectory(prefix="dashboard-bench-") as tmp:
+        yield tmp
+
+
+@contextmanager
+def running_app(env: dict = None, workers: int = 1, wait: bool = True, data_dir: str = None,
+                app: str = "app.main:app"):
+    """
+    Context Manager: App in eigenem Prozess, per Default mit frischer SQLite-Datei.
+
+    Args:
+        data_dir: Vorhandenes DATA_DIR (z.B. mit generierter Historie)
+        app: ASGI-App für uvicorn (z.B. eine Vergleichs-App aus dem Benchmark)
+
+    Yields:
+        Port, auf dem die App lauscht
+    """
+    port = free_port()
+    with _data_dir(data_dir) as data_dir:
+        process_env = dict(os.environ)
+        process_env.pop("DATABASE_URL", None)
+        process_env["DATA_DIR"] = data_dir
+        # Lastgeneratoren senden alles von 127.0.0.1: Rate Limits nur, wenn ein
+        # Benchmark sie ausdrücklich einschaltet (bench.webhook_flood)
+        process_env.setdefault("ADMISSION_ENABLED", "0")
+        process_env.update(env or {})
+
+        cmd = [
+            sys.executable, "-m", "uvicorn", app,
+            "--host", "127.0.0.1", "--port", str(port),
+            "--log-level", "warning", "--no-access-log",
+        ]
+        if workers > 1:
+            cmd += ["--workers", str(workers)]
+
+        process = subprocess.Popen(
+            cmd, cwd=REPO_ROOT, env=process_env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            if wait:
+                wait_until_ready(port)
+            yield port
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
@@ -0,0 +1,32 @@
+"""
+Latenz-Statistiken für Benchmark-Reports
+"""
+
+from typing import Dict, List
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank Perzentil einer bereits sortierten Liste"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies: List[float], duration: float, errors: int = 0) -> Dict:
+    """
+    Fasst Latenzen (Sekunden) zu einem JSON-tauglichen Report zusammen.
+
+    Returns:
+        Dict mit count, errors, rps und p50/p95/p99/max in Millisekunden
+    """
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "errors": errors,
+        "rps": round(len(values) / duration, 1) if duration > 0 else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+    }
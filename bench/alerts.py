@@ -0,0 +1,37 @@
+"""
+Realistische TradingView-Alerts für Benchmarks
+"""
+
+import random
+from typing import Iterator, List
+
+TREND_TIMEFRAMES = ["1W", "3D", "1D"]
+MACRO_SYMBOLS = ["BTC", "USDT.D", "TOTAL", "TOTAL2", "TOTAL3", "OTHERS"]
+
+
+def make_symbols(count: int) -> List[str]:
+    """Erzeugt Perpetual-Symbole wie "COIN0001USDT.P" """
+    return [f"COIN{i:04d}USDT.P" for i in range(count)]
+
+
+def random_alert(rng: random.Random, symbols: List[str]) -> str:
+    """Ein einzelner Alert: ~70% Trends, ~25% Signale, ~5% Macro"""
+    roll = rng.random()
+    if roll < 0.70:
+        direction = rng.choice(("UPTREND", "DOWNTREND"))
+        return f"{rng.choice(symbols)}, {rng.choice(TREND_TIMEFRAMES)} - {direction}"
+    if roll < 0.95:
+        side = rng.choice(("Buy", "Sell"))
+        return f"{rng.choice(symbols)}, 1D - {side} Signal"
+    indicator = rng.choice(("TREND", "MACD"))
+    value = rng.choice(("BULLISH", "BEARISH"))
+    return f"{rng.choice(MACRO_SYMBOLS)} MACRO 1M {indicator} - {value}"
+
+
+def candle_close_burst(rng: random.Random, symbols: List[str]) -> Iterator[str]:
+    """Alle Alerts eines Tages-Candle-Close: Trends pro Timeframe plus einige Signale"""
+    for symbol in symbols:
+        for timeframe in TREND_TIMEFRAMES:
+            yield f"{symbol}, {timeframe} - {rng.choice(('UPTREND', 'DOWNTREND'))}"
+        if rng.random() < 0.3:
+            yield f"{symbol}, 1D - {rng.choice(('Buy', 'Sell'))} Signal"
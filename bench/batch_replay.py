@@ -0,0 +1,101 @@
+"""
+Bulk-Replay: einzelne POST /webhook vs. POST /webhook/batch
+
+Spielt dieselben Alerts (z.B. einen ganzen Tag) einmal als einzelne
+Requests und einmal in Batches ein und misst jeweils die Zeit bis alle
+Alerts in webhook_events persistiert sind.
+
+Usage:
+    python -m bench.batch_replay --alerts 20000 --batch-size 500
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from ._http import HttpConnection
+from ._server import running_app
+from .alerts import make_symbols, random_alert
+
+
+async def wait_persisted(conn: HttpConnection, expected: int, timeout: float = 120.0):
+    """Wartet bis die höchste Event-ID expected erreicht (frische DB)"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        _, _, body = await conn.request("GET", "/api/history?order=desc&limit=1")
+        events = json.loads(body)["events"]
+        if events and events[0]["id"] >= expected:
+            return
+        await asyncio.sleep(0.01)
+    raise TimeoutError(f"{expected} Events nicht rechtzeitig persistiert")
+
+
+async def replay_single(port: int, alerts, connections: int) -> dict:
+    conns = [HttpConnection(port) for _ in range(connections)]
+    errors = 0
+
+    async def worker(conn: HttpConnection, chunk):
+        nonlocal errors
+        for message in chunk:
+            status, _, _ = await conn.request("POST", "/webhook", message.encode(), {"Content-Type": "text/plain"})
+            errors += status >= 400
+
+    began = time.perf_counter()
+    await asyncio.gather(*(worker(conn, alerts[i::connections]) for i, conn in enumerate(conns)))
+    acked = time.perf_counter() - began
+    await wait_persisted(conns[0], len(alerts))
+    persisted = time.perf_counter() - began
+    for conn in conns:
+        await conn.close()
+    return {"requests": len(alerts), "errors": errors, "acked_seconds": round(acked, 3),
+            "persisted_seconds": round(persisted, 3), "alerts_per_second": round(len(alerts) / persisted)}
+
+
+async def replay_batch(port: int, alerts, batch_size: int) -> dict:
+    conn = HttpConnection(port)
+    errors = requests = 0
+    began = time.perf_counter()
+    for i in range(0, len(alerts), batch_size):
+        body = "\n".join(alerts[i:i + batch_size]).encode()
+        status, _, response = await conn.request("POST", "/webhook/batch", body, {"Content-Type": "text/plain"})
+        requests += 1
+        errors += json.loads(response)["rejected"] if status == 200 else batch_size
+    acked = time.perf_counter() - began
+    await wait_persisted(conn, len(alerts))
+    persisted = time.perf_counter() - began
+    await conn.close()
+    return {"requests": requests, "errors": errors, "acked_seconds": round(acked, 3),
+            "persisted_seconds": round(persisted, 3), "alerts_per_second": round(len(alerts) / persisted)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--alerts", type=int, default=20000)
+    parser.add_argument("--symbols", type=int, default=300)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--connections", type=int, default=8, help="Parallele Verbindungen für Einzel-Requests")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    symbols = make_symbols(args.symbols)
+    alerts = [random_alert(rng, symbols) for _ in range(args.alerts)]
+
+    report = {"benchmark": "batch_replay", "config": vars(args), "results": {}}
+    # Jede Variante gegen eine frische Datenbank; Dedup aus, damit jeder Alert persistiert wird
+    env = {"DEDUP_WINDOW_SECONDS": "0"}
+    with running_app(env=env) as port:
+        report["results"]["single"] = asyncio.run(replay_single(port, alerts, args.connections))
+    with running_app(env=env) as port:
+        report["results"]["batch"] = asyncio.run(replay_batch(port, alerts, args.batch_size))
+
+    single = report["results"]["single"]["persisted_seconds"]
+    batch = report["results"]["batch"]["persisted_seconds"]
+    report["speedup"] = round(single / batch, 1) if batch else None
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
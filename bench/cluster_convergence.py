@@ -0,0 +1,180 @@
+"""
+Cluster-Konvergenz: N Worker auf einem gemeinsamen DATA_DIR
+
+Startet N App-Prozesse mit CLUSTER_MODE=1 (je ein Port, gemeinsame
+SQLite-Datei), schickt Webhooks an zufällige Worker und prüft, dass
+danach alle Worker denselben Stand liefern (gleiche Sequenz und gleiche
+ETags für /api/coins und /api/macro). Optional wird mittendrin der Writer
+hart beendet (--failover), um die Neuwahl zu prüfen.
+
+Usage:
+    python -m bench.cluster_convergence --workers 4 --webhooks 2000
+    python -m bench.cluster_convergence --bus redis --failover
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import tempfile
+import time
+from contextlib import ExitStack
+
+from ._http import HttpConnection
+from ._resp_server import RespPubSubServer
+from ._server import running_app, wait_until_ready
+from .alerts import make_symbols, random_alert
+
+
+async def fetch_json(conn: HttpConnection, path: str) -> dict:
+    _, _, body = await conn.request("GET", path)
+    return json.loads(body)
+
+
+async def worker_view(port: int) -> dict:
+    """Cluster-Status und Payload-ETags eines Workers"""
+    conn = HttpConnection(port)
+    try:
+        health = await fetch_json(conn, "/health")
+        _, coins_headers, _ = await conn.request("GET", "/api/coins")
+        _, macro_headers, _ = await conn.request("GET", "/api/macro")
+    finally:
+        await conn.close()
+    cluster = health["cluster"]
+    return {
+        "port": port,
+        "pid": int(cluster["worker_id"].split("-")[0]),
+        "role": cluster["role"],
+        "epoch": cluster["epoch"],
+        "seq": cluster["seq"],
+        "synced": cluster["synced"],
+        "gaps": cluster["gaps"],
+        "resyncs": cluster["resyncs"],
+        "forwarded": cluster["forwarded"],
+        "coins_etag": coins_headers.get("etag"),
+        "macro_etag": macro_headers.get("etag"),
+    }
+
+
+async def views(ports) -> list:
+    return await asyncio.gather(*(worker_view(port) for port in ports))
+
+
+def converged(snapshot: list) -> bool:
+    """Genau ein Writer und überall dieselbe Epoche, Sequenz und Payloads"""
+    first = snapshot[0]
+    if sum(view["role"] == "writer" for view in snapshot) != 1:
+        return False
+    return all(
+        view["synced"] and view["epoch"] == first["epoch"] and view["seq"] == first["seq"]
+        and view["coins_etag"] == first["coins_etag"] and view["macro_etag"] == first["macro_etag"]
+        for view in snapshot
+    )
+
+
+async def fire(ports, alerts, rng: random.Random, concurrency: int) -> dict:
+    conns = {port: [HttpConnection(port) for _ in range(concurrency)] for port in ports}
+    queue = list(alerts)
+    sent = errors = 0
+
+    async def client(slot: int):
+        nonlocal sent, errors
+        while queue:
+            message = queue.pop()
+            port = rng.choice(ports)
+            try:
+                status, _, _ = await conns[port][slot].request(
+                    "POST", "/webhook", message.encode(), {"Content-Type": "text/plain"})
+                errors += status >= 400
+            except (ConnectionError, OSError, asyncio.IncompleteReadError):
+                errors += 1
+            sent += 1
+
+    began = time.perf_counter()
+    await asyncio.gather(*(client(slot) for slot in range(concurrency)))
+    for port_conns in conns.values():
+        for conn in port_conns:
+            await conn.close()
+    return {"sent": sent, "errors": errors, "seconds": round(time.perf_counter() - began, 3)}
+
+
+async def wait_converged(ports, timeout: float) -> tuple:
+    began = time.perf_counter()
+    while True:
+        snapshot = await views(ports)
+        if converged(snapshot):
+            return True, round(time.perf_counter() - began, 3), snapshot
+        if time.perf_counter() - began > timeout:
+            return False, round(time.perf_counter() - began, 3), snapshot
+        await asyncio.sleep(0.05)
+
+
+async def run(args, ports) -> dict:
+    rng = random.Random(args.seed)
+    symbols = make_symbols(args.symbols)
+    alerts = [random_alert(rng, symbols) for _ in range(args.webhooks)]
+    report = {}
+
+    ok, seconds, snapshot = await wait_converged(ports, args.timeout)
+    report["startup"] = {"converged": ok, "seconds": seconds}
+
+    if args.failover:
+        # Erste Hälfte, dann den Writer hart beenden (SIGKILL), dann den Rest
+        half = len(alerts) // 2
+        report["load_before_failover"] = await fire(ports, alerts[:half], rng, args.concurrency)
+        writer = next(view for view in await views(ports) if view["role"] == "writer")
+        os.kill(writer["pid"], signal.SIGKILL)
+        ports.remove(writer["port"])
+        killed_at = time.perf_counter()
+        ok, seconds, snapshot = await wait_converged(ports, args.timeout)
+        report["failover"] = {
+            "killed_port": writer["port"],
+            "after_webhooks": half,
+            "new_writer_converged": ok,
+            "seconds_until_converged": round(time.perf_counter() - killed_at, 3),
+        }
+        alerts = alerts[half:]
+
+    report["load"] = await fire(ports, alerts, rng, args.concurrency)
+    ok, seconds, snapshot = await wait_converged(ports, args.timeout)
+    report["converged"] = ok
+    report["convergence_seconds"] = seconds
+    report["workers"] = snapshot
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--webhooks", type=int, default=2000)
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4, help="Parallele Requests pro Worker")
+    parser.add_argument("--bus", choices=("local", "redis"), default="local",
+                        help="redis = RESP-Stand-in aus bench/_resp_server.py")
+    parser.add_argument("--failover", action="store_true", help="Writer nach der Hälfte hart beenden")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    report = {"benchmark": "cluster_convergence", "config": vars(args)}
+    with tempfile.TemporaryDirectory(prefix="dashboard-cluster-") as data_dir, ExitStack() as stack:
+        env = {"CLUSTER_MODE": "1", "DEDUP_WINDOW_SECONDS": "0"}
+        if args.bus == "redis":
+            server = RespPubSubServer()
+            env["CLUSTER_BUS_URL"] = server.start()
+            stack.callback(server.stop)
+        # Ersten Worker allein starten (legt die Datenbank an und wird Writer)
+        ports = [stack.enter_context(running_app(env=env, data_dir=data_dir))]
+        ports += [stack.enter_context(running_app(env=env, data_dir=data_dir, wait=False))
+                  for _ in range(args.workers - 1)]
+        for port in ports[1:]:
+            wait_until_ready(port)
+        report.update(asyncio.run(run(args, ports)))
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
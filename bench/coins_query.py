@@ -0,0 +1,106 @@
+"""
+/api/coins Benchmark mit vielen Symbolen (im Prozess, ohne Server)
+
+Baut einen StateStore mit N Coins, spielt zufällige Alerts ein und misst
+Latenz und Größe der Antworten:
+    - full:           kompletter Payload (wie bisher, ohne Cache-Treffer)
+    - page:           eine Seite (limit) per Cursor, Sortierung display_name
+    - filter_common:  häufiger Filter (trend_1w=uptrend, ~50%), eine Seite
+    - filter_rare:    seltener Filter (alle Timeframes uptrend + buy), komplett
+    - since:          nur die Änderungen seit der letzten Version (Polling)
+    - sparse:         alle Coins, nur symbol und trends
+
+Usage:
+    python -m bench.coins_query --symbols 5000 --limit 100
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from .alerts import make_symbols, random_alert
+
+
+def timed(fn, repeat: int) -> dict:
+    """Mittlere Latenz und Größe des kodierten Payloads"""
+    from app.serializers import dumps
+    body = dumps(fn())
+    began = time.perf_counter()
+    for _ in range(repeat):
+        dumps(fn())
+    return {"ms": round((time.perf_counter() - began) / repeat * 1000, 3), "bytes": len(body)}
+
+
+def run(symbol_count: int, update_count: int, limit: int, changes: int, seed: int) -> dict:
+    from app import api
+    from app.ingest import build_update
+    from app.state import CoinRecord, StateStore
+    from app.webhook_parser import parse_webhook
+
+    rng = random.Random(seed)
+    symbols = make_symbols(symbol_count)
+    started_at = datetime(2024, 1, 1)
+    store = StateStore()
+    store.coins = {symbol: CoinRecord(symbol, symbol.replace("USDT.P", ""), started_at) for symbol in symbols}
+    store.index.rebuild(store.coins.values())
+
+    def apply_random(count: int, offset: int):
+        applied = 0
+        while applied < count:
+            parsed = parse_webhook(random_alert(rng, symbols))
+            if parsed["type"] != "macro":
+                store.apply(build_update(parsed, started_at + timedelta(seconds=offset + applied)))
+                applied += 1
+
+    began = time.perf_counter()
+    apply_random(update_count, 0)
+    apply_us = (time.perf_counter() - began) / update_count * 1e6
+
+    # Die Endpoint-Funktionen lesen den globalen State
+    api.state = store
+    repeat = 20
+    results = {"apply_us": round(apply_us, 2)}
+    results["full"] = timed(api.build_coins_payload, repeat)
+    first_page = api.build_coins_page({}, None, "display_name", False, None, limit, None)
+    results["page"] = timed(
+        lambda: api.build_coins_page({}, None, "display_name", False, first_page["next_cursor"], limit, None), repeat)
+    results["filter_common"] = timed(
+        lambda: api.build_coins_page({"trend_1w": "uptrend"}, None, "display_name", False, None, limit, None), repeat)
+    rare = {"trend_1w": "uptrend", "trend_3d": "uptrend", "trend_1d": "uptrend", "last_signal_type": "buy"}
+    results["filter_rare"] = timed(
+        lambda: api.build_coins_page(rare, None, "symbol", False, None, 10000, None), repeat)
+    results["filter_rare"]["coins"] = len(api.build_coins_page(rare, None, "symbol", False, None, 10000, None)["coins"])
+
+    token = store.index.token
+    apply_random(changes, update_count)
+    results["since"] = timed(lambda: api.build_coins_changes(token, None), repeat)
+    results["since"]["coins"] = len(api.build_coins_changes(token, None)["coins"])
+    results["sparse"] = timed(lambda: {"coins": api.select_fields(store.coin_rows(), ["symbol", "trends"])}, repeat)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", default="1000,5000", help="Kommagetrennte Coin-Anzahlen")
+    parser.add_argument("--updates", type=int, default=20_000)
+    parser.add_argument("--limit", type=int, default=100, help="Seitengröße")
+    parser.add_argument("--changes", type=int, default=50, help="Alerts zwischen zwei since-Polls")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    report = {"benchmark": "coins_query", "config": vars(args), "results": {}}
+    with tempfile.TemporaryDirectory(prefix="dashboard-coins-") as data_dir:
+        # app.database legt beim Import das Datenverzeichnis an
+        os.environ.setdefault("DATA_DIR", data_dir)
+        for count in [int(c) for c in args.symbols.split(",")]:
+            report["results"][f"{count}_symbols"] = run(count, args.updates, args.limit, args.changes, args.seed)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
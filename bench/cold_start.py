@@ -0,0 +1,157 @@
+"""
+Kaltstart: Zeit vom Prozess-Start bis zum ersten 200 auf POST /webhook
+
+Startet die App wiederholt als uvicorn-Subprozess und schickt ab dem
+ersten Moment alle paar Millisekunden einen Alert. Gemessen wird pro Lauf:
+    - first_webhook_ms:  Prozess-Start bis zum ersten 200 auf /webhook
+    - ready_ms:          Prozess-Start bis /readyz 200 (DB und State geladen)
+    - applied:           der erste angenommene Alert ist danach im State
+
+Szenarien:
+    - fresh:    leeres DATA_DIR (Schema anlegen, Seed-Daten)
+    - restart:  dasselbe DATA_DIR erneut (Deploy/Autoscale mit Volume)
+    - large:    DATA_DIR mit --coins Coins und --events Alerts Historie
+                (vorab per python -m app.replay geschrieben)
+
+Usage:
+    python -m bench.cold_start --runs 5
+    python -m bench.cold_start --coins 5000 --events 200000
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+from ._server import REPO_ROOT, running_app
+from .alerts import make_symbols, random_alert
+
+PROBE_SYMBOL = "COLDSTARTUSDT.P"
+PROBE_INTERVAL = 0.005
+
+
+def post_webhook(port: int, message: str):
+    """Status von POST /webhook oder None, solange der Port nicht offen ist"""
+    request = urllib.request.Request(f"http://127.0.0.1:{port}/webhook", data=message.encode(), method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return None
+
+
+def get_json(port: int, path: str):
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, None
+    except OSError:
+        return None, None
+
+
+def measure(data_dir: str, timeout: float) -> dict:
+    """Ein Start: Alerts schicken bis 200, dann auf /readyz warten"""
+    began = time.perf_counter()
+    with running_app(wait=False, data_dir=data_dir) as port:
+        first_webhook = ready = None
+        statuses = {}
+        deadline = began + timeout
+        while first_webhook is None and time.perf_counter() < deadline:
+            status = post_webhook(port, f"{PROBE_SYMBOL}, 1D - UPTREND")
+            if status is not None:
+                statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                first_webhook = time.perf_counter() - began
+            else:
+                time.sleep(PROBE_INTERVAL)
+        while ready is None and time.perf_counter() < deadline:
+            status, _ = get_json(port, "/readyz")
+            if status == 200:
+                ready = time.perf_counter() - began
+            else:
+                time.sleep(PROBE_INTERVAL)
+        _, payload = get_json(port, "/api/coins")
+        applied = any(
+            coin["symbol"] == PROBE_SYMBOL and coin["trends"].get("1d") == "uptrend"
+            for coin in (payload or {}).get("coins", [])
+        )
+    return {
+        "first_webhook_ms": round(first_webhook * 1000, 1) if first_webhook else None,
+        "ready_ms": round(ready * 1000, 1) if ready else None,
+        "applied": applied,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+def summarize_runs(runs: list) -> dict:
+    summary = {"runs": runs}
+    for key in ("first_webhook_ms", "ready_ms"):
+        values = [run[key] for run in runs if run[key] is not None]
+        if values:
+            summary[key] = {"median": round(statistics.median(values), 1), "min": min(values), "max": max(values)}
+    summary["all_applied"] = all(run["applied"] for run in runs)
+    return summary
+
+
+def populate(data_dir: str, coins: int, events: int, seed: int):
+    """Historie per Replay schreiben (wie eine Instanz nach längerem Betrieb)"""
+    rng = random.Random(seed)
+    symbols = make_symbols(coins)
+    path = os.path.join(data_dir, "alerts.txt")
+    with open(path, "w") as f:
+        # Jeder Coin mindestens einmal, dann zufällige Alerts
+        for symbol in symbols:
+            f.write(f"{symbol}, 1W - UPTREND\n")
+        for _ in range(max(events - coins, 0)):
+            f.write(random_alert(rng, symbols) + "\n")
+    env = dict(os.environ, DATA_DIR=data_dir)
+    env.pop("DATABASE_URL", None)
+    subprocess.run([sys.executable, "-m", "app.replay", path, "--batch-size", "20000"],
+                   cwd=REPO_ROOT, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.remove(path)
+
+
+def run_scenario(name: str, args) -> dict:
+    runs = []
+    with tempfile.TemporaryDirectory(prefix="dashboard-cold-") as data_dir:
+        if name == "large":
+            populate(data_dir, args.coins, args.events, args.seed)
+        elif name == "restart":
+            # Erster Start legt Schema und Seeds an, gemessen werden die folgenden
+            measure(data_dir, args.timeout)
+        for _ in range(args.runs):
+            if name == "fresh":
+                for entry in os.listdir(data_dir):
+                    os.remove(os.path.join(data_dir, entry))
+            runs.append(measure(data_dir, args.timeout))
+    return summarize_runs(runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default="fresh,restart,large", help="Kommagetrennt: fresh, restart, large")
+    parser.add_argument("--runs", type=int, default=5, help="Starts pro Szenario")
+    parser.add_argument("--coins", type=int, default=2000, help="Coins im Szenario large")
+    parser.add_argument("--events", type=int, default=100_000, help="Alerts Historie im Szenario large")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Sekunden pro Start")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    report = {"benchmark": "cold_start", "config": vars(args), "results": {}}
+    for name in args.scenarios.split(","):
+        report["results"][name] = run_scenario(name, args)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Synthetische Webhook-Historie und Range-Query Benchmark
+
+Erzeugt N Events in webhook_events (direkt per sqlite3, ohne HTTP) und misst
+danach GET /api/history für zufällige Symbole und Zeitfenster sowie das
+Durchblättern per Cursor.
+
+Usage:
+    python -m bench.history --rows 1000000 --symbols 500
+    python -m bench.history --rows 20000000 --data-dir /tmp/history   # einmal erzeugen
+    python -m bench.history --data-dir /tmp/history --skip-generate   # erneut messen
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+from ._http import HttpConnection
+from ._server import running_app
+from ._stats import summarize
+from .alerts import make_symbols
+
+# Gleiches Format wie SQLAlchemy DateTime in SQLite
+DB_DATETIME = "%Y-%m-%d %H:%M:%S.%f"
+
+
+def create_schema(db_path: str):
+    """Legt die Tabellen inkl. Indizes über die App-Modelle an"""
+    from sqlalchemy import create_engine
+    from app.database import Base
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+
+def generate(db_path: str, rows: int, symbols: list, days: int, seed: int) -> dict:
+    """
+    Schreibt rows Events chronologisch über days Tage verteilt.
+
+    Returns:
+        Statistik (Zeilen, Dauer, Zeilen/s, Zeitraum)
+    """
+    create_schema(db_path)
+    rng = random.Random(seed)
+    end = datetime.utcnow().replace(microsecond=0)
+    start = end - timedelta(days=days)
+    step = (end - start).total_seconds() / max(rows, 1)
+
+    def events():
+        for i in range(rows):
+            received_at = (start + timedelta(seconds=i * step)).strftime(DB_DATETIME)
+            symbol = rng.choice(symbols)
+            if rng.random() < 0.75:
+                yield (symbol, "trend", rng.choice(("1w", "3d", "1d")), None,
+                       rng.choice(("uptrend", "downtrend")), received_at)
+            else:
+                yield (symbol, "signal", "1d", None, rng.choice(("buy", "sell")), received_at)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    began = time.perf_counter()
+    generator = events()
+    chunk = 100_000
+    written = 0
+    while written < rows:
+        batch = [row for _, row in zip(range(min(chunk, rows - written)), generator)]
+        conn.executemany(
+            "INSERT INTO webhook_events (symbol, type, timeframe, indicator, value, received_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            batch,
+        )
+        conn.commit()
+        written += len(batch)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    elapsed = time.perf_counter() - began
+    return {
+        "rows": written,
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(written / elapsed) if elapsed else 0,
+        "from": start.isoformat() + "Z",
+        "to": end.isoformat() + "Z",
+    }
+
+
+async def run_queries(port: int, symbols: list, days: int, queries: int, pages: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    end = datetime.utcnow()
+    conn = HttpConnection(port)
+    range_latencies, page_latencies, errors = [], [], 0
+
+    began = time.perf_counter()
+    for _ in range(queries):
+        window_start = end - timedelta(days=rng.uniform(1, days))
+        params = {
+            "symbol": rng.choice(symbols),
+            "from": window_start.isoformat() + "Z",
+            "to": (window_start + timedelta(days=1)).isoformat() + "Z",
+            "limit": 100,
+        }
+        sent = time.perf_counter()
+        status, _, _ = await conn.request("GET", "/api/history?" + urlencode(params))
+        if status == 200:
+            range_latencies.append(time.perf_counter() - sent)
+        else:
+            errors += 1
+    range_duration = time.perf_counter() - began
+
+    # Tiefes Blättern: Seite N darf nicht langsamer sein als Seite 1
+    began = time.perf_counter()
+    cursor = None
+    symbol = rng.choice(symbols)
+    for _ in range(pages):
+        params = {"symbol": symbol, "limit": 500}
+        if cursor:
+            params["cursor"] = cursor
+        sent = time.perf_counter()
+        status, _, body = await conn.request("GET", "/api/history?" + urlencode(params))
+        if status != 200:
+            errors += 1
+            break
+        page_latencies.append(time.perf_counter() - sent)
+        cursor = json.loads(body)["next_cursor"]
+        if not cursor:
+            break
+    page_duration = time.perf_counter() - began
+
+    await conn.close()
+    return {
+        "GET /api/history (symbol, 1 day window)": summarize(range_latencies, range_duration, errors),
+        "GET /api/history (cursor pages)": summarize(page_latencies, page_duration),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--data-dir", help="DATA_DIR wiederverwenden statt temporär")
+    parser.add_argument("--skip-generate", action="store_true")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    symbols = make_symbols(args.symbols)
+    report = {"benchmark": "history", "config": vars(args)}
+
+    with tempfile.TemporaryDirectory(prefix="dashboard-history-") as tmp:
+        data_dir = args.data_dir or tmp
+        os.makedirs(data_dir, exist_ok=True)
+        if not args.skip_generate:
+            report["generate"] = generate(os.path.join(data_dir, "trading.db"), args.rows, symbols,
+                                          args.days, args.seed)
+        with running_app(data_dir=data_dir) as port:
+            report["results"] = asyncio.run(
+                run_queries(port, symbols, args.days, args.queries, args.pages, args.seed)
+            )
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Kosten einer Log-Zeile im aufrufenden Thread (im Prozess, ohne Server)
+
+Misst pro Modus die Zeit von logger.info(...) im Thread des Aufrufers, so
+wie der Webhook-Pfad sie sieht, plus die Zeit bis alles geschrieben ist:
+    - sync_fstring:   basicConfig-StreamHandler, f-String (bisheriges Verhalten)
+    - queue_text:     QueueHandler/Listener, lazy %-Argumente, Textformat
+    - queue_json:     wie queue_text, eine JSON-Zeile pro Record
+    - queue_sampled:  wie queue_json mit LOG_SAMPLE=webhook=<--sample>
+
+Ausgabe in eine temporäre Datei (wie stdout in einen Log-Collector).
+
+Usage:
+    python -m bench.logging_overhead --lines 100000 --sample 100
+"""
+
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+
+from app.logs import TEXT_FORMAT, LogSetup
+
+MESSAGES = ["HYPEUSDT.P, 1W - UPTREND", "PEPEUSDT.P, 1D - Buy Signal", "BTC MACRO 1M TREND - BEARISH"]
+
+
+def reset_root():
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+
+def run_mode(mode: str, lines: int, sample: int, path: str) -> dict:
+    reset_root()
+    logger = logging.getLogger("bench.webhook")
+    with open(path, "w") as stream:
+        setup = None
+        if mode == "sync_fstring":
+            logging.basicConfig(level=logging.INFO, format=TEXT_FORMAT, stream=stream)
+        else:
+            setup = LogSetup()
+            setup.configure(
+                level="INFO", fmt="text" if mode == "queue_text" else "json", use_queue=True,
+                sample=f"webhook={sample}" if mode == "queue_sampled" else "", stream=stream,
+            )
+
+        began = time.perf_counter()
+        if mode == "sync_fstring":
+            for i in range(lines):
+                message = MESSAGES[i % 3]
+                logger.info(f"📩 Webhook empfangen: {message}")
+        else:
+            for i in range(lines):
+                logger.info("📩 Webhook empfangen: %s", MESSAGES[i % 3], extra={"category": "webhook"})
+        caller = time.perf_counter() - began
+        if setup is not None:
+            setup.stop()
+        total = time.perf_counter() - began
+        reset_root()
+    written = sum(1 for _ in open(path))
+    return {
+        "caller_us_per_line": round(caller / lines * 1e6, 3),
+        "total_us_per_line": round(total / lines * 1e6, 3),
+        "lines_written": written,
+        "dropped": setup.dropped if setup else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=100_000)
+    parser.add_argument("--sample", type=int, default=100, help="Jede N-te Zeile im Modus queue_sampled")
+    args = parser.parse_args()
+
+    report = {"benchmark": "logging_overhead", "config": vars(args), "results": {}}
+    with tempfile.TemporaryDirectory(prefix="dashboard-logs-") as tmp:
+        path = os.path.join(tmp, "out.log")
+        for mode in ("sync_fstring", "queue_text", "queue_json", "queue_sampled"):
+            report["results"][mode] = run_mode(mode, args.lines, args.sample, path)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Overhead der /metrics Instrumentierung
+
+1. Micro: Kosten aller Metrik-Aufrufe, die ein Webhook im Event-Loop
+   auslöst (Middleware, Parse-Zeit, Webhook-Zähler), hochgerechnet auf
+   den CPU-Anteil bei --rate Webhooks/s.
+2. End-to-End: maximaler Webhook-Durchsatz (closed loop) mit
+   METRICS_ENABLED=1 und =0, abwechselnd in mehreren Runden (Median).
+
+Usage:
+    python -m bench.metrics_overhead
+    python -m bench.metrics_overhead --rounds 5 --duration 5 --rate 1000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+from ._http import HttpConnection
+from ._server import running_app
+from .alerts import make_symbols, random_alert
+
+
+def micro_cost(iterations: int) -> float:
+    """Sekunden pro Webhook für alle Metrik-Aufrufe im Event-Loop"""
+    from app import metrics
+
+    labels = ("POST", "/webhook")
+    started = time.perf_counter()
+    for _ in range(iterations):
+        request_started = time.perf_counter()
+        parse_started = time.perf_counter()
+        metrics.parse_seconds.observe(time.perf_counter() - parse_started)
+        metrics.webhooks.inc("trend", "accepted")
+        metrics.observe_request(labels[0], labels[1], 200, time.perf_counter() - request_started)
+    return (time.perf_counter() - started) / iterations
+
+
+async def saturate(port: int, alerts, duration: float, connections: int) -> float:
+    """Webhooks/s mit connections parallelen Keep-Alive Verbindungen"""
+    conns = [HttpConnection(port) for _ in range(connections)]
+    done = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(conn: HttpConnection, offset: int):
+        nonlocal done
+        i = offset
+        while time.perf_counter() < deadline:
+            await conn.request("POST", "/webhook", alerts[i % len(alerts)], {"Content-Type": "text/plain"})
+            done += 1
+            i += connections
+
+    began = time.perf_counter()
+    await asyncio.gather(*(worker(conn, i) for i, conn in enumerate(conns)))
+    elapsed = time.perf_counter() - began
+    for conn in conns:
+        await conn.close()
+    return done / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=int, default=1000, help="Webhook-Rate für die Hochrechnung")
+    parser.add_argument("--iterations", type=int, default=200_000)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    report = {"benchmark": "metrics_overhead", "config": vars(args)}
+
+    cost = micro_cost(args.iterations)
+    report["micro"] = {
+        "seconds_per_webhook": round(cost, 9),
+        "cpu_share_at_rate_percent": round(cost * args.rate * 100, 3),
+    }
+
+    rng = random.Random(args.seed)
+    alerts = [random_alert(rng, make_symbols(300)).encode() for _ in range(5000)]
+    throughput = {"enabled": [], "disabled": []}
+    for _ in range(args.rounds):
+        for mode, flag in (("enabled", "1"), ("disabled", "0")):
+            with running_app(env={"METRICS_ENABLED": flag}) as port:
+                throughput[mode].append(asyncio.run(saturate(port, alerts, args.duration, args.connections)))
+
+    enabled = statistics.median(throughput["enabled"])
+    disabled = statistics.median(throughput["disabled"])
+    report["end_to_end"] = {
+        "webhooks_per_second_enabled": round(enabled, 1),
+        "webhooks_per_second_disabled": round(disabled, 1),
+        "rounds": {mode: [round(value, 1) for value in values] for mode, values in throughput.items()},
+        "overhead_percent": round((1 - enabled / disabled) * 100, 2),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
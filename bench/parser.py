@@ -0,0 +1,200 @@
+"""
+Micro-Benchmark für app.webhook_parser
+
+Misst parse_webhook (und parse_many) für gültige, ungültige und
+adversariale Eingaben gegen die ursprüngliche Implementierung
+(legacy_parse_webhook, unten unverändert übernommen) und prüft dabei,
+dass beide für jede Eingabe dasselbe Ergebnis liefern.
+
+Logging steht wie im Betrieb auf INFO-Level, die Ausgabe wird verworfen:
+gemessen wird das Parsen inkl. Log-Aufrufen, nicht das Schreiben auf stderr.
+
+Usage:
+    python -m bench.parser
+    python -m bench.parser --repeat 20000 --rounds 5
+"""
+
+import argparse
+import json
+import logging
+import random
+import re
+import time
+from typing import Dict, List, Optional
+
+from app import webhook_parser
+from app.webhook_parser import parse_many, parse_webhook
+from .alerts import make_symbols, random_alert
+
+legacy_logger = logging.getLogger("bench.legacy_parser")
+
+
+def legacy_parse_webhook(message: str) -> Optional[Dict]:
+    """parse_webhook vor der Umstellung auf das vorkompilierte Pattern"""
+    if not message or not message.strip():
+        legacy_logger.warning("Leere Webhook-Nachricht empfangen")
+        return None
+
+    message = message.strip()
+
+    macro_pattern = r"([A-Z0-9\.]+)\s+MACRO\s+1M\s+(TREND|MACD)\s*-\s*(BULLISH|BEARISH)"
+    macro_match = re.match(macro_pattern, message, re.IGNORECASE)
+
+    if macro_match:
+        result = {
+            "symbol": macro_match.group(1).upper(),
+            "type": "macro",
+            "indicator": macro_match.group(2).lower(),
+            "value": macro_match.group(3).lower()
+        }
+        legacy_logger.info(f"✅ Macro Webhook geparst: {result}")
+        return result
+
+    pattern = r"([A-Z0-9\.]+),\s*(\d+[WDMH])\s*-\s*(.+)"
+    match = re.match(pattern, message, re.IGNORECASE)
+
+    if not match:
+        legacy_logger.warning(f"Ungültiges Webhook-Format: {message}")
+        return None
+
+    symbol = match.group(1).upper()
+    timeframe = match.group(2).lower()
+    value_raw = match.group(3).strip()
+    value_lower = value_raw.lower()
+
+    if "uptrend" in value_lower:
+        result = {"symbol": symbol, "timeframe": timeframe, "type": "trend", "value": "uptrend"}
+    elif "downtrend" in value_lower:
+        result = {"symbol": symbol, "timeframe": timeframe, "type": "trend", "value": "downtrend"}
+    elif "buy signal" in value_lower or "buy" in value_lower:
+        result = {"symbol": symbol, "timeframe": timeframe, "type": "signal", "value": "buy"}
+    elif "sell signal" in value_lower or "sell" in value_lower:
+        result = {"symbol": symbol, "timeframe": timeframe, "type": "signal", "value": "sell"}
+    else:
+        legacy_logger.warning(f"Unbekannter Wert in Webhook: {value_raw}")
+        return None
+
+    legacy_logger.info(f"✅ Webhook geparst: {result}")
+    return result
+
+
+def valid_corpus(rng: random.Random, count: int) -> List[str]:
+    symbols = make_symbols(200)
+    messages = [random_alert(rng, symbols) for _ in range(count)]
+    # Varianten aus echten Alerts: Kleinschreibung, Freitext, zusätzliche Leerzeichen
+    messages += [
+        "hypeusdt.p, 1w - uptrend",
+        "  BTCUSDT.P,1D-Buy Signal  ",
+        "ETHUSDT.P, 4H - Strong Downtrend confirmed",
+        "SOLUSDT.P, 12H - SELL",
+        "btc macro 1m macd - bullish",
+    ]
+    return messages
+
+
+def invalid_corpus(rng: random.Random, count: int) -> List[str]:
+    base = [
+        "",
+        "   ",
+        "hello world",
+        "HYPEUSDT.P 1W DOWNTREND",
+        "HYPEUSDT.P, 1X - UPTREND",
+        "HYPEUSDT.P, 1W - sideways",
+        "BTC MACRO 1W TREND - BULLISH",
+        "BTC MACRO 1M RSI - BULLISH",
+        "{\"symbol\": \"BTC\"}",
+    ]
+    return [rng.choice(base) for _ in range(count)]
+
+
+def adversarial_corpus() -> List[str]:
+    return [
+        "A" * 10_000,                                      # langes Symbol ohne Trenner
+        "A" * 10_000 + ",",                                # Symbol + Komma, kein Timeframe
+        "BTC" + " " * 10_000 + "MACRO",                    # viel Whitespace im Macro-Zweig
+        "HYPEUSDT.P, 1W -" + " " * 10_000 + "x",           # Whitespace vor unbekanntem Wert
+        "HYPEUSDT.P, 1W - " + "up" * 5_000,                # langer Wert ohne Treffer
+        "HYPEUSDT.P, " + "9" * 10_000 + "W - UPTREND",     # überlanger Timeframe
+        "HYPEUSDT.P, 1W - UPTREND" + "\n" * 1_000,         # Zeilenumbrüche am Ende
+        "ＨＹＰＥ, 1W - UPTREND",                           # Fullwidth-Zeichen
+        "\x00" * 1_000,
+    ]
+
+
+def measure(parse, messages: List[str], repeat: int, rounds: int) -> float:
+    """Bester Durchsatz (Nachrichten/s) aus mehreren Runden"""
+    best = 0.0
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for message in messages:
+                parse(message)
+        elapsed = time.perf_counter() - started
+        best = max(best, repeat * len(messages) / elapsed)
+    return best
+
+
+def measure_uncached(messages: List[str], repeat: int, rounds: int) -> float:
+    """Wie measure, aber ohne Ergebnis-Cache (jede Nachricht zum ersten Mal)"""
+    limit = webhook_parser.MAX_CACHED_MESSAGES
+    webhook_parser.MAX_CACHED_MESSAGES = 0
+    webhook_parser._results.clear()
+    try:
+        return measure(parse_webhook, messages, repeat, rounds)
+    finally:
+        webhook_parser.MAX_CACHED_MESSAGES = limit
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=1000, help="Nachrichten pro Korpus")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    # Wie app.main: INFO aktiv, Ausgabe hier verworfen
+    root = logging.getLogger()
+    root.handlers = [logging.NullHandler()]
+    root.setLevel(logging.INFO)
+
+    rng = random.Random(args.seed)
+    corpora = {
+        "valid": valid_corpus(rng, args.messages),
+        "invalid": invalid_corpus(rng, args.messages),
+        "adversarial": adversarial_corpus(),
+    }
+
+    report = {"benchmark": "parser", "config": vars(args), "results": {}}
+    for name, messages in corpora.items():
+        mismatches = [m[:40] for m in messages if parse_webhook(m) != legacy_parse_webhook(m)]
+        # Adversariale Eingaben sind groß, daher weniger Wiederholungen
+        repeat = args.repeat if name != "adversarial" else max(1, args.repeat // 10)
+        legacy = measure(legacy_parse_webhook, messages, repeat, args.rounds)
+        current = measure(parse_webhook, messages, repeat, args.rounds)
+        uncached = measure_uncached(messages, repeat, args.rounds)
+        report["results"][name] = {
+            "messages": len(messages),
+            "legacy_per_second": round(legacy),
+            "per_second": round(current),
+            "per_second_uncached": round(uncached),
+            "speedup": round(current / legacy, 2),
+            "speedup_uncached": round(uncached / legacy, 2),
+            "mismatches": mismatches,
+        }
+
+    body = "\n".join(corpora["valid"])
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        parse_many(body)
+    elapsed = time.perf_counter() - started
+    report["results"]["parse_many"] = {
+        "lines": len(corpora["valid"]),
+        "per_second": round(args.repeat * len(corpora["valid"]) / elapsed),
+    }
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
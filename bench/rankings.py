@@ -0,0 +1,100 @@
+"""
+Rankings / Analytics Benchmark (im Prozess, ohne Server)
+
+Baut N Coins auf, spielt zufällige Alerts ein und misst pro Update die
+Kosten der inkrementellen Pflege (AnalyticsEngine.update_coin) gegen
+einen vollständigen Rescan (Scores aller Coins neu + Sortierung), wie
+ihn ein Ranking ohne inkrementelle Struktur bräuchte. Dazu die Kosten
+für das Auslesen: Top-50 und der komplette, kodierte /api/rankings Payload.
+
+Usage:
+    python -m bench.rankings --symbols 1000,5000 --updates 20000
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from .alerts import make_symbols, random_alert
+
+
+def run(symbol_count: int, update_count: int, seed: int) -> dict:
+    from app.analytics import AnalyticsEngine, trend_score
+    from app.indicators import COIN_COLUMNS
+    from app.ingest import build_update
+    from app.serializers import dumps
+    from app.state import CoinRecord
+    from app.webhook_parser import parse_webhook
+
+    rng = random.Random(seed)
+    symbols = make_symbols(symbol_count)
+    started_at = datetime(2024, 1, 1)
+    coins = {symbol: CoinRecord(symbol, symbol.replace("USDT.P", ""), started_at) for symbol in symbols}
+    engine = AnalyticsEngine()
+    engine.rebuild(coins.values(), {})
+
+    updates = []
+    while len(updates) < update_count:
+        parsed = parse_webhook(random_alert(rng, symbols))
+        if parsed["type"] != "macro":
+            updates.append(build_update(parsed, started_at + timedelta(seconds=len(updates))))
+
+    # Inkrementell: wie StateStore.apply
+    incremental = 0.0
+    for update in updates:
+        coin = coins[update.symbol]
+        previous = {column: getattr(coin, column) for column, key in COIN_COLUMNS.items() if key in update.fields}
+        coin.assign(update.fields)
+        began = time.perf_counter()
+        engine.update_coin(coin, previous, update.received_at)
+        incremental += time.perf_counter() - began
+
+    # Rescan: alle Scores neu und sortieren (Stichprobe, sonst dauert es zu lange)
+    sample = min(200, update_count)
+    began = time.perf_counter()
+    for _ in range(sample):
+        sorted(coins.values(), key=lambda coin: (-trend_score(coin), coin.symbol))
+    rescan = (time.perf_counter() - began) / sample
+
+    began = time.perf_counter()
+    for _ in range(200):
+        engine.ranked(50)
+    top50 = (time.perf_counter() - began) / 200
+
+    began = time.perf_counter()
+    for _ in range(20):
+        dumps({"rankings": engine.ranked(), "regime": engine.regime})
+    full_payload = (time.perf_counter() - began) / 20
+
+    return {
+        "update_incremental_us": round(incremental / update_count * 1e6, 2),
+        "update_full_rescan_us": round(rescan * 1e6, 2),
+        "speedup": round(rescan / (incremental / update_count), 1),
+        "read_top50_us": round(top50 * 1e6, 2),
+        "read_full_payload_ms": round(full_payload * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", default="100,1000,5000", help="Kommagetrennte Coin-Anzahlen")
+    parser.add_argument("--updates", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    report = {"benchmark": "rankings", "config": vars(args), "results": {}}
+    with tempfile.TemporaryDirectory(prefix="dashboard-rankings-") as data_dir:
+        # app.database legt beim Import das Datenverzeichnis an
+        os.environ.setdefault("DATA_DIR", data_dir)
+        for count in [int(c) for c in args.symbols.split(",")]:
+            report["results"][f"{count}_symbols"] = run(count, args.updates, args.seed)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
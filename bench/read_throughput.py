@@ -0,0 +1,90 @@
+"""
+Lese-Durchsatz eines GET-Endpoints (closed loop)
+
+N Clients senden so schnell wie möglich Requests über Keep-Alive
+Verbindungen. Ausgabe als JSON (Requests/s und Latenz-Perzentile).
+
+Usage:
+    python -m bench.read_throughput --path /api/coins --clients 32 --duration 10
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from ._http import HttpConnection
+from ._server import running_app
+from ._stats import summarize
+
+
+async def hammer(port: int, path: str, clients: int, duration: float, headers: dict = None) -> dict:
+    latencies, errors = [], 0
+
+    async def client():
+        nonlocal errors
+        conn = HttpConnection(port)
+        deadline = time.perf_counter() + duration
+        try:
+            while time.perf_counter() < deadline:
+                sent = time.perf_counter()
+                try:
+                    status, _, _ = await conn.request("GET", path, headers=headers)
+                    if status >= 400:
+                        errors += 1
+                    else:
+                        latencies.append(time.perf_counter() - sent)
+                except Exception:
+                    errors += 1
+        finally:
+            await conn.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+
+async def seed_coins(port: int, count: int):
+    """Legt zusätzliche Coins per Webhook an"""
+    conn = HttpConnection(port)
+    try:
+        for i in range(count):
+            await conn.request("POST", "/webhook", f"SEED{i:04d}USDT.P, 1D - UPTREND".encode())
+    finally:
+        await conn.close()
+    await asyncio.sleep(0.5)
+
+
+async def run(args) -> dict:
+    with running_app() as port:
+        if args.symbols:
+            await seed_coins(port, args.symbols)
+        # Kurzes Warmup, damit Imports und Caches nicht mitgemessen werden
+        await hammer(port, args.path, 4, 1.0)
+
+        headers = None
+        if args.conditional:
+            # Wie ein Browser mit gültigem Cache-Eintrag: If-None-Match senden
+            conn = HttpConnection(port)
+            _, response_headers, _ = await conn.request("GET", args.path)
+            await conn.close()
+            headers = {"If-None-Match": response_headers.get("etag", "")}
+
+        result = await hammer(port, args.path, args.clients, args.duration, headers)
+    return {"benchmark": "read_throughput", "config": vars(args), "results": {f"GET {args.path}": result}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default="/api/coins")
+    parser.add_argument("--clients", type=int, default=32, help="Gleichzeitige Verbindungen")
+    parser.add_argument("--duration", type=float, default=10, help="Laufzeit in Sekunden")
+    parser.add_argument("--symbols", type=int, default=0, help="Zusätzliche Coins vorab anlegen")
+    parser.add_argument("--conditional", action="store_true", help="Mit If-None-Match (304-Pfad) messen")
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Retention / Compaction Benchmark
+
+Erzeugt eine Historie über --days Tage, lässt danach einen Retention-Lauf
+alles älter als --retention-days verdichten und misst:
+    - verdichtete Zeilen/s
+    - längste Lock-Haltezeit einer Batch-Transaktion
+    - Commit-Latenz eines parallelen Writers (simuliert den Webhook-Writer)
+
+Usage:
+    python -m bench.retention --rows 1000000 --days 90 --retention-days 30
+    python -m bench.retention --batch-size 500 --pause-ms 10
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from ._stats import summarize
+from .alerts import make_symbols
+from .history import DB_DATETIME, generate
+
+
+def writer_probe(db_path: str, stop: threading.Event, interval: float) -> list:
+    """Schreibt regelmäßig einzelne Events und misst die Commit-Latenz"""
+    latencies = []
+    conn = sqlite3.connect(db_path, timeout=30)
+    while not stop.is_set():
+        sent = time.perf_counter()
+        conn.execute(
+            "INSERT INTO webhook_events (symbol, type, timeframe, indicator, value, received_at) "
+            "VALUES ('PROBE', 'trend', '1d', NULL, 'uptrend', ?)",
+            (datetime.utcnow().strftime(DB_DATETIME),),
+        )
+        conn.commit()
+        latencies.append(time.perf_counter() - sent)
+        stop.wait(interval)
+    conn.close()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--retention-days", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--pause-ms", type=float, default=50)
+    parser.add_argument("--probe-interval-ms", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    report = {"benchmark": "retention", "config": vars(args)}
+
+    with tempfile.TemporaryDirectory(prefix="dashboard-retention-") as data_dir:
+        # Vor dem App-Import setzen, damit die Engine auf die Temp-DB zeigt
+        os.environ["DATA_DIR"] = data_dir
+        os.environ.pop("DATABASE_URL", None)
+        from app.database import init_db, engine
+        from app.retention import RetentionJob
+
+        # Schema inkl. auto_vacuum=INCREMENTAL anlegen, bevor Daten geschrieben werden
+        init_db()
+        db_path = os.path.join(data_dir, "trading.db")
+        report["generate"] = generate(db_path, args.rows, make_symbols(args.symbols), args.days, args.seed)
+        size_before = os.path.getsize(db_path)
+
+        stop = threading.Event()
+        probe_result = {}
+        probe = threading.Thread(
+            target=lambda: probe_result.setdefault(
+                "latencies", writer_probe(db_path, stop, args.probe_interval_ms / 1000.0)
+            )
+        )
+        probe.start()
+
+        job = RetentionJob(
+            retention_days=args.retention_days,
+            batch_size=args.batch_size,
+            pause=args.pause_ms / 1000.0,
+        )
+        began = time.perf_counter()
+        report["retention"] = job.run_once()
+        duration = time.perf_counter() - began
+
+        stop.set()
+        probe.join()
+        engine.dispose()
+
+        report["writer_commit_latency"] = summarize(probe_result["latencies"], duration)
+        report["db_size_mb"] = {
+            "before": round(size_before / 2**20, 1),
+            "after": round(os.path.getsize(db_path) / 2**20, 1),
+        }
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
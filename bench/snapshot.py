@@ -0,0 +1,110 @@
+"""
+/api/snapshot Benchmark: Größe und Server-CPU pro Refresh (im Prozess, ohne Server)
+
+Baut einen StateStore mit N Coins und den Macros, spielt zufällige Alerts
+ein und misst pro Variante Bauen + Kodieren nach einer State-Änderung
+(Cache-Miss, also der Fall, dass zwischen zwei Refreshes ein Webhook kam):
+    - coins_and_macro:   GET /api/coins + GET /api/macro (bisher, zwei Requests)
+    - snapshot_json:     GET /api/snapshot, Accept: application/json
+    - snapshot_columnar: Accept: application/vnd.dashboard.columnar+json
+    - snapshot_msgpack:  Accept: application/msgpack (falls installiert)
+    - since_*:           dieselben Kodierungen mit ?since= nach --changes Alerts
+
+"gzip_bytes" zeigt die Größe mit gzip auf dem Transportweg (z.B. Proxy).
+
+Usage:
+    python -m bench.snapshot --symbols 5000 --changes 10
+"""
+
+import argparse
+import gzip
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from .alerts import MACRO_SYMBOLS, make_symbols, random_alert
+
+
+def timed(build, encode, repeat: int) -> dict:
+    """Mittlere Zeit für Bauen + Kodieren und Größe der Bytes"""
+    body = encode(build())
+    began = time.perf_counter()
+    for _ in range(repeat):
+        encode(build())
+    return {
+        "ms": round((time.perf_counter() - began) / repeat * 1000, 3),
+        "bytes": len(body),
+        "gzip_bytes": len(gzip.compress(body, 6)),
+    }
+
+
+def combine(*results: dict) -> dict:
+    return {key: round(sum(r[key] for r in results), 3) for key in results[0]}
+
+
+def run(symbol_count: int, update_count: int, changes: int, repeat: int, seed: int) -> dict:
+    from app import api
+    from app.ingest import build_update
+    from app.serializers import dumps
+    from app.snapshot import MEDIA_COLUMNAR, MEDIA_JSON, MEDIA_MSGPACK, encoder, msgpack
+    from app.state import CoinRecord, MacroRecord, StateStore
+    from app.webhook_parser import parse_webhook
+
+    rng = random.Random(seed)
+    symbols = make_symbols(symbol_count)
+    started_at = datetime(2024, 1, 1)
+    store = StateStore()
+    store.coins = {symbol: CoinRecord(symbol, symbol.replace("USDT.P", ""), started_at) for symbol in symbols}
+    store.macros = {symbol: MacroRecord(symbol, symbol, started_at) for symbol in MACRO_SYMBOLS}
+    store.index.rebuild(store.coins.values())
+
+    def apply_random(count: int, offset: int):
+        for i in range(count):
+            parsed = parse_webhook(random_alert(rng, symbols))
+            store.apply(build_update(parsed, started_at + timedelta(seconds=offset + i)))
+
+    apply_random(update_count, 0)
+
+    # Die Endpoint-Funktionen lesen den globalen State
+    api.state = store
+    media_types = {"json": MEDIA_JSON, "columnar": MEDIA_COLUMNAR}
+    if msgpack is not None:
+        media_types["msgpack"] = MEDIA_MSGPACK
+
+    results = {"coins_and_macro": combine(
+        timed(api.build_coins_payload, dumps, repeat),
+        timed(api.build_macro_payload, dumps, repeat),
+    )}
+    results["coins_and_macro"]["requests"] = 2
+    for name, media_type in media_types.items():
+        build = api.build_snapshot if media_type == MEDIA_JSON else api.build_snapshot_columnar
+        results[f"snapshot_{name}"] = timed(build, encoder(media_type), repeat)
+
+    token = api.snapshot_version_header()["X-Snapshot-Version"]
+    apply_random(changes, update_count)
+    for name, media_type in media_types.items():
+        results[f"since_{name}"] = timed(lambda: api.build_snapshot_changes(token, media_type),
+                                         encoder(media_type), repeat)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=5000, help="Anzahl Coins im State")
+    parser.add_argument("--updates", type=int, default=50_000, help="Alerts vor der Messung")
+    parser.add_argument("--changes", type=int, default=10, help="Alerts zwischen zwei Refreshes (since=)")
+    parser.add_argument("--repeat", type=int, default=20, help="Wiederholungen pro Variante")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    report = {
+        "benchmark": "snapshot",
+        "config": vars(args),
+        "results": run(args.symbols, args.updates, args.changes, args.repeat, args.seed),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
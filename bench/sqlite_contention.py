@@ -0,0 +1,164 @@
+"""
+SQLite Contention Benchmark: N Leser + 1 Writer
+
+Läuft je einmal mit DB_PROFILE=default (Rollback-Journal, SQLite-Defaults,
+ein gemeinsamer Pool) und DB_PROFILE=production (WAL, Pragmas, Read-Only
+Pool) gegen dieselbe synthetische Historie und vergleicht:
+    - Writer: Latenz eines Batch-Commits (wie der Webhook-Writer)
+    - Leser: Latenz und Durchsatz von History-Abfragen
+
+Jedes Profil läuft in einem eigenen Prozess, weil die Engines beim Import
+von app.database konfiguriert werden.
+
+Usage:
+    python -m bench.sqlite_contention --readers 4 --duration 10
+    python -m bench.sqlite_contention --profiles production --rows 1000000
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from ._server import REPO_ROOT
+from ._stats import summarize
+from .alerts import make_symbols, random_alert
+from .history import generate
+
+
+def reader_process(seed: int, symbols: list, limit: int, duration: float, results):
+    """Fragt die Historie über den Read-Pool ab, bis duration abgelaufen ist"""
+    from sqlalchemy.exc import OperationalError
+    from app.database import ReadSessionLocal
+    from app.history import query_history
+
+    rng = random.Random(seed)
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        db = ReadSessionLocal()
+        try:
+            query_history(db, symbol=rng.choice(symbols), limit=limit, descending=True)
+            latencies.append(time.perf_counter() - started)
+        except OperationalError:
+            errors += 1
+        finally:
+            db.close()
+    results.put((latencies, errors))
+
+
+def run_profile(args) -> dict:
+    """Misst ein Profil (im Kindprozess, DATA_DIR/DB_PROFILE sind gesetzt)"""
+    from sqlalchemy.exc import OperationalError
+    from app.database import init_db, SessionLocal
+    from app.storage import DB_PROFILE
+    from app.ingest import build_update, flush_updates
+    from app.webhook_parser import parse_webhook
+
+    init_db()
+    db_path = os.path.join(os.environ["DATA_DIR"], "trading.db")
+    symbols = make_symbols(args.symbols)
+    generate(db_path, args.rows, symbols, args.days, args.seed)
+    if DB_PROFILE != "production":
+        # generate() schreibt im WAL-Modus, das Default-Profil nutzt das Rollback-Journal
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA journal_mode=DELETE")
+        conn.close()
+
+    stop = threading.Event()
+    write_latencies, read_latencies = [], []
+    errors = {"write": 0, "read": 0}
+
+    def writer():
+        rng = random.Random(args.seed)
+        db = SessionLocal()
+        while not stop.is_set():
+            updates = [build_update(parse_webhook(random_alert(rng, symbols))) for _ in range(args.batch)]
+            started = time.perf_counter()
+            try:
+                flush_updates(db, updates)
+                write_latencies.append(time.perf_counter() - started)
+            except OperationalError:
+                db.rollback()
+                errors["write"] += 1
+            stop.wait(args.write_interval_ms / 1000.0)
+        db.close()
+
+    # Leser als eigene Prozesse, damit der GIL die Lock-Konkurrenz nicht überdeckt
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    readers = [
+        context.Process(target=reader_process, args=(args.seed + i + 1, symbols, args.limit, args.duration, results))
+        for i in range(args.readers)
+    ]
+    for process in readers:
+        process.start()
+
+    thread = threading.Thread(target=writer)
+    began = time.perf_counter()
+    thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    thread.join()
+    duration = time.perf_counter() - began
+
+    for _ in readers:
+        latencies, failed = results.get()
+        read_latencies.extend(latencies)
+        errors["read"] += failed
+    for process in readers:
+        process.join()
+
+    return {
+        "write (batch commit)": summarize(write_latencies, duration, errors["write"]),
+        "read (history query)": summarize(read_latencies, duration, errors["read"]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", default="default,production")
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--symbols", type=int, default=200)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--batch", type=int, default=50, help="Updates pro Writer-Commit")
+    parser.add_argument("--limit", type=int, default=1000, help="Events pro History-Abfrage")
+    parser.add_argument("--write-interval-ms", type=float, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_profile(args)))
+        return
+
+    report = {"benchmark": "sqlite_contention", "config": vars(args), "results": {}}
+    child_args = []
+    for key, value in vars(args).items():
+        if key not in ("profiles", "child"):
+            child_args += [f"--{key.replace('_', '-')}", str(value)]
+    for profile in args.profiles.split(","):
+        with tempfile.TemporaryDirectory(prefix="dashboard-contention-") as data_dir:
+            env = dict(os.environ, DATA_DIR=data_dir, DB_PROFILE=profile)
+            env.pop("DATABASE_URL", None)
+            output = subprocess.run(
+                [sys.executable, "-m", "bench.sqlite_contention", "--child", *child_args],
+                cwd=REPO_ROOT, env=env, check=True, capture_output=True, text=True,
+            ).stdout
+            report["results"][profile] = json.loads(output.strip().splitlines()[-1])
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
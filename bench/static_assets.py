@@ -0,0 +1,104 @@
+"""
+Auslieferung des Dashboards: GET / (index.html)
+
+Vergleicht die bisherige Catch-all Route (FileResponse, os.path.exists
+pro Request, ohne Kompression und Cache-Header) mit dem In-Memory
+Asset-Store: unkomprimiert, gzip, Brotli und Revalidierung per
+If-None-Match. Ausgabe: Requests/s, Latenz und übertragene Bytes.
+
+Usage:
+    python -m bench.static_assets --clients 32 --duration 10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+
+from fastapi import FastAPI
+from fastapi.responses import FileResponse
+
+from ._http import HttpConnection
+from ._server import REPO_ROOT, running_app
+from .read_throughput import hammer
+
+# ===== Vorherige Implementierung (app/main.py) als Vergleich =====
+legacy_app = FastAPI()
+_static_dir = os.path.join(REPO_ROOT, "static")
+
+
+@legacy_app.get("/")
+async def _legacy_root():
+    index_path = os.path.join(_static_dir, "index.html")
+    if os.path.exists(index_path):
+        return FileResponse(index_path)
+    return {"message": "Dashboard not found"}
+
+
+@legacy_app.get("/{path:path}")
+async def _legacy_static_files(path: str):
+    file_path = os.path.join(_static_dir, path)
+    if os.path.exists(file_path) and os.path.isfile(file_path):
+        return FileResponse(file_path)
+    index_path = os.path.join(_static_dir, "index.html")
+    if os.path.exists(index_path):
+        return FileResponse(index_path)
+    return {"message": "Not found"}
+
+
+async def probe(port: int, path: str, headers: dict) -> dict:
+    conn = HttpConnection(port)
+    status, response_headers, body = await conn.request("GET", path, headers=headers)
+    await conn.close()
+    return {"status": status, "bytes": len(body), "etag": response_headers.get("etag"),
+            "content_encoding": response_headers.get("content-encoding", "identity"),
+            "cache_control": response_headers.get("cache-control")}
+
+
+async def measure(port: int, path: str, variants: dict, clients: int, duration: float) -> dict:
+    await hammer(port, path, 4, 1.0)
+    results = {}
+    for name, headers in variants.items():
+        info = await probe(port, path, headers)
+        if name == "conditional":
+            if not info["etag"]:
+                continue
+            headers = {"If-None-Match": info["etag"]}
+            info = await probe(port, path, headers)
+        result = await hammer(port, path, clients, duration, headers)
+        result.update(info)
+        results[name] = result
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default="/")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    variants = {
+        "identity": {},
+        "gzip": {"Accept-Encoding": "gzip, deflate"},
+        "br": {"Accept-Encoding": "gzip, deflate, br"},
+        "conditional": {"Accept-Encoding": "gzip, deflate, br"},
+    }
+    report = {"benchmark": "static_assets", "config": vars(args), "results": {}}
+    with running_app(app="bench.static_assets:legacy_app") as port:
+        report["results"]["legacy"] = asyncio.run(
+            measure(port, args.path, {"identity": {}}, args.clients, args.duration))
+    with running_app() as port:
+        report["results"]["asset_store"] = asyncio.run(
+            measure(port, args.path, variants, args.clients, args.duration))
+
+    legacy = report["results"]["legacy"]["identity"]["rps"]
+    report["speedup"] = {
+        name: round(result["rps"] / legacy, 1)
+        for name, result in report["results"]["asset_store"].items()
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,469 @@
+"""
+Storage-Backends: Konformitäts-Checks und Upsert-Benchmark
+
+Läuft gegen jede DATABASE_URL (Default: temporäre SQLite-Datei) mit
+denselben Checks und denselben Messungen, damit SQLite und PostgreSQL
+vergleichbar bleiben. In CI ohne PostgreSQL reicht der SQLite-Lauf; mit
+einem lokalen Container:
+
+    docker run --rm -e POSTGRES_PASSWORD=pw -p 5432:5432 postgres:16
+    python -m bench.storage_backends --database-url postgresql://postgres:pw@localhost/postgres
+
+ACHTUNG: alle Tabellen der Datenbank werden gelöscht - nur gegen eine
+Test-Datenbank laufen lassen.
+
+Konformität: Insert/Update per Upsert, nur geänderte Spalten, Coalescing,
+Macro-Defaults, eigener Stand pro Timeframe, gemischte Spalten, große
+Batches, Zähler-Upsert, DO NOTHING, parallele Writer auf dasselbe neue
+Symbol, State-Roundtrip, Retention, die Macro-Migration ohne Datenverlust
+und die Migration der festen Trend-Spalten nach indicator_states.
+
+Benchmark: Updates/s des Writers für mehrere Batch-Größen, jeweils
+Bulk-Upsert (app/ingest.flush_updates) gegen das alte Lesen-dann-Schreiben
+über die ORM (SELECT ... IN, setattr, db.add).
+
+Jede URL läuft in einem eigenen Prozess, weil die Engines beim Import
+von app.database konfiguriert werden.
+
+Usage:
+    python -m bench.storage_backends
+    python -m bench.storage_backends --batches 1,50,500 --updates 20000
+    python -m bench.storage_backends --database-url sqlite:///tmp/a.db --database-url postgresql://...
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+
+from ._server import REPO_ROOT
+from .alerts import make_symbols, random_alert
+
+T0 = datetime(2024, 1, 1, 12, 0, 0)
+
+
+# ===== Konformität (im Kindprozess) =====
+
+def conformance_checks():
+    """Liste von (Name, Funktion); jede Funktion wirft AssertionError bei Abweichung"""
+    from sqlalchemy import insert, select, text
+    from app.database import (
+        Base, SessionLocal, CoinState, MacroState, IndicatorState, WebhookEvent, WebhookDailySummary,
+        engine, migrate_indicator_states, migrate_macro_table, storage,
+    )
+    from app.indicators import decode_value
+    from app.ingest import build_update, flush_updates
+    from app.retention import RetentionJob
+    from app.state import StateStore
+    from app.webhook_parser import parse_webhook
+
+    def update(message: str, at: datetime):
+        return build_update(parse_webhook(message), at)
+
+    def coin(symbol: str) -> CoinState:
+        db = SessionLocal()
+        try:
+            return db.get(CoinState, symbol)
+        finally:
+            db.close()
+
+    def indicator(symbol: str, timeframe: str, name: str = "trend", kind: str = "coin"):
+        db = SessionLocal()
+        try:
+            row = db.get(IndicatorState, (kind, symbol, timeframe, name))
+            return decode_value(row.value) if row else None
+        finally:
+            db.close()
+
+    def flush(updates):
+        db = SessionLocal()
+        try:
+            flush_updates(db, updates)
+        finally:
+            db.close()
+
+    def insert_new():
+        flush([update("NEWUSDT.P, 1D - UPTREND", T0)])
+        row = coin("NEWUSDT.P")
+        assert row is not None, "Zeile fehlt"
+        assert row.display_name == "NEW", row.display_name
+        trends = (indicator("NEWUSDT.P", "1d"), indicator("NEWUSDT.P", "1w"))
+        assert trends == ("uptrend", None), trends
+        assert row.created_at == T0 and row.last_updated == T0, (row.created_at, row.last_updated)
+
+    def update_only_changed_columns():
+        flush([update("NEWUSDT.P, 1W - DOWNTREND", T0 + timedelta(minutes=1))])
+        row = coin("NEWUSDT.P")
+        assert indicator("NEWUSDT.P", "1w") == "downtrend", indicator("NEWUSDT.P", "1w")
+        assert indicator("NEWUSDT.P", "1d") == "uptrend", "nicht geänderter Timeframe überschrieben"
+        assert row.created_at == T0, "created_at überschrieben"
+        assert row.last_updated == T0 + timedelta(minutes=1), row.last_updated
+
+    def coalesce_later_wins():
+        flush([
+            update("NEWUSDT.P, 3D - UPTREND", T0 + timedelta(minutes=2)),
+            update("NEWUSDT.P, 3D - DOWNTREND", T0 + timedelta(minutes=3)),
+            update("NEWUSDT.P, 1D - Buy Signal", T0 + timedelta(minutes=4)),
+        ])
+        row = coin("NEWUSDT.P")
+        assert indicator("NEWUSDT.P", "3d") == "downtrend", indicator("NEWUSDT.P", "3d")
+        assert row.last_signal_type == "buy" and row.last_signal_time == T0 + timedelta(minutes=4)
+        assert row.last_updated == T0 + timedelta(minutes=4), row.last_updated
+
+    def macro_defaults():
+        flush([update("NEWMACRO MACRO 1M MACD - BULLISH", T0)])
+        db = SessionLocal()
+        try:
+            row = db.get(MacroState, "NEWMACRO")
+        finally:
+            db.close()
+        assert row is not None and row.display_name == "NEWMACRO"
+        values = (indicator("NEWMACRO", "1m", "trend", "macro"), indicator("NEWMACRO", "1m", "macd", "macro"))
+        assert values == (None, "bullish"), values
+
+    def other_timeframes_own_state():
+        # Früher landeten 4h/12h in trend_1d und überschrieben den Tages-Trend
+        flush([
+            update("TFUSDT.P, 1D - UPTREND", T0),
+            update("TFUSDT.P, 4H - DOWNTREND", T0 + timedelta(minutes=1)),
+            update("TFUSDT.P, 7D - DOWNTREND", T0 + timedelta(minutes=2)),
+        ])
+        values = tuple(indicator("TFUSDT.P", timeframe) for timeframe in ("1d", "4h", "1w"))
+        assert values == ("uptrend", "downtrend", "downtrend"), values
+
+    def mixed_columns_in_one_batch():
+        symbols = make_symbols(30)
+        messages = []
+        for i, symbol in enumerate(symbols):
+            messages.append(f"{symbol}, {('1W', '3D', '1D')[i % 3]} - UPTREND")
+            if i % 2:
+                messages.append(f"{symbol}, 1D - Sell Signal")
+        flush([update(message, T0) for message in messages])
+        db = SessionLocal()
+        try:
+            rows = {c.symbol: c for c in db.query(CoinState).filter(CoinState.symbol.in_(symbols))}
+        finally:
+            db.close()
+        assert len(rows) == len(symbols), len(rows)
+        for i, symbol in enumerate(symbols):
+            timeframe = ("1w", "3d", "1d")[i % 3]
+            assert indicator(symbol, timeframe) == "uptrend", (symbol, timeframe)
+            assert rows[symbol].last_signal_type == ("sell" if i % 2 else None), symbol
+
+    def large_batch_upsert():
+        # Mehr Zeilen als ein VALUES-Block fasst (PostgreSQL: Seiten à 1000 Zeilen)
+        symbols = [f"BULK{i:04d}USDT.P" for i in range(2500)]
+        db = SessionLocal()
+        try:
+            for value in ("uptrend", "downtrend"):
+                rows = [{"symbol": s, "display_name": s, "trend_1d": value,
+                         "last_updated": T0, "created_at": T0} for s in symbols]
+                storage.upsert(db, CoinState, rows, update=("trend_1d", "last_updated"))
+            db.commit()
+            values = {c.trend_1d for c in db.query(CoinState).filter(CoinState.symbol.like("BULK%"))}
+            count = db.query(CoinState).filter(CoinState.symbol.like("BULK%")).count()
+        finally:
+            db.close()
+        assert count == len(symbols), count
+        assert values == {"downtrend"}, values
+
+    def increment_counters():
+        key = {"symbol": "CNT", "day": T0.date(), "series": "trend:1d"}
+        first = dict(key, event_count=3, flip_count=1, first_value="uptrend",
+                     last_value="downtrend", last_received_at=T0)
+        second = dict(key, event_count=2, flip_count=2, first_value="downtrend",
+                      last_value="uptrend", last_received_at=T0 + timedelta(hours=1))
+        db = SessionLocal()
+        try:
+            for row in (first, second):
+                storage.upsert(db, WebhookDailySummary, [row], keys=("symbol", "day", "series"),
+                               update=("last_value", "last_received_at"),
+                               increment=("event_count", "flip_count"))
+            db.commit()
+            row = db.get(WebhookDailySummary, ("CNT", T0.date(), "trend:1d"))
+        finally:
+            db.close()
+        assert (row.event_count, row.flip_count) == (5, 3), (row.event_count, row.flip_count)
+        assert (row.first_value, row.last_value) == ("uptrend", "uptrend"), (row.first_value, row.last_value)
+
+    def do_nothing_keeps_existing():
+        db = SessionLocal()
+        try:
+            storage.upsert(db, CoinState, [{"symbol": "NEWUSDT.P", "display_name": "OTHER"}], update=())
+            db.commit()
+        finally:
+            db.close()
+        assert coin("NEWUSDT.P").display_name == "NEW"
+
+    def concurrent_writers_same_symbol():
+        # Das alte SELECT-dann-INSERT konnte hier mit IntegrityError scheitern
+        errors = []
+        barrier = threading.Barrier(4)
+
+        def worker(index: int):
+            db = SessionLocal()
+            try:
+                barrier.wait()
+                for round_ in range(20):
+                    flush_updates(db, [update(f"RACE{round_}USDT.P, 1D - UPTREND", T0 + timedelta(seconds=index))])
+            except Exception as e:
+                errors.append(repr(e))
+            finally:
+                db.close()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors, errors[:3]
+        db = SessionLocal()
+        try:
+            count = db.query(CoinState).filter(CoinState.symbol.like("RACE%")).count()
+        finally:
+            db.close()
+        assert count == 20, count
+
+    def state_roundtrip():
+        # In-Memory apply und Persistenz müssen denselben Stand ergeben
+        rng = random.Random(7)
+        symbols = make_symbols(40)
+        updates = [update(random_alert(rng, symbols), T0 + timedelta(seconds=i)) for i in range(400)]
+        memory = StateStore()
+        memory.load()
+        for item in updates:
+            memory.apply(item)
+        flush(updates)
+        loaded = StateStore()
+        loaded.load()
+        for name in ("coins", "macros"):
+            expected = {s: tuple(getattr(r, a) for a in r.__slots__ if a != "created_at")
+                        for s, r in getattr(memory, name).items()}
+            actual = {s: tuple(getattr(r, a) for a in r.__slots__ if a != "created_at")
+                      for s, r in getattr(loaded, name).items()}
+            assert expected == actual, f"{name} weichen ab"
+
+    def retention_summaries():
+        db = SessionLocal()
+        try:
+            db.execute(insert(WebhookEvent), [
+                {"symbol": "OLD", "type": "trend", "timeframe": "1d", "indicator": None,
+                 "value": value, "received_at": T0 - timedelta(days=100, hours=-i)}
+                for i, value in enumerate(["uptrend", "downtrend", "downtrend", "uptrend"])
+            ])
+            db.commit()
+        finally:
+            db.close()
+        job = RetentionJob(retention_days=30, batch_size=3, pause=0)
+        stats = job.run_once(now=T0)
+        assert stats["rows_compacted"] >= 4, stats
+        db = SessionLocal()
+        try:
+            row = db.get(WebhookDailySummary, ("OLD", (T0 - timedelta(days=100)).date(), "trend:1d"))
+            remaining = db.query(WebhookEvent).filter(WebhookEvent.symbol == "OLD").count()
+        finally:
+            db.close()
+        assert remaining == 0, remaining
+        assert (row.event_count, row.flip_count) == (4, 2), (row.event_count, row.flip_count)
+        assert (row.first_value, row.last_value) == ("uptrend", "uptrend"), (row.first_value, row.last_value)
+
+    def macro_migration_keeps_rows():
+        MacroState.__table__.drop(engine)
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE macro_states (symbol VARCHAR PRIMARY KEY, display_name VARCHAR, "
+                "last_updated TIMESTAMP, created_at TIMESTAMP)"
+            ))
+            conn.execute(text("INSERT INTO macro_states (symbol, display_name) VALUES ('BTC', 'Bitcoin')"))
+        migrate_macro_table()
+        Base.metadata.create_all(bind=engine)
+        with engine.connect() as conn:
+            rows = conn.execute(select(MacroState.__table__)).mappings().all()
+        assert len(rows) == 1, rows
+        assert (rows[0]["display_name"], rows[0]["trend_1m"], rows[0]["macd_1m"]) == ("Bitcoin", "bearish", "bearish")
+
+    def legacy_columns_migration():
+        # Alte Spalten plus Historie -> indicator_states, Historie hat Vorrang
+        IndicatorState.__table__.drop(engine)
+        IndicatorState.__table__.create(engine)
+        db = SessionLocal()
+        try:
+            db.add(CoinState(symbol="LEGACYUSDT.P", display_name="LEGACY", trend_1w="uptrend",
+                             trend_1d="downtrend", last_updated=T0, created_at=T0))
+            db.add(MacroState(symbol="LEGACYM", display_name="LEGACYM", trend_1m="bullish",
+                              macd_1m="bearish", last_updated=T0, created_at=T0))
+            db.execute(insert(WebhookEvent), [
+                {"symbol": "LEGACYUSDT.P", "type": "trend", "timeframe": tf, "indicator": None,
+                 "value": value, "received_at": T0 - timedelta(minutes=10 - i)}
+                for i, (tf, value) in enumerate([("1d", "uptrend"), ("4h", "downtrend")])
+            ])
+            db.commit()
+            rows_before = db.query(IndicatorState).count()
+        finally:
+            db.close()
+        assert rows_before == 0, rows_before
+        migrate_indicator_states()
+        values = tuple(indicator("LEGACYUSDT.P", tf) for tf in ("1w", "3d", "1d", "4h"))
+        # trend_1d = "downtrend" stammte vom 4h-Alert; der letzte 1d-Alert war "uptrend"
+        assert values == ("uptrend", None, "uptrend", "downtrend"), values
+        macro = (indicator("LEGACYM", "1m", "trend", "macro"), indicator("LEGACYM", "1m", "macd", "macro"))
+        assert macro == ("bullish", "bearish"), macro
+        assert coin("LEGACYUSDT.P").trend_1d == "downtrend", "alte Spalte verändert"
+
+    return [
+        ("insert_new", insert_new),
+        ("update_only_changed_columns", update_only_changed_columns),
+        ("coalesce_later_wins", coalesce_later_wins),
+        ("macro_defaults", macro_defaults),
+        ("other_timeframes_own_state", other_timeframes_own_state),
+        ("mixed_columns_in_one_batch", mixed_columns_in_one_batch),
+        ("large_batch_upsert", large_batch_upsert),
+        ("increment_counters", increment_counters),
+        ("do_nothing_keeps_existing", do_nothing_keeps_existing),
+        ("concurrent_writers_same_symbol", concurrent_writers_same_symbol),
+        ("state_roundtrip", state_roundtrip),
+        ("retention_summaries", retention_summaries),
+        ("macro_migration_keeps_rows", macro_migration_keeps_rows),
+        ("legacy_columns_migration", legacy_columns_migration),
+    ]
+
+
+def run_conformance() -> dict:
+    results = {}
+    for name, check in conformance_checks():
+        try:
+            check()
+            results[name] = "ok"
+        except Exception as e:
+            results[name] = f"FAILED: {e!r}"
+            traceback.print_exc(file=sys.stderr)
+    return results
+
+
+# ===== Benchmark (im Kindprozess) =====
+
+def legacy_flush(db, updates):
+    """Das frühere Lesen-dann-Schreiben über die ORM (Vergleichsbasis)"""
+    from sqlalchemy import insert
+    from app.database import CoinState, MacroState, IndicatorState, WebhookEvent
+    from app.indicators import encode_value
+    from app.ingest import coalesce, display_name_for, history_row
+
+    merged = coalesce(updates)
+    coin_symbols = [symbol for kind, symbol in merged if kind == "coin"]
+    macro_symbols = [symbol for kind, symbol in merged if kind == "macro"]
+    coins = {c.symbol: c for c in db.query(CoinState).filter(CoinState.symbol.in_(coin_symbols))} if coin_symbols else {}
+    macros = {m.symbol: m for m in db.query(MacroState).filter(MacroState.symbol.in_(macro_symbols))} if macro_symbols else {}
+
+    for (kind, symbol), fields in merged.items():
+        existing = (macros if kind == "macro" else coins).get(symbol)
+        if existing is None:
+            if kind == "macro":
+                existing = MacroState(symbol=symbol, display_name=symbol, created_at=fields["last_updated"])
+            else:
+                existing = CoinState(symbol=symbol, display_name=display_name_for(symbol),
+                                     created_at=fields["last_updated"])
+            db.add(existing)
+        for column, value in fields.items():
+            if type(column) is tuple:
+                # Indikator-Stand: ORM merge = SELECT, dann INSERT oder UPDATE
+                db.merge(IndicatorState(kind=kind, symbol=symbol, timeframe=column[0], indicator=column[1],
+                                        value=encode_value(value), updated_at=fields["last_updated"]))
+            else:
+                setattr(existing, column, value)
+
+    db.execute(insert(WebhookEvent), [history_row(update) for update in updates])
+    db.commit()
+
+
+def run_benchmark(args) -> dict:
+    from app.database import SessionLocal
+    from app.ingest import build_update, flush_updates
+    from app.webhook_parser import parse_webhook
+
+    rng = random.Random(args.seed)
+    symbols = make_symbols(args.symbols)
+    updates = [build_update(parse_webhook(random_alert(rng, symbols)), T0 + timedelta(milliseconds=i))
+               for i in range(args.updates)]
+
+    results = {}
+    for batch in [int(b) for b in args.batches.split(",")]:
+        for name, flush in (("legacy_orm", legacy_flush), ("bulk_upsert", flush_updates)):
+            db = SessionLocal()
+            try:
+                began = time.perf_counter()
+                for start in range(0, len(updates), batch):
+                    flush(db, updates[start:start + batch])
+                elapsed = time.perf_counter() - began
+            finally:
+                db.close()
+            results[f"batch_{batch}"] = results.get(f"batch_{batch}", {})
+            results[f"batch_{batch}"][name] = {
+                "updates_per_second": round(len(updates) / elapsed),
+                "ms_per_batch": round(elapsed / -(-len(updates) // batch) * 1000, 3),
+            }
+        row = results[f"batch_{batch}"]
+        row["speedup"] = round(row["bulk_upsert"]["updates_per_second"] / row["legacy_orm"]["updates_per_second"], 2)
+    return results
+
+
+def run_child(args) -> dict:
+    from app.database import Base, engine, init_db, storage
+
+    # Sauberer Ausgangszustand (auch bei einer wiederverwendeten PostgreSQL-DB)
+    Base.metadata.drop_all(bind=engine)
+    init_db()
+    report = {"backend": storage.name, "conformance": run_conformance()}
+    Base.metadata.drop_all(bind=engine)
+    init_db()
+    report["benchmark"] = run_benchmark(args)
+    Base.metadata.drop_all(bind=engine)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", action="append", default=[],
+                        help="Mehrfach möglich (Default: temporäre SQLite-Datei)")
+    parser.add_argument("--updates", type=int, default=10_000)
+    parser.add_argument("--symbols", type=int, default=200)
+    parser.add_argument("--batches", default="1,50,500", help="Updates pro Transaktion")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args), default=str))
+        return
+
+    config = {key: value for key, value in vars(args).items() if key != "child"}
+    report = {"benchmark": "storage_backends", "config": config, "results": {}}
+    child_args = ["--updates", str(args.updates), "--symbols", str(args.symbols),
+                  "--batches", args.batches, "--seed", str(args.seed)]
+    with tempfile.TemporaryDirectory(prefix="dashboard-storage-") as data_dir:
+        urls = args.database_url or [f"sqlite:///{data_dir}/trading.db"]
+        for url in urls:
+            env = dict(os.environ, DATA_DIR=data_dir, DATABASE_URL=url)
+            output = subprocess.run(
+                [sys.executable, "-m", "bench.storage_backends", "--child", *child_args],
+                cwd=REPO_ROOT, env=env, check=True, capture_output=True, text=True,
+            ).stdout
+            # Zugangsdaten nicht in den Report schreiben
+            report["results"][url.split("@")[-1]] = json.loads(output.strip().splitlines()[-1])
+
+    print(json.dumps(report, indent=2))
+    failed = [name for result in report["results"].values()
+              for name, outcome in result["conformance"].items() if outcome != "ok"]
+    if failed:
+        sys.exit(f"Konformität fehlgeschlagen: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Webhook-Flut: Lese-Latenz und Signal-Durchsatz bei einer fehlkonfigurierten Quelle
+
+Simuliert einen Alert "once per bar" auf 1m über viele Symbole: eine Quelle
+(X-Forwarded-For 10.0.0.1) schickt mit fester Rate (open loop, TradingView
+wartet nicht auf den Server) wiederholte Trend-Alerts, eine zweite Quelle (10.0.0.2) einzelne Signale, parallel
+pollen Dashboard-Leser /api/coins. Pro Phase ein eigener Server:
+    - baseline:       nur Leser und Signale, keine Flut
+    - flood:          Flut mit Admission Control (Default-Einstellungen)
+    - flood_no_limit: Flut mit ADMISSION_ENABLED=0 (bisheriges Verhalten)
+    - overload:       ADMISSION_QUEUE_MAX=0; /webhook und /webhook/batch
+                      müssen 503 mit Retry-After liefern (Exit-Code 1 sonst)
+
+Ausgabe: Statuscodes der Flut, Latenz der Signale und von GET /api/coins.
+
+Usage:
+    python -m bench.webhook_flood --duration 10 --rate 1000
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from ._http import HttpConnection
+from ._server import running_app
+from ._stats import summarize
+from .alerts import make_symbols
+from .webhook_load import poll
+
+FLOOD_IP = "10.0.0.1"
+SIGNAL_IP = "10.0.0.2"
+
+
+async def flood(port: int, duration: float, rate: float, connections: int, symbols) -> dict:
+    """Open loop: wiederholte Trends mit fester Rate, egal was der Server antwortet"""
+    statuses = {}
+    headers = {"Content-Type": "text/plain", "X-Forwarded-For": FLOOD_IP}
+    pool: asyncio.Queue = asyncio.Queue()
+    for _ in range(connections):
+        pool.put_nowait(HttpConnection(port))
+
+    async def send(message: str):
+        conn = await pool.get()
+        try:
+            status, _, _ = await conn.request("POST", "/webhook", message.encode(), headers)
+        except Exception:
+            status = "error"
+        finally:
+            pool.put_nowait(conn)
+        statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    tasks = []
+    sent = 0
+    while sent / rate < duration:
+        delay = start + sent / rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(send(f"{symbols[sent % len(symbols)]}, 1D - UPTREND")))
+        sent += 1
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    while not pool.empty():
+        await pool.get_nowait().close()
+    return {
+        "sent": sent,
+        "rps": round(sent / elapsed, 1),
+        "statuses": {str(code): count for code, count in sorted(statuses.items(), key=str)},
+    }
+
+
+async def signals(port: int, duration: float, rate: float, symbols) -> dict:
+    """Signale mit fester Rate von einer zweiten Quelle; 4xx/5xx zählen als Fehler"""
+    conn = HttpConnection(port)
+    headers = {"Content-Type": "text/plain", "X-Forwarded-For": SIGNAL_IP}
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    sent = 0
+    try:
+        while time.perf_counter() - start < duration:
+            began = time.perf_counter()
+            side = "Buy" if sent % 2 else "Sell"
+            message = f"{symbols[sent % len(symbols)]}, 1D - {side} Signal"
+            try:
+                status, _, _ = await conn.request("POST", "/webhook", message.encode(), headers)
+                if status >= 400:
+                    errors += 1
+                else:
+                    latencies.append(time.perf_counter() - began)
+            except Exception:
+                errors += 1
+            sent += 1
+            await asyncio.sleep(max(0.0, start + sent / rate - time.perf_counter()))
+    finally:
+        await conn.close()
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+
+async def overload_checks(port: int) -> dict:
+    """Volle Writer-Queue: beide Webhook-Endpoints lehnen mit 503 und Retry-After ab"""
+    conn = HttpConnection(port)
+    headers = {"Content-Type": "text/plain"}
+    requests = {
+        "POST /webhook": ("/webhook", b"BTCUSDT.P, 1D - Buy Signal"),
+        "POST /webhook/batch": ("/webhook/batch", b"BTCUSDT.P, 1D - Buy Signal\nETHUSDT.P, 1D - UPTREND"),
+    }
+    results = {}
+    try:
+        for name, (path, body) in requests.items():
+            status, response_headers, _ = await conn.request("POST", path, body, headers)
+            retry_after = response_headers.get("retry-after")
+            outcome = "ok" if status == 503 and retry_after else "FAILED"
+            results[name] = {"status": status, "retry_after": retry_after, "result": outcome}
+    finally:
+        await conn.close()
+    return results
+
+
+async def run_phase(name: str, args) -> dict:
+    if name == "overload":
+        with running_app(env={"ADMISSION_ENABLED": "1", "ADMISSION_QUEUE_MAX": "0"}) as port:
+            return await overload_checks(port)
+    env = {"ADMISSION_ENABLED": "0" if name == "flood_no_limit" else "1"}
+    symbols = make_symbols(args.symbols)
+    with running_app(env=env) as port:
+        jobs = [
+            poll(port, "/api/coins", args.duration, args.pollers, args.poll_interval),
+            signals(port, args.duration, args.signal_rate, symbols),
+        ]
+        if name != "baseline":
+            jobs.append(flood(port, args.duration, args.rate, args.connections, symbols))
+        results = await asyncio.gather(*jobs)
+    phase = {"GET /api/coins": results[0], "signals": results[1]}
+    if name != "baseline":
+        phase["flood"] = results[2]
+    return phase
+
+
+async def run(args) -> dict:
+    report = {"benchmark": "webhook_flood", "config": vars(args), "results": {}}
+    for name in args.phases.split(","):
+        report["results"][name] = await run_phase(name, args)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--phases", default="baseline,flood,flood_no_limit,overload",
+                        help="Kommagetrennt: baseline, flood, flood_no_limit, overload")
+    parser.add_argument("--duration", type=float, default=10, help="Laufzeit pro Phase in Sekunden")
+    parser.add_argument("--rate", type=float, default=1000, help="Alerts pro Sekunde der fluteten Quelle")
+    parser.add_argument("--connections", type=int, default=64, help="Verbindungen der fluteten Quelle")
+    parser.add_argument("--symbols", type=int, default=300, help="Symbole im fehlkonfigurierten Alert")
+    parser.add_argument("--signal-rate", type=float, default=20, help="Signale pro Sekunde der zweiten Quelle")
+    parser.add_argument("--pollers", type=int, default=10, help="Gleichzeitige Dashboard-Leser")
+    parser.add_argument("--poll-interval", type=float, default=0.1, help="Pause zwischen Polls in Sekunden")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2))
+    failed = [name for name, check in report["results"].get("overload", {}).items() if check["result"] != "ok"]
+    if failed:
+        sys.exit(f"Overload-Check fehlgeschlagen: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
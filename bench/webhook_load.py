@@ -0,0 +1,122 @@
+"""
+Webhook-Last mit gleichzeitigen Dashboard-Lesern
+
+Feuert Alerts mit fester Rate (open loop, Latenz ab geplantem Sendezeitpunkt)
+und misst parallel /api/coins. Ausgabe als JSON.
+
+Usage:
+    python -m bench.webhook_load --rate 500 --duration 10
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from ._http import HttpConnection
+from ._server import running_app
+from ._stats import summarize
+from .alerts import make_symbols, random_alert
+
+
+async def fire_webhooks(port: int, rate: float, duration: float, connections: int, symbols, seed: int):
+    rng = random.Random(seed)
+    pool: asyncio.Queue = asyncio.Queue()
+    for _ in range(connections):
+        pool.put_nowait(HttpConnection(port))
+
+    latencies, errors = [], 0
+    tasks = []
+
+    async def send(scheduled: float, message: str):
+        nonlocal errors
+        conn = await pool.get()
+        try:
+            status, _, _ = await conn.request("POST", "/webhook", message.encode(), {"Content-Type": "text/plain"})
+            if status >= 400:
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - scheduled)
+        except Exception:
+            errors += 1
+        finally:
+            pool.put_nowait(conn)
+
+    start = time.perf_counter()
+    interval = 1.0 / rate
+    sent = 0
+    while True:
+        scheduled = start + sent * interval
+        if scheduled - start >= duration:
+            break
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(send(scheduled, random_alert(rng, symbols))))
+        sent += 1
+
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    while not pool.empty():
+        await pool.get_nowait().close()
+    return summarize(latencies, elapsed, errors)
+
+
+async def poll(port: int, path: str, duration: float, pollers: int, interval: float):
+    latencies, errors = [], 0
+
+    async def poller():
+        nonlocal errors
+        conn = HttpConnection(port)
+        deadline = time.perf_counter() + duration
+        try:
+            while time.perf_counter() < deadline:
+                sent = time.perf_counter()
+                try:
+                    status, _, _ = await conn.request("GET", path)
+                    if status >= 400:
+                        errors += 1
+                    else:
+                        latencies.append(time.perf_counter() - sent)
+                except Exception:
+                    errors += 1
+                await asyncio.sleep(interval)
+        finally:
+            await conn.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(poller() for _ in range(pollers)))
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+
+async def run(args) -> dict:
+    with running_app() as port:
+        symbols = make_symbols(args.symbols)
+        webhook, coins = await asyncio.gather(
+            fire_webhooks(port, args.rate, args.duration, args.connections, symbols, args.seed),
+            poll(port, "/api/coins", args.duration, args.pollers, args.poll_interval),
+        )
+    return {
+        "benchmark": "webhook_load",
+        "config": vars(args),
+        "results": {"POST /webhook": webhook, "GET /api/coins": coins},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=500, help="Webhooks pro Sekunde")
+    parser.add_argument("--duration", type=float, default=10, help="Laufzeit in Sekunden")
+    parser.add_argument("--connections", type=int, default=64, help="Keep-Alive Verbindungen für Webhooks")
+    parser.add_argument("--symbols", type=int, default=50, help="Anzahl verschiedener Coins")
+    parser.add_argument("--pollers", type=int, default=10, help="Gleichzeitige Dashboard-Leser")
+    parser.add_argument("--poll-interval", type=float, default=0.1, help="Pause zwischen Polls in Sekunden")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,59 +2,60 @@ import React, { useState, useEffect, useCallback } from 'react';
 import CoinCard from './components/CoinCard';
 import MacroCard from './components/MacroCard';
 
+// Ersetzt einen Eintrag per Symbol oder hängt ihn an
+function upsert(list, item) {
+    const index = list.findIndex(entry => entry.symbol === item.symbol);
+    if (index < 0) return [...list, item];
+    const next = [...list];
+    next[index] = item;
+    return next;
+}
+
 function App() {
     const [activeTab, setActiveTab] = useState('assets');
     const [coins, setCoins] = useState([]);
     const [macros, setMacros] = useState([]);
     const [loading, setLoading] = useState(true);
     const [lastUpdate, setLastUpdate] = useState(null);
-    const [countdown, setCountdown] = useState(3);
-
-    const fetchData = useCallback(async () => {
-        try {
-            const [coinsRes, macrosRes] = await Promise.all([
-                fetch('/api/coins'),
-                fetch('/api/macro')
-            ]);
-
-            if (coinsRes.ok) {
-                const coinsData = await coinsRes.json();
-                setCoins(coinsData.coins);
-            }
-
-            if (macrosRes.ok) {
-                const macrosData = await macrosRes.json();
-                setMacros(macrosData.macros);
-            }
-
-            setLastUpdate(new Date());
-            setLoading(false);
-            setCountdown(3);
-        } catch (error) {
-            console.error('Fetch error:', error);
-            setLoading(false);
-        }
+    const [, setClock] = useState(0);
+
+    const handleSnapshot = useCallback((event) => {
+        const data = JSON.parse(event.data);
+        setCoins(data.coins);
+        setMacros(data.macro);
+        setLastUpdate(new Date());
+        setLoading(false);
     }, []);
 
-    useEffect(() => {
-        fetchData();
-
-        const interval = setInterval(() => {
-            setCountdown(prev => {
-                if (prev <= 1) {
-                    fetchData();
-                    return 3;
-                }
-                return prev - 1;
-            });
-        }, 1000);
-
-        document.addEventListener('visibilitychange', () => {
-            if (document.visibilityState === 'visible') fetchData();
-        });
+    const handleCoin = useCallback((event) => {
+        const coin = JSON.parse(event.data);
+        setCoins(prev => upsert(prev, coin));
+        setLastUpdate(new Date());
+    }, []);
+
+    const handleMacro = useCallback((event) => {
+        const macro = JSON.parse(event.data);
+        setMacros(prev => upsert(prev, macro));
+        setLastUpdate(new Date());
+    }, []);
 
-        return () => clearInterval(interval);
-    }, [fetchData]);
+    useEffect(() => {
+        // Server-Push statt Polling: Snapshot beim Verbinden, danach nur Deltas.
+        // EventSource verbindet sich nach Fehlern selbst neu (mit frischem Snapshot).
+        const source = new EventSource('/api/stream');
+        source.addEventListener('snapshot', handleSnapshot);
+        source.addEventListener('coin', handleCoin);
+        source.addEventListener('macro', handleMacro);
+        source.onerror = () => setLoading(false);
+
+        // Relative Zeiten ("5m ago") ohne neue Requests weiterzählen
+        const clock = setInterval(() => setClock(tick => tick + 1), 30000);
+
+        return () => {
+            source.close();
+            clearInterval(clock);
+        };
+    }, [handleSnapshot, handleCoin, handleMacro]);
 
     // Calculate Market Verdict from macro data
     const calculateVerdict = () => {
@@ -102,7 +103,6 @@ function App() {
                     <div className="status-badge">
                         <div className="live-dot"></div>
                         <span style={{ color: '#00d26a' }}>LIVE</span>
-                        <span style={{ color: '#636366' }}>{countdown}s</span>
                     </div>
                 </div>
             </header>
@@ -1,4 +1,5 @@
 import React from 'react';
+import { formatTime, minutesSince } from '../utils/time';
 
 function calculateScore(trends) {
     let score = 0;
@@ -11,19 +12,10 @@ function calculateScore(trends) {
     return score;
 }
 
-function formatTime(minutes) {
-    if (minutes === null || minutes === undefined) return '—';
-    if (minutes < 1) return 'NOW';
-    if (minutes < 60) return `${minutes}m`;
-    const hours = Math.floor(minutes / 60);
-    if (hours < 24) return `${hours}h`;
-    const days = Math.floor(hours / 24);
-    return `${days}d`;
-}
-
 function CoinCard({ coin, delay }) {
     const score = calculateScore(coin.trends);
-    const isRecent = coin.last_updated_minutes_ago !== null && coin.last_updated_minutes_ago < 1;
+    const updatedMinutes = minutesSince(coin.last_updated);
+    const isRecent = updatedMinutes !== null && updatedMinutes < 1;
 
     const renderTrend = (timeframe, trend) => {
         if (!trend) {
@@ -70,7 +62,7 @@ function CoinCard({ coin, delay }) {
                             {isBuy ? 'BUY' : 'SELL'}
                         </span>
                         <div className="signal-time">
-                            {formatTime(signal.minutes_ago)} ago
+                            {formatTime(minutesSince(signal.time))} ago
                         </div>
                     </div>
                 </div>
@@ -109,7 +101,7 @@ function CoinCard({ coin, delay }) {
             <div className="card-footer">
                 <div className="update-info">UPDATED</div>
                 <span className={`update-time ${isRecent ? 'recent' : ''}`}>
-                    {formatTime(coin.last_updated_minutes_ago)}
+                    {formatTime(updatedMinutes)}
                 </span>
             </div>
         </div>
@@ -1,4 +1,5 @@
 import React from 'react';
+import { formatTime, minutesSince } from '../utils/time';
 
 const MACRO_ICONS = {
     'BTC': '₿',
@@ -9,16 +10,6 @@ const MACRO_ICONS = {
     'OTHERS': '◎',
 };
 
-function formatTime(minutes) {
-    if (minutes === null || minutes === undefined) return '—';
-    if (minutes < 1) return 'NOW';
-    if (minutes < 60) return `${minutes}m`;
-    const hours = Math.floor(minutes / 60);
-    if (hours < 24) return `${hours}h`;
-    const days = Math.floor(hours / 24);
-    return `${days}d`;
-}
-
 function MacroCard({ macro, delay }) {
     const icon = MACRO_ICONS[macro.symbol] || '●';
 
@@ -54,7 +45,7 @@ function MacroCard({ macro, delay }) {
             <div className="card-footer">
                 <div className="update-info">UPDATED</div>
                 <span className="update-time">
-                    {formatTime(macro.last_updated_minutes_ago)}
+                    {formatTime(minutesSince(macro.last_updated))}
                 </span>
             </div>
         </div>
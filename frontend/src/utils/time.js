@@ -0,0 +1,15 @@
+// Relative Zeit wird im Browser aus absoluten Timestamps berechnet
+export function minutesSince(iso) {
+    if (!iso) return null;
+    return Math.max(0, Math.floor((Date.now() - Date.parse(iso)) / 60000));
+}
+
+export function formatTime(minutes) {
+    if (minutes === null || minutes === undefined) return '—';
+    if (minutes < 1) return 'NOW';
+    if (minutes < 60) return `${minutes}m`;
+    const hours = Math.floor(minutes / 60);
+    if (hours < 24) return `${hours}h`;
+    const days = Math.floor(hours / 24);
+    return `${days}d`;
+}
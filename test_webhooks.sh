@@ -22,6 +22,25 @@ echo "🔔 Testing Signals..."
 curl -s -X POST "$BASE_URL/webhook" -d "VIRTUALUSDT.P, 1D - Buy Signal" && echo " ✓ VIRTUAL Buy Signal"
 curl -s -X POST "$BASE_URL/webhook" -d "PEPEUSDT.P, 1D - Sell Signal" && echo " ✓ PEPE Sell Signal"
 
+# Dedup: gleiches Signal auf anderen Timeframes ist kein Duplikat
+# (Sell vorab setzt die Serien zurück, damit das Skript wiederholbar bleibt)
+echo ""
+echo "🔁 Testing Dedup per Timeframe..."
+
+for tf in 1D 4H 1W; do
+    curl -s -o /dev/null -X POST "$BASE_URL/webhook" -d "DOGEUSDT.P, $tf - Sell Signal"
+done
+curl -s -o /dev/null -X POST "$BASE_URL/webhook" -d "DOGEUSDT.P, 1D - Buy Signal"
+for tf in 4H 1W; do
+    response=$(curl -s -X POST "$BASE_URL/webhook" -d "DOGEUSDT.P, $tf - Buy Signal")
+    if echo "$response" | grep -q '"status":"success"'; then
+        echo " ✓ DOGE $tf Buy Signal kein Duplikat"
+    else
+        echo " ✗ DOGE $tf Buy Signal nicht angenommen: $response"
+        FAILED=1
+    fi
+done
+
 # Test Macro Webhooks
 echo ""
 echo "🌐 Testing Macro Indicators..."
@@ -52,4 +71,8 @@ curl -s "$BASE_URL/api/macro" | python -m json.tool 2>/dev/null || curl -s "$BAS
 
 echo ""
 echo "=================================="
+if [ -n "$FAILED" ]; then
+    echo "❌ Some checks failed"
+    exit 1
+fi
 echo "✅ All tests completed!"